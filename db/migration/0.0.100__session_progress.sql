@@ -0,0 +1,44 @@
+-- Migration: 0.0.100__session_progress.sql
+-- Description: Live progress counters on quiz sessions
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- Maintained by each answer submission with a single UPDATE ... RETURNING, so
+-- session status and results are single-row reads
+ALTER TABLE tutor.quiz_sessions
+    ADD COLUMN IF NOT EXISTS questions_answered INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE tutor.quiz_sessions
+    ADD COLUMN IF NOT EXISTS current_question INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill existing sessions from the first submission for each question
+WITH first_answers AS (
+    SELECT DISTINCT ON (s.session_id, s.question_id)
+        s.session_id, s.question_id, s.score, s.max_score
+    FROM tutor.answer_submissions s
+    ORDER BY s.session_id, s.question_id, s.submitted_at
+),
+progress AS (
+    SELECT
+        fa.session_id,
+        COUNT(*) AS questions_answered,
+        SUM(fa.score) AS score,
+        SUM(fa.max_score) AS max_score,
+        MAX(array_position(qs.questions, fa.question_id)) AS current_question
+    FROM first_answers fa
+    JOIN tutor.quiz_sessions qs ON qs.session_id = fa.session_id
+    GROUP BY fa.session_id
+)
+UPDATE tutor.quiz_sessions qs
+SET questions_answered = p.questions_answered,
+    score = p.score,
+    max_score = p.max_score,
+    current_question = COALESCE(p.current_question, 0)
+FROM progress p
+WHERE qs.session_id = p.session_id;
+
+-- Add comments
+COMMENT ON COLUMN tutor.quiz_sessions.questions_answered IS 'Number of distinct session questions answered';
+COMMENT ON COLUMN tutor.quiz_sessions.current_question IS 'Zero-based index of the next question (one past the furthest answered question)';
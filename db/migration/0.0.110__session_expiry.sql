@@ -0,0 +1,35 @@
+-- Migration: 0.0.110__session_expiry.sql
+-- Description: Deadlines for timed quiz and competition sessions
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- started_at + time_limit, stored so expiry is one indexed range scan
+ALTER TABLE tutor.quiz_sessions
+    ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE tutor.competition_sessions
+    ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP WITH TIME ZONE;
+
+-- Backfill timed sessions
+UPDATE tutor.quiz_sessions
+SET expires_at = started_at + make_interval(secs => time_limit)
+WHERE time_limit IS NOT NULL AND expires_at IS NULL;
+
+UPDATE tutor.competition_sessions
+SET expires_at = started_at + make_interval(secs => time_limit)
+WHERE time_limit IS NOT NULL AND expires_at IS NULL;
+
+-- Only open timed sessions are candidates for the expiry sweep
+CREATE INDEX IF NOT EXISTS idx_quiz_sessions_expiry
+    ON tutor.quiz_sessions (expires_at)
+    WHERE status = 'in_progress' AND expires_at IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_competition_sessions_expiry
+    ON tutor.competition_sessions (expires_at)
+    WHERE status = 'in_progress' AND expires_at IS NOT NULL;
+
+-- Add comments
+COMMENT ON COLUMN tutor.quiz_sessions.expires_at IS 'Deadline (started_at + time_limit); NULL if no time limit';
+COMMENT ON COLUMN tutor.competition_sessions.expires_at IS 'Deadline (started_at + time_limit); NULL if no time limit';
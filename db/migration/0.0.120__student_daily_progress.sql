@@ -0,0 +1,90 @@
+-- Migration: 0.0.120__student_daily_progress.sql
+-- Description: Daily answer rollups per student, subject and topic
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- One row per (student, subject, topic, UTC day) with answer totals, upserted by each
+-- answer submission. Time-range and trend queries read these instead of answer_submissions.
+-- topic is '' for questions without a topic.
+CREATE TABLE IF NOT EXISTS tutor.student_daily_progress (
+    student_id UUID NOT NULL REFERENCES tutor.user_accounts(user_id) ON DELETE CASCADE,
+    tenant_id UUID NOT NULL REFERENCES tutor.tenants(tenant_id) ON DELETE RESTRICT,
+    subject_code VARCHAR(100) NOT NULL,
+    topic VARCHAR(255) NOT NULL DEFAULT '',
+    day DATE NOT NULL,
+    total_questions INTEGER NOT NULL DEFAULT 0,
+    correct_answers INTEGER NOT NULL DEFAULT 0,
+    score_sum DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    max_score_sum DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, subject_code, topic, day)
+);
+
+-- Range reads per student and per tenant (dashboards)
+CREATE INDEX IF NOT EXISTS idx_student_daily_progress_student_day
+    ON tutor.student_daily_progress(student_id, day);
+CREATE INDEX IF NOT EXISTS idx_student_daily_progress_tenant_day
+    ON tutor.student_daily_progress(tenant_id, day);
+
+-- Backfill from existing submissions
+INSERT INTO tutor.student_daily_progress (
+    student_id, tenant_id, subject_code, topic, day,
+    total_questions, correct_answers, score_sum, max_score_sum
+)
+SELECT
+    s.student_id,
+    s.tenant_id,
+    q.subject_code,
+    COALESCE(q.metadata ->> 'topic', ''),
+    (s.submitted_at AT TIME ZONE 'UTC')::date,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE s.is_correct),
+    SUM(s.score),
+    SUM(s.max_score)
+FROM tutor.answer_submissions s
+JOIN tutor.questions q ON q.question_id = s.question_id
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (student_id, subject_code, topic, day) DO UPDATE SET
+    total_questions = EXCLUDED.total_questions,
+    correct_answers = EXCLUDED.correct_answers,
+    score_sum = EXCLUDED.score_sum,
+    max_score_sum = EXCLUDED.max_score_sum;
+
+-- Same visibility as tutor.student_progress
+ALTER TABLE tutor.student_daily_progress ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS student_daily_progress_select_student ON tutor.student_daily_progress;
+CREATE POLICY student_daily_progress_select_student ON tutor.student_daily_progress
+    FOR SELECT
+    USING (student_id = tutor.current_user_id() AND tutor.is_student() AND tenant_id = tutor.current_tenant_id());
+
+DROP POLICY IF EXISTS student_daily_progress_select_tutor ON tutor.student_daily_progress;
+CREATE POLICY student_daily_progress_select_tutor ON tutor.student_daily_progress
+    FOR SELECT
+    USING (
+        tenant_id = tutor.current_tenant_id() AND
+        tutor.is_tutor() AND
+        EXISTS (
+            SELECT 1 FROM tutor.student_tutor_assignments
+            WHERE student_id = tutor.student_daily_progress.student_id
+            AND tutor_id = tutor.current_user_id()
+            AND status = 'active'
+        )
+    );
+
+DROP POLICY IF EXISTS student_daily_progress_select_tenant_admin ON tutor.student_daily_progress;
+CREATE POLICY student_daily_progress_select_tenant_admin ON tutor.student_daily_progress
+    FOR SELECT
+    USING (tenant_id = tutor.current_tenant_id() AND tutor.is_tenant_admin());
+
+DROP POLICY IF EXISTS student_daily_progress_select_system_admin ON tutor.student_daily_progress;
+CREATE POLICY student_daily_progress_select_system_admin ON tutor.student_daily_progress
+    FOR SELECT
+    USING (tutor.is_system_admin());
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON tutor.student_daily_progress TO app_user;
+GRANT SELECT ON tutor.student_daily_progress TO app_readonly;
+
+COMMENT ON TABLE tutor.student_daily_progress IS 'Daily answer totals per student, subject and topic (UTC days)';
+COMMENT ON COLUMN tutor.student_daily_progress.topic IS 'Question topic, empty string if none';
@@ -0,0 +1,25 @@
+-- Migration: 0.0.130__competition_registration_capacity.sql
+-- Description: Atomic competition capacity and waitlist ordering
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- participant_count is now maintained by conditional UPDATEs; recount it once, since
+-- the old read-modify-write could lose increments under concurrent registration
+UPDATE tutor.competitions c
+SET participant_count = (
+    SELECT count(*)
+    FROM tutor.competition_registrations r
+    WHERE r.competition_id = c.competition_id
+      AND r.status <> 'cancelled'
+      AND r.waitlist_position IS NULL
+);
+
+-- Waitlist promotion takes the head of the queue per competition
+CREATE INDEX IF NOT EXISTS idx_competition_registrations_waitlist
+    ON tutor.competition_registrations (competition_id, waitlist_position, registered_at)
+    WHERE waitlist_position IS NOT NULL AND status <> 'cancelled';
+
+-- Add comments
+COMMENT ON COLUMN tutor.competitions.participant_count IS 'Registrations holding a seat (not cancelled, not waitlisted)';
@@ -0,0 +1,36 @@
+-- Migration: 0.0.140__competition_question_sets.sql
+-- Description: Shared question sets for competition sessions
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- Questions of a competition, generated once per participating tenant (questions are
+-- tenant-scoped) and shared by every participant's quiz session
+CREATE TABLE IF NOT EXISTS tutor.competition_question_sets (
+    competition_id UUID NOT NULL REFERENCES tutor.competitions(competition_id) ON DELETE CASCADE,
+    tenant_id UUID NOT NULL REFERENCES tutor.tenants(tenant_id) ON DELETE CASCADE,
+    question_ids UUID[] NOT NULL DEFAULT '{}',
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (competition_id, tenant_id)
+);
+
+ALTER TABLE tutor.competition_question_sets ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS competition_question_sets_tenant ON tutor.competition_question_sets;
+CREATE POLICY competition_question_sets_tenant ON tutor.competition_question_sets
+    FOR ALL
+    USING (tenant_id = tutor.current_tenant_id())
+    WITH CHECK (tenant_id = tutor.current_tenant_id());
+
+DROP POLICY IF EXISTS competition_question_sets_system_admin ON tutor.competition_question_sets;
+CREATE POLICY competition_question_sets_system_admin ON tutor.competition_question_sets
+    FOR ALL
+    USING (tutor.is_system_admin())
+    WITH CHECK (tutor.is_system_admin());
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON tutor.competition_question_sets TO app_user;
+GRANT SELECT ON tutor.competition_question_sets TO app_readonly;
+
+COMMENT ON TABLE tutor.competition_question_sets IS 'Question set of a competition per participating tenant, shared by all its competition sessions';
+COMMENT ON COLUMN tutor.competition_question_sets.question_ids IS 'Questions in canonical order; sessions may use a per-student permutation';
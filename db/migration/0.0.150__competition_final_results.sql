@@ -0,0 +1,36 @@
+-- Migration: 0.0.150__competition_final_results.sql
+-- Description: Persisted final ranks for ended competitions
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- Set once by the finalization job after end_date; NULL until then
+ALTER TABLE tutor.competitions
+    ADD COLUMN IF NOT EXISTS finalized_at TIMESTAMP WITH TIME ZONE;
+
+-- Final standing of each student's best session (NULL for other sessions)
+ALTER TABLE tutor.competition_sessions
+    ADD COLUMN IF NOT EXISTS final_rank INTEGER,
+    ADD COLUMN IF NOT EXISTS grade_level INTEGER,
+    ADD COLUMN IF NOT EXISTS grade_rank INTEGER;
+
+-- Competitions waiting for finalization
+CREATE INDEX IF NOT EXISTS idx_competitions_finalize_due
+    ON tutor.competitions (end_date)
+    WHERE finalized_at IS NULL AND status <> 'cancelled';
+
+-- Final leaderboard pages, overall and per grade bracket
+CREATE INDEX IF NOT EXISTS idx_competition_sessions_final_rank
+    ON tutor.competition_sessions (competition_id, final_rank)
+    WHERE final_rank IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_competition_sessions_grade_rank
+    ON tutor.competition_sessions (competition_id, grade_level, grade_rank)
+    WHERE grade_rank IS NOT NULL;
+
+-- Add comments
+COMMENT ON COLUMN tutor.competitions.finalized_at IS 'When final ranks were computed (NULL until the competition is finalized)';
+COMMENT ON COLUMN tutor.competition_sessions.final_rank IS 'Final overall rank of the student''s best session; NULL for other sessions or before finalization';
+COMMENT ON COLUMN tutor.competition_sessions.grade_level IS 'Student grade level in the competition subject at finalization (grade bracket)';
+COMMENT ON COLUMN tutor.competition_sessions.grade_rank IS 'Final rank within the grade bracket';
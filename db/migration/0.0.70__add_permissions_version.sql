@@ -0,0 +1,18 @@
+-- Migration: 0.0.70__add_permissions_version.sql
+-- Description: Add permissions_version to account tables for stateless JWT verification
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- Bumped whenever an account's role, status or profile changes; access tokens
+-- carry the version they were issued with and are rejected once it moves on
+ALTER TABLE tutor.user_accounts
+    ADD COLUMN IF NOT EXISTS permissions_version INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE tutor.system_admin_accounts
+    ADD COLUMN IF NOT EXISTS permissions_version INTEGER NOT NULL DEFAULT 0;
+
+-- Add comments
+COMMENT ON COLUMN tutor.user_accounts.permissions_version IS 'Incremented on role/status/profile changes; invalidates stateless access tokens';
+COMMENT ON COLUMN tutor.system_admin_accounts.permissions_version IS 'Incremented on role/status changes; invalidates stateless access tokens';
@@ -0,0 +1,27 @@
+-- Migration: 0.0.80__question_inventory.sql
+-- Description: Pre-generated question stock per (subject, grade level, difficulty, question type)
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- Questions generated ahead of demand by the inventory refill worker.
+-- Rows are deleted when a question is drawn into a quiz session.
+CREATE TABLE IF NOT EXISTS tutor.question_inventory (
+    question_id UUID PRIMARY KEY REFERENCES tutor.questions(question_id) ON DELETE CASCADE,
+    subject_id UUID NOT NULL REFERENCES tutor.subjects(subject_id) ON DELETE RESTRICT,
+    grade_level INTEGER,
+    difficulty tutor.question_difficulty NOT NULL,
+    question_type tutor.question_type NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Draws take the oldest rows of one bucket (FOR UPDATE SKIP LOCKED)
+CREATE INDEX IF NOT EXISTS idx_question_inventory_bucket
+    ON tutor.question_inventory(subject_id, grade_level, difficulty, question_type, created_at);
+
+-- Inventory is shared, not tenant data; only the application role touches it
+GRANT SELECT, INSERT, UPDATE, DELETE ON tutor.question_inventory TO app_user;
+GRANT SELECT ON tutor.question_inventory TO app_readonly;
+
+COMMENT ON TABLE tutor.question_inventory IS 'Pre-generated questions available to be drawn into quiz sessions';
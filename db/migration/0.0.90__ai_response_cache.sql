@@ -0,0 +1,30 @@
+-- Migration: 0.0.90__ai_response_cache.sql
+-- Description: Persistent AI response cache keyed by normalized prompt hash and model version
+-- Created: 2026
+
+-- Set search path to tutor schema
+SET search_path TO tutor, public;
+
+-- Provider responses for questions, hints and narratives. cache_key is a SHA-256 of the
+-- task, model version, sampling parameters and whitespace-normalized prompt.
+-- Rows older than AI_CACHE_TTL_SECONDS are ignored and pruned; beyond AI_CACHE_MAX_ROWS
+-- the least recently used rows are pruned.
+CREATE TABLE IF NOT EXISTS tutor.ai_response_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    task VARCHAR(50) NOT NULL,
+    model_version VARCHAR(100) NOT NULL,
+    response TEXT NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- TTL and LRU pruning
+CREATE INDEX IF NOT EXISTS idx_ai_response_cache_created_at ON tutor.ai_response_cache(created_at);
+CREATE INDEX IF NOT EXISTS idx_ai_response_cache_last_used_at ON tutor.ai_response_cache(last_used_at);
+
+-- Generated content is shared, not tenant data; only the application role touches it
+GRANT SELECT, INSERT, UPDATE, DELETE ON tutor.ai_response_cache TO app_user;
+GRANT SELECT ON tutor.ai_response_cache TO app_readonly;
+
+COMMENT ON TABLE tutor.ai_response_cache IS 'Cached AI provider responses keyed by normalized prompt hash and model version';
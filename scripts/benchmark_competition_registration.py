@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark competition registration under a registration-open spike.
+
+Creates a throwaway competition with --capacity seats, then has --concurrency
+threads register --students users of a tenant at once (released by a barrier).
+This runs once with the old read-check-insert path, which bumps
+participant_count in Python, and once with CompetitionService.register_for_competition
+(conditional UPDATE ... RETURNING plus INSERT ... ON CONFLICT).
+
+For each mode it reports registrations/second and latency percentiles. It also
+checks correctness:
+- seated: registrations holding a seat
+- count: the final participant_count
+- overbooked: seats handed out beyond capacity
+- lost: increments lost by concurrent read-modify-write (seated - count)
+The competitions are deleted afterwards (registrations cascade).
+
+Needs a database with migrations applied and at least a few users and one subject.
+Connections come from the application's pool, so raise DB_POOL_SIZE / DB_MAX_OVERFLOW
+for high concurrency.
+
+Usage:
+    python scripts/benchmark_competition_registration.py --tenant-id <uuid>
+    python scripts/benchmark_competition_registration.py --tenant-id <uuid> --students 1000 --capacity 300 --concurrency 64
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from queue import Queue, Empty
+from typing import Dict, Any, List
+from uuid import UUID
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import select, func, delete
+
+from src.core.database import SessionLocal
+from src.core.exceptions import BadRequestError
+from src.models.database import Competition, CompetitionRegistration, Subject, UserAccount
+from src.models.user import CompetitionStatus, RegistrationStatus
+from src.services.competition import CompetitionService
+
+
+def legacy_register(db, competition_id: UUID, tenant_id: UUID, student_id: UUID) -> None:
+    """The previous registration path: read, check, insert, count += 1 in Python"""
+    competition = db.query(Competition).filter(Competition.competition_id == competition_id).first()
+    existing = db.query(CompetitionRegistration).filter(
+        CompetitionRegistration.competition_id == competition_id,
+        CompetitionRegistration.student_id == student_id,
+        CompetitionRegistration.status == RegistrationStatus.REGISTERED,
+    ).first()
+    if existing:
+        raise BadRequestError("Already registered for this competition")
+    if competition.max_participants and (competition.participant_count or 0) >= competition.max_participants:
+        raise BadRequestError("Maximum participants reached")
+    db.add(CompetitionRegistration(
+        competition_id=competition_id,
+        tenant_id=tenant_id,
+        student_id=student_id,
+        status=RegistrationStatus.REGISTERED,
+    ))
+    competition.participant_count = (competition.participant_count or 0) + 1
+    db.commit()
+
+
+def _create_competition(tenant_id: UUID, capacity: int, mode: str) -> UUID:
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        subject = db.execute(select(Subject).limit(1)).scalar_one()
+        competition = Competition(
+            tenant_id=tenant_id,
+            name=f"Registration benchmark ({mode}) {now.isoformat()}",
+            subject_id=subject.subject_id,
+            subject_code=subject.subject_code,
+            status=CompetitionStatus.UPCOMING,
+            start_date=now + timedelta(days=1),
+            end_date=now + timedelta(days=2),
+            registration_start=now - timedelta(hours=1),
+            registration_end=now + timedelta(hours=23),
+            rules={},
+            max_participants=capacity,
+            participant_count=0,
+            created_by=tenant_id,
+        )
+        db.add(competition)
+        db.commit()
+        return competition.competition_id
+
+
+def _run(mode: str, tenant_id: UUID, student_ids: List[UUID], capacity: int, concurrency: int) -> Dict[str, Any]:
+    competition_id = _create_competition(tenant_id, capacity, mode)
+    pending: Queue = Queue()
+    for student_id in student_ids:
+        pending.put(student_id)
+    barrier = threading.Barrier(concurrency)
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    lock = threading.Lock()
+
+    def worker() -> None:
+        barrier.wait()
+        while True:
+            try:
+                student_id = pending.get_nowait()
+            except Empty:
+                return
+            started = time.perf_counter()
+            with SessionLocal() as db:
+                try:
+                    if mode == "legacy":
+                        legacy_register(db, competition_id, tenant_id, student_id)
+                        outcome = "seated"
+                    else:
+                        result = CompetitionService(db).register_for_competition(competition_id, tenant_id, student_id)
+                        outcome = "seated" if result["waitlist_position"] is None else "waitlisted"
+                except BadRequestError:
+                    db.rollback()
+                    outcome = "rejected"
+                except Exception as e:
+                    db.rollback()
+                    outcome = f"error: {type(e).__name__}"
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        count = db.execute(
+            select(Competition.participant_count).where(Competition.competition_id == competition_id)
+        ).scalar_one()
+        seated = db.execute(
+            select(func.count()).select_from(CompetitionRegistration).where(
+                CompetitionRegistration.competition_id == competition_id,
+                CompetitionRegistration.status != RegistrationStatus.CANCELLED,
+                CompetitionRegistration.waitlist_position.is_(None),
+            )
+        ).scalar_one()
+        db.execute(delete(Competition).where(Competition.competition_id == competition_id))
+        db.commit()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "per_second": len(student_ids) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "seated": seated,
+        "count": count,
+        "overbooked": max(seated - capacity, 0),
+        "lost": seated - count,
+        "outcomes": dict(outcomes),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark competition registration under a registration-open spike")
+    parser.add_argument("--tenant-id", type=UUID, required=True, help="Tenant whose users register")
+    parser.add_argument("--students", type=int, default=500, help="Registrations to attempt (users of the tenant)")
+    parser.add_argument("--capacity", type=int, help="max_participants (default: half the students)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent registering threads")
+    parser.add_argument("--modes", default="legacy,atomic", help="Comma-separated: legacy, atomic")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        student_ids = db.execute(
+            select(UserAccount.user_id).where(UserAccount.tenant_id == args.tenant_id).limit(args.students)
+        ).scalars().all()
+    if not student_ids:
+        sys.exit("No users found for this tenant")
+    capacity = args.capacity or max(len(student_ids) // 2, 1)
+
+    print(f"Students: {len(student_ids)}, capacity: {capacity}, concurrency: {args.concurrency}")
+    print(f"{'mode':<8}{'seconds':>9}{'regs/s':>9}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'seated':>8}{'count':>7}{'overbooked':>12}{'lost':>6}  outcomes")
+    for mode in args.modes.split(","):
+        result = _run(mode.strip(), args.tenant_id, student_ids, capacity, args.concurrency)
+        print(f"{result['mode']:<8}{result['seconds']:>9.2f}{result['per_second']:>9.1f}"
+              f"{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['seated']:>8}{result['count']:>7}"
+              f"{result['overbooked']:>12}{result['lost']:>6}  {result['outcomes']}")
+
+
+if __name__ == "__main__":
+    main()
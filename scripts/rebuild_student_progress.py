@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Rebuild StudentProgress.subject_stats and the daily rollups
+(tutor.student_daily_progress) from raw answer submissions.
+
+Both are normally kept up to date by each answer submission. Run this after a
+backfill or data fix, or if the totals are suspected to have drifted. It
+aggregates answer_submissions in the database (grouped by student, subject,
+topic and day) and overwrites the rows in scope.
+
+Usage:
+    python scripts/rebuild_student_progress.py
+    python scripts/rebuild_student_progress.py --tenant-id <uuid>
+    python scripts/rebuild_student_progress.py --student-id <uuid>
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from uuid import UUID
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.database import SessionLocal
+from src.services.progress import ProgressService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute student progress totals from answer submissions")
+    parser.add_argument("--tenant-id", type=UUID, help="Only rebuild students of this tenant")
+    parser.add_argument("--student-id", type=UUID, help="Only rebuild this student")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        service = ProgressService(db)
+        rebuilt = service.rebuild_progress(tenant_id=args.tenant_id, student_id=args.student_id)
+        daily = service.rebuild_daily_progress(tenant_id=args.tenant_id, student_id=args.student_id)
+    print(f"Rebuilt progress for {rebuilt} students ({daily} daily rows) in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
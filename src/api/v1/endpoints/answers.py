@@ -3,17 +3,18 @@ Answers endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
-from src.core.database import get_db
-from src.core.dependencies import get_current_user
+from src.core.database import get_db, get_async_db
+from src.core.dependencies import get_current_user, get_current_user_async
 from src.schemas.answer import (
     SubmitAnswerRequest,
     SubmitAnswerResponse,
     ValidateAnswerRequest,
     ValidateAnswerResponse,
 )
-from src.services.answer import AnswerService
+from src.services.answer import AnswerService, AsyncAnswerService
 
 router = APIRouter()
 
@@ -22,16 +23,16 @@ router = APIRouter()
 async def submit_answer(
     question_id: UUID,
     request: SubmitAnswerRequest,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Submit answer for validation"""
-    answer_service = AnswerService(db)
+    answer_service = AsyncAnswerService(db)
     
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     student_id = UUID(current_user["user_id"])
     
-    result = answer_service.submit_answer(
+    result = await answer_service.submit_answer(
         question_id=question_id,
         tenant_id=tenant_id,
         student_id=student_id,
@@ -8,8 +8,9 @@ from uuid import UUID
 
 from src.core.database import get_db
 from src.core.dependencies import get_current_tenant, get_current_user
-from src.core.security import verify_password, create_access_token, create_refresh_token
+from src.core.security import create_access_token, create_refresh_token
 from src.core.config import settings
+from src.core.principal import invalidate_principal, resolve_principal, load_permissions_version
 from src.schemas.auth import (
     LoginRequest,
     LoginResponse,
@@ -46,7 +47,7 @@ async def login(
     tenant_domain = request.domain or domain or x_tenant_domain
     
     auth_service = AuthService(db)
-    user = auth_service.authenticate_user(
+    user = await auth_service.authenticate_user(
         username=request.username,
         password=request.password,
         domain=tenant_domain,  # Can be None for system admins
@@ -67,6 +68,8 @@ async def login(
         "role": user["role"],
         "tenant_id": str(user["tenant_id"]) if user.get("tenant_id") else None,
         "user_type": user.get("user_type", "tenant_user"),  # "tenant_user" or "system_admin"
+        "grade_level": user.get("grade_level"),
+        "pv": user.get("permissions_version", 0),  # Permissions version (stateless auth)
     }
     
     access_token = create_access_token(
@@ -137,6 +140,25 @@ async def refresh_token(
             "user_type": payload.get("user_type", "tenant_user"),
         }
         
+        if settings.AUTH_STATELESS_MODE:
+            # Re-issue claims from the database so role, grade and status changes apply on refresh
+            invalidate_principal(token_data["sub"])
+            principal = resolve_principal(db, token_data["sub"], token_data["user_type"])
+            version = load_permissions_version(db, token_data["sub"], token_data["user_type"])
+            if principal is None or version is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid refresh token",
+                )
+            token_data.update({
+                "username": principal["username"],
+                "email": principal["email"],
+                "role": principal["role"],
+                "tenant_id": principal["tenant_id"],
+                "grade_level": principal["grade_level"],
+                "pv": version,
+            })
+        
         access_token = create_access_token(
             data=token_data,
             expires_delta=timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES),
@@ -167,7 +189,7 @@ async def change_password(
     from uuid import UUID
     
     auth_service = AuthService(db)
-    result = auth_service.change_password(
+    result = await auth_service.change_password(
         user_id=UUID(current_user["user_id"]),
         user_type=current_user.get("user_type", "tenant_user"),
         current_password=request.current_password,
@@ -190,7 +212,7 @@ async def forgot_password(
     Request password reset OTP
     """
     auth_service = AuthService(db)
-    result = auth_service.request_password_reset(request.email)
+    result = await auth_service.request_password_reset(request.email)
     
     return ForgotPasswordResponse(
         message=result["message"],
@@ -207,7 +229,7 @@ async def reset_password(
     Reset password with OTP
     """
     auth_service = AuthService(db)
-    result = auth_service.reset_password_with_otp(
+    result = await auth_service.reset_password_with_otp(
         email=request.email,
         otp=request.otp,
         new_password=request.new_password,
@@ -230,7 +252,7 @@ async def resend_otp(
     Resend OTP for password reset
     """
     auth_service = AuthService(db)
-    result = auth_service.resend_otp(request.email)
+    result = await auth_service.resend_otp(request.email)
     
     return ResendOTPResponse(
         message=result["message"],
@@ -2,6 +2,7 @@
 Competitions endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import Optional
@@ -15,11 +16,13 @@ from src.schemas.competition import (
     CreateCompetitionRequest,
     UpdateCompetitionRequest,
     CompetitionRegistrationResponse,
+    CompetitionRegistrationCancelResponse,
     CompetitionLeaderboardResponse,
     CompetitionResultsResponse,
     CompetitionStatisticsResponse,
 )
 from src.services.competition import CompetitionService
+from src.services.leaderboard_stream import leaderboard_streams
 
 router = APIRouter()
 
@@ -85,6 +88,29 @@ async def register_for_competition(
     return CompetitionRegistrationResponse(**result)
 
 
+@router.delete("/{competition_id}/register", response_model=CompetitionRegistrationCancelResponse, status_code=status.HTTP_200_OK)
+async def cancel_competition_registration(
+    competition_id: UUID,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Cancel own competition registration (the seat passes to the waitlist)"""
+    if current_user.get("role") != "student":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only students can cancel registrations")
+    
+    competition_service = CompetitionService(db)
+    
+    student_id = UUID(current_user["user_id"])
+    
+    result = competition_service.cancel_registration(
+        competition_id=competition_id,
+        student_id=student_id,
+        cancelled_by=student_id,
+    )
+    
+    return CompetitionRegistrationCancelResponse(**result)
+
+
 @router.post("/{competition_id}/start", status_code=status.HTTP_201_CREATED)
 async def start_competition_session(
     competition_id: UUID,
@@ -100,7 +126,7 @@ async def start_competition_session(
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     student_id = UUID(current_user["user_id"])
     
-    result = competition_service.start_competition_session(
+    result = await competition_service.start_competition_session(
         competition_id=competition_id,
         tenant_id=tenant_id,
         student_id=student_id,
@@ -116,6 +142,7 @@ async def get_competition_leaderboard(
     limit: int = Query(100),
     offset: int = Query(0),
     grade_level: Optional[int] = Query(None),
+    student_id: Optional[UUID] = Query(None, description="Fill user_rank and user_position for this student"),
     db: Session = Depends(get_db),
 ):
     """Get competition leaderboard"""
@@ -127,37 +154,45 @@ async def get_competition_leaderboard(
         limit=limit,
         offset=offset,
         grade_level=grade_level,
+        student_id=student_id,
     )
     
     return CompetitionLeaderboardResponse(**result)
 
 
+@router.get("/{competition_id}/leaderboard/stream", status_code=status.HTTP_200_OK)
+async def stream_competition_leaderboard(
+    competition_id: UUID,
+    db: Session = Depends(get_db),
+):
+    """
+    Live competition leaderboard as Server-Sent Events: a snapshot of the top
+    entries, then rank deltas at most once per tick
+    """
+    CompetitionService(db).get_competition(competition_id)
+    # Release the connection now rather than when the stream ends
+    db.close()
+    
+    return StreamingResponse(
+        leaderboard_streams.stream(competition_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{competition_id}/results", response_model=CompetitionResultsResponse, status_code=status.HTTP_200_OK)
 async def get_competition_results(
     competition_id: UUID,
     db: Session = Depends(get_db),
 ):
-    """Get competition results"""
+    """Get competition results: final leaderboard, winners and statistics, once finalized"""
     competition_service = CompetitionService(db)
     competition = competition_service.get_competition(competition_id)
     
     if competition["status"] != "ended":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Competition has not ended")
     
-    # Get leaderboard
-    leaderboard_data = competition_service.get_leaderboard(competition_id, type="final", limit=100)
-    
-    # TODO: Get winners and statistics
-    return CompetitionResultsResponse(
-        competition_id=competition_id,
-        name=competition["name"],
-        status=competition["status"],
-        ended_at=competition.get("end_date"),
-        total_participants=leaderboard_data["total_participants"],
-        winners=leaderboard_data["leaderboard"][:10],  # Top 10
-        statistics={},
-        leaderboard=leaderboard_data["leaderboard"],
-    )
+    return CompetitionResultsResponse(**competition_service.get_results(competition_id))
 
 
 # Admin endpoints
@@ -173,7 +208,7 @@ async def create_competition(
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     created_by = UUID(current_user["user_id"])
     
-    result = competition_service.create_competition(
+    result = await competition_service.create_competition(
         tenant_id=tenant_id,
         created_by=created_by,
         name=request.name,
@@ -26,7 +26,7 @@ async def get_hint(
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     student_id = UUID(current_user["user_id"])
     
-    result = hint_service.get_hint(
+    result = await hint_service.get_hint(
         question_id=question_id,
         tenant_id=tenant_id,
         hint_level=request.hint_level,
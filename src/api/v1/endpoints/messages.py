@@ -3,11 +3,12 @@ Messages endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from typing import Optional
 
-from src.core.database import get_db
-from src.core.dependencies import get_current_user
+from src.core.database import get_db, get_async_db
+from src.core.dependencies import get_current_user, get_current_user_async
 from src.schemas.message import (
     SendMessageRequest,
     SendMessageResponse,
@@ -16,7 +17,7 @@ from src.schemas.message import (
     MarkReadResponse,
     MarkConversationReadResponse,
 )
-from src.services.message import MessageService
+from src.services.message import MessageService, AsyncMessageService
 
 router = APIRouter()
 
@@ -54,16 +55,16 @@ async def get_messages(
     unread_only: bool = Query(False),
     limit: int = Query(50),
     offset: int = Query(0),
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get messages"""
-    message_service = MessageService(db)
+    message_service = AsyncMessageService(db)
     
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     user_id = UUID(current_user["user_id"])
     
-    result = message_service.get_messages(
+    result = await message_service.get_messages(
         tenant_id=tenant_id,
         user_id=user_id,
         conversation_with=conversation_with,
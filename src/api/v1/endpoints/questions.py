@@ -1,19 +1,19 @@
 """
 Questions endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from typing import Optional
+from typing import Optional, List
 
-from src.core.database import get_db
-from src.core.dependencies import get_current_user
+from src.core.database import get_async_db
+from src.core.dependencies import get_current_user_async
 from src.schemas.question import (
     GenerateQuestionRequest,
     QuestionResponse,
     QuestionNarrativeResponse,
 )
-from src.services.question import QuestionService
+from src.services.question import AsyncQuestionService
 
 router = APIRouter()
 
@@ -21,13 +21,13 @@ router = APIRouter()
 @router.post("/generate", response_model=QuestionResponse, status_code=status.HTTP_201_CREATED)
 async def generate_question(
     request: GenerateQuestionRequest,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Generate a question using AI"""
-    question_service = QuestionService(db)
+    question_service = AsyncQuestionService(db)
     
-    result = question_service.generate_question(
+    result = await question_service.generate_question(
         tenant_id=UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None,
         subject_id=request.subject_id,
         subject_code=request.subject_code,
@@ -41,17 +41,37 @@ async def generate_question(
     return QuestionResponse(**result)
 
 
+@router.get("", response_model=List[QuestionResponse], status_code=status.HTTP_200_OK)
+async def get_questions(
+    ids: List[str] = Query(..., description="Question ids, comma-separated and/or repeated"),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get many questions in one request, in the requested order (unknown ids are omitted)"""
+    try:
+        question_ids = [UUID(value.strip()) for item in ids for value in item.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid question id")
+    
+    question_service = AsyncQuestionService(db)
+    
+    tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
+    results = await question_service.get_questions(question_ids, tenant_id)
+    
+    return [QuestionResponse(**result) for result in results]
+
+
 @router.get("/{question_id}", response_model=QuestionResponse, status_code=status.HTTP_200_OK)
 async def get_question(
     question_id: UUID,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get question by ID"""
-    question_service = QuestionService(db)
+    question_service = AsyncQuestionService(db)
     
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
-    result = question_service.get_question(question_id, tenant_id)
+    result = await question_service.get_question(question_id, tenant_id)
     
     return QuestionResponse(**result)
 
@@ -59,14 +79,15 @@ async def get_question(
 @router.get("/{question_id}/narrative", response_model=QuestionNarrativeResponse, status_code=status.HTTP_200_OK)
 async def get_question_narrative(
     question_id: UUID,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    refresh: bool = Query(False, description="Bypass the AI response cache and generate a new narrative"),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get educational narrative for a question"""
-    question_service = QuestionService(db)
+    question_service = AsyncQuestionService(db)
     
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
-    result = question_service.get_question_narrative(question_id, tenant_id)
+    result = await question_service.get_question_narrative(question_id, tenant_id, use_cache=not refresh)
     
     return QuestionNarrativeResponse(**result)
 
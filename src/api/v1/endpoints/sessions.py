@@ -1,19 +1,21 @@
 """
 Sessions endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
-from src.core.database import get_db
-from src.core.dependencies import get_current_user
+from src.core.database import get_async_db
+from src.core.dependencies import get_current_user_async
 from src.schemas.session import (
     CreateSessionRequest,
     CreateSessionResponse,
     SessionStatusResponse,
     SessionResultsResponse,
 )
-from src.services.session import SessionService
+from src.schemas.answer import SubmitAnswersBatchRequest, SubmitAnswersBatchResponse
+from src.services.answer import AsyncAnswerService
+from src.services.session import AsyncSessionService
 
 router = APIRouter()
 
@@ -21,16 +23,16 @@ router = APIRouter()
 @router.post("", response_model=CreateSessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_session(
     request: CreateSessionRequest,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new quiz session"""
-    session_service = SessionService(db)
+    session_service = AsyncSessionService(db)
     
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     student_id = UUID(current_user["user_id"])
     
-    result = session_service.create_session(
+    result = await session_service.create_session(
         tenant_id=tenant_id,
         student_id=student_id,
         subject_id=request.subject_id,
@@ -40,6 +42,7 @@ async def create_session(
         num_questions=request.num_questions,
         topics=request.topics,
         time_limit=request.time_limit,
+        include_questions=request.include_questions,
     )
     
     return CreateSessionResponse(**result)
@@ -48,15 +51,15 @@ async def create_session(
 @router.get("/{session_id}", response_model=SessionStatusResponse, status_code=status.HTTP_200_OK)
 async def get_session_status(
     session_id: UUID,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get session status"""
-    session_service = SessionService(db)
+    session_service = AsyncSessionService(db)
     
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     
-    result = session_service.get_session_status(session_id, tenant_id)
+    result = await session_service.get_session_status(session_id, tenant_id)
     
     return SessionStatusResponse(**result)
 
@@ -64,15 +67,38 @@ async def get_session_status(
 @router.get("/{session_id}/results", response_model=SessionResultsResponse, status_code=status.HTTP_200_OK)
 async def get_session_results(
     session_id: UUID,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    compact: bool = Query(False, description="Per-question scores only, without question text, options or answers"),
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get session results"""
-    session_service = SessionService(db)
+    """Get session results with per-question details"""
+    session_service = AsyncSessionService(db)
     
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     
-    result = session_service.get_session_results(session_id, tenant_id)
+    result = await session_service.get_session_results(session_id, tenant_id, compact=compact)
     
     return SessionResultsResponse(**result)
 
+
+@router.post("/{session_id}/answers:batch", response_model=SubmitAnswersBatchResponse, status_code=status.HTTP_200_OK)
+async def submit_session_answers(
+    session_id: UUID,
+    request: SubmitAnswersBatchRequest,
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Submit all answers for a session in one transaction"""
+    answer_service = AsyncAnswerService(db)
+    
+    tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
+    student_id = UUID(current_user["user_id"])
+    
+    result = await answer_service.submit_answers(
+        session_id=session_id,
+        tenant_id=tenant_id,
+        student_id=student_id,
+        answers=[item.model_dump() for item in request.answers],
+    )
+    
+    return SubmitAnswersBatchResponse(**result)
@@ -26,7 +26,8 @@ from src.models.database import (
     SystemAdminAccount, TenantAdminAccount, UserAccount, 
     UserSubjectRole, QuizSession
 )
-from src.core.security import get_password_hash
+from src.core.security import get_password_hash_async
+from src.core.principal import invalidate_principal, bump_permissions_version
 from src.models.user import UserRole, AccountStatus, AssignmentStatus
 from src.schemas.auth import UpdateAccountRequest, ResetPasswordRequestAdmin, ResetPasswordResponseAdmin
 from src.services.auth import AuthService
@@ -188,7 +189,7 @@ async def create_tenant_admin(
     # Generate temporary password
     import secrets
     temp_password = secrets.token_urlsafe(12)
-    password_hash = get_password_hash(temp_password)
+    password_hash = await get_password_hash_async(temp_password)
     
     # Create user account
     user = UserAccount(
@@ -450,8 +451,10 @@ async def update_account(
         if request.name:
             admin.name = request.name
         
+        bump_permissions_version(db, admin.admin_id, "system_admin")
         db.commit()
         db.refresh(admin)
+        invalidate_principal(admin.admin_id)
         
         return {
             "account_id": str(account_id),
@@ -498,8 +501,10 @@ async def update_account(
         if tenant_admin:
             tenant_admin.name = request.name
     
+    bump_permissions_version(db, user.user_id)
     db.commit()
     db.refresh(user)
+    invalidate_principal(user.user_id)
     
     return {
         "account_id": str(account_id),
@@ -537,7 +542,7 @@ async def reset_account_password(
     
     # Generate temporary password
     temp_password = secrets.token_urlsafe(12)
-    password_hash = get_password_hash(temp_password)
+    password_hash = await get_password_hash_async(temp_password)
     
     # Update password
     if user_type == "system_admin":
@@ -570,14 +575,18 @@ async def update_account_status(
     account = db.query(UserAccount).filter(UserAccount.user_id == account_id).first()
     if account:
         account.account_status = AccountStatus(status)
+        bump_permissions_version(db, account_id)
         db.commit()
+        invalidate_principal(account_id)
         return {"account_id": str(account_id), "status": status, "updated_at": account.updated_at}
     
     # Try SystemAdminAccount
     account = db.query(SystemAdminAccount).filter(SystemAdminAccount.admin_id == account_id).first()
     if account:
         account.account_status = AccountStatus(status)
+        bump_permissions_version(db, account_id, "system_admin")
         db.commit()
+        invalidate_principal(account_id)
         return {"account_id": str(account_id), "status": status, "updated_at": account.updated_at}
     
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
@@ -10,10 +10,12 @@ from pydantic import BaseModel
 
 from src.core.database import get_db
 from src.core.dependencies import require_tenant_admin
-from src.core.security import get_password_hash
+from src.core.security import get_password_hash_async
+from src.core.principal import invalidate_principal, bump_permissions_version
 from src.services.student import StudentService
 from src.services.tutor import TutorService
 from src.services.tenant import TenantService
+from src.services.progress import ProgressService
 from src.models.database import (
     StudentTutorAssignment, UserAccount, UserSubjectRole, 
     TenantAdminAccount, TutorSubjectProfile
@@ -201,8 +203,10 @@ async def update_account(
         if tenant_admin:
             tenant_admin.name = request.name
     
+    bump_permissions_version(db, user.user_id)
     db.commit()
     db.refresh(user)
+    invalidate_principal(user.user_id)
     
     return {
         "account_id": str(account_id),
@@ -237,7 +241,7 @@ async def reset_account_password(
     
     # Generate temporary password
     temp_password = secrets.token_urlsafe(12)
-    password_hash = get_password_hash(temp_password)
+    password_hash = await get_password_hash_async(temp_password)
     
     # Update password
     user.password_hash = password_hash
@@ -274,8 +278,10 @@ async def update_account_status(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
     
     account.account_status = AccountStatus(status)
+    bump_permissions_version(db, account.user_id)
     db.commit()
     db.refresh(account)
+    invalidate_principal(account.user_id)
     
     return {"account_id": str(account_id), "status": status, "updated_at": account.updated_at.isoformat() if account.updated_at else None}
 
@@ -291,7 +297,7 @@ async def create_student(
     tenant_id = UUID(current_user["tenant_id"])
     created_by = UUID(current_user["user_id"])
     
-    result = student_service.create_student(
+    result = await student_service.create_student(
         tenant_id=tenant_id,
         username=request.username,
         email=request.email,
@@ -314,7 +320,7 @@ async def create_tutor(
     tenant_id = UUID(current_user["tenant_id"])
     created_by = UUID(current_user["user_id"])
     
-    result = tutor_service.create_tutor(
+    result = await tutor_service.create_tutor(
         tenant_id=tenant_id,
         username=request.username,
         email=request.email,
@@ -501,3 +507,14 @@ async def get_statistics(
     tenant_service = TenantService(db)
     stats = tenant_service.get_tenant_statistics(tenant_id)
     return stats
+
+
+@router.get("/analytics/students", status_code=status.HTTP_200_OK)
+async def get_students_analytics(
+    include_areas: bool = Query(False, description="Include per-area accuracy for each student"),
+    current_user: dict = Depends(require_tenant_admin),
+    db: Session = Depends(get_db),
+):
+    """Weak/strong areas and improvement rates for every student in the tenant (tenant admin only)"""
+    tenant_id = UUID(current_user["tenant_id"])
+    return ProgressService(db).get_cohort_analytics(tenant_id, include_areas=include_areas)
@@ -49,10 +49,13 @@ async def get_tutor(
 @router.get("/{tutor_id}/students", status_code=status.HTTP_200_OK)
 async def get_tutor_students(
     tutor_id: UUID,
+    subject_id: Optional[UUID] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
     current_user: dict = Depends(require_tutor_or_admin),
     db: Session = Depends(get_db),
 ):
-    """Get tutor's students"""
+    """Get tutor's students (one page of active assignments)"""
     # Verify access
     if current_user.get("role") == "tutor" and UUID(current_user["user_id"]) != tutor_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
@@ -60,10 +63,28 @@ async def get_tutor_students(
     tutor_service = TutorService(db)
     tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
     
-    result = tutor_service.get_tutor_students(tutor_id, tenant_id)
+    result = tutor_service.get_tutor_students(tutor_id, tenant_id, subject_id=subject_id, limit=limit, offset=offset)
     return result
 
 
+@router.get("/{tutor_id}/students/analytics", status_code=status.HTTP_200_OK)
+async def get_tutor_students_analytics(
+    tutor_id: UUID,
+    include_areas: bool = Query(False, description="Include per-area accuracy for each student"),
+    current_user: dict = Depends(require_tutor_or_admin),
+    db: Session = Depends(get_db),
+):
+    """Weak/strong areas and improvement rates for all of a tutor's students"""
+    # Verify access
+    if current_user.get("role") == "tutor" and UUID(current_user["user_id"]) != tutor_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+    
+    tutor_service = TutorService(db)
+    tenant_id = UUID(current_user["tenant_id"]) if current_user.get("tenant_id") else None
+    
+    return tutor_service.get_students_analytics(tutor_id, tenant_id, include_areas)
+
+
 @router.get("/{tutor_id}/students/{student_id}/progress", status_code=status.HTTP_200_OK)
 async def get_tutor_student_progress(
     tutor_id: UUID,
@@ -0,0 +1,389 @@
+"""
+AI provider client
+
+AIClient wraps a provider backend (OpenAI, Anthropic or the local stub) with:
+- a concurrency semaphore (AI_MAX_CONCURRENCY) per worker
+- a per-call timeout (AI_TIMEOUT_SECONDS)
+- retries with exponential backoff and full jitter for transient errors
+- request coalescing: identical concurrent requests share one provider call
+- per-task latency histograms and error counters (stats())
+- an optional persistent response cache (src/core/ai_cache.py)
+
+The stub backend is deterministic (output derived from a hash of the prompt) and
+needs no network access, so it can be used for development and load testing;
+AI_STUB_LATENCY_MS simulates provider latency.
+"""
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, NamedTuple, Callable
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+
+from src.core.ai_cache import AIResponseCacheStore, build_response_cache, cache_key
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AIProviderError(Exception):
+    """A provider call failed; retryable errors are retried by AIClient"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class AIResponse(NamedTuple):
+    text: str
+    model_version: str  # Stored in Question.ai_model_version
+
+
+class AIProvider(ABC):
+    """Provider backend interface"""
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @property
+    def model_version(self) -> str:
+        return f"{self.name}:{self.model}"
+
+    @abstractmethod
+    async def complete(self, task: str, prompt: str, system: Optional[str], max_tokens: int, temperature: float) -> str:
+        """Raw completion text; raises AIProviderError on failure"""
+
+
+class StubProvider(AIProvider):
+    """Deterministic offline backend; the same task and prompt always give the same output"""
+
+    name = "stub"
+
+    def __init__(self, model: str = "stub-1", latency_ms: int = 0):
+        super().__init__(model)
+        self.latency_ms = latency_ms
+
+    async def complete(self, task: str, prompt: str, system: Optional[str], max_tokens: int, temperature: float) -> str:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        digest = hashlib.sha256(f"{task}\n{system or ''}\n{prompt}".encode("utf-8")).hexdigest()
+        if task == "question":
+            options = [f"Option {letter} ({digest[i:i + 4]})" for i, letter in enumerate("ABCD")]
+            return json.dumps({
+                "question_text": f"Stub question {digest[:12]}",
+                "options": options,
+                "correct_answer": {"answer": options[int(digest[-1], 16) % 4]},
+                "explanation": f"Stub explanation {digest[12:20]}",
+            })
+        if task == "narrative":
+            return json.dumps({
+                "narrative": f"Stub narrative {digest[:12]}",
+                "explanation": {
+                    "concept": f"Stub concept {digest[12:16]}",
+                    "steps": [f"Step {i} ({digest[16 + i:20 + i]})" for i in range(1, 4)],
+                    "why_correct": f"Stub reasoning {digest[20:28]}",
+                    "common_mistakes": [f"Stub mistake {digest[28:32]}"],
+                    "related_concepts": [f"Stub related concept {digest[32:36]}"],
+                },
+            })
+        return f"Stub {task} {digest[:16]}"
+
+
+class OpenAIProvider(AIProvider):
+    """OpenAI chat completions backend (requires the optional openai package)"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str):
+        super().__init__(model)
+        try:
+            import openai
+        except ImportError as exc:
+            raise RuntimeError("AI_PROVIDER=openai requires the openai package (pip install openai)") from exc
+        self._openai = openai
+        self._client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+
+    async def complete(self, task: str, prompt: str, system: Optional[str], max_tokens: int, temperature: float) -> str:
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        try:
+            response = await self._client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        except (self._openai.RateLimitError, self._openai.APIConnectionError, self._openai.InternalServerError) as exc:
+            raise AIProviderError(str(exc), retryable=True) from exc
+        except self._openai.OpenAIError as exc:
+            raise AIProviderError(str(exc)) from exc
+        return response.choices[0].message.content or ""
+
+
+class AnthropicProvider(AIProvider):
+    """Anthropic messages backend (requires the optional anthropic package)"""
+
+    name = "anthropic"
+
+    def __init__(self, api_key: str, model: str):
+        super().__init__(model)
+        try:
+            import anthropic
+        except ImportError as exc:
+            raise RuntimeError("AI_PROVIDER=anthropic requires the anthropic package (pip install anthropic)") from exc
+        self._anthropic = anthropic
+        self._client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+
+    async def complete(self, task: str, prompt: str, system: Optional[str], max_tokens: int, temperature: float) -> str:
+        kwargs: Dict[str, Any] = {"system": system} if system else {}
+        try:
+            response = await self._client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs,
+            )
+        except (self._anthropic.RateLimitError, self._anthropic.APIConnectionError, self._anthropic.InternalServerError) as exc:
+            raise AIProviderError(str(exc), retryable=True) from exc
+        except self._anthropic.AnthropicError as exc:
+            raise AIProviderError(str(exc)) from exc
+        return "".join(block.text for block in response.content if getattr(block, "type", None) == "text")
+
+
+# Latency histogram bucket upper bounds in seconds (last bucket is +Inf)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """Cumulative-style latency histogram for one task"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0
+        self.sum_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += 1
+        self.sum_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        return {
+            "count": self.total,
+            "avg_seconds": round(self.sum_seconds / self.total, 4) if self.total else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class AIClient:
+    """Provider wrapper with concurrency limits, timeouts, retries, coalescing and metrics"""
+
+    def __init__(
+        self,
+        provider: AIProvider,
+        max_concurrency: int = 8,
+        timeout_seconds: float = 30.0,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 8.0,
+        cache: Optional[AIResponseCacheStore] = None,
+    ):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.cache = cache
+        # Created lazily so they bind to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    @property
+    def model_version(self) -> str:
+        return self.provider.model_version
+
+    async def complete(
+        self,
+        task: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> AIResponse:
+        """
+        Run one completion. task labels the call for metrics and the stub backend
+        ("question", "hint", "narrative", ...). Identical concurrent requests are coalesced.
+        Responses are served from and stored in the response cache unless use_cache is False.
+        validate (raising AIProviderError) checks a response before it is cached, so a
+        malformed response is never stored; cached responses it rejects are evicted and
+        fetched again.
+        """
+        max_tokens = max_tokens or settings.AI_MAX_TOKENS
+        key = cache_key(task, self.model_version, system, prompt, max_tokens, temperature)
+        cached = use_cache and self.cache is not None
+        if not cached:
+            if self.cache is not None:
+                self.cache.record_bypass()
+            key = f"nocache:{key}"
+
+        task_future = self._in_flight.get(key)
+        if task_future is not None:
+            self.coalesced += 1
+        else:
+            # The provider call runs as its own task so a cancelled caller does not
+            # cancel it for the other callers sharing it
+            call = self._cached_call(key, task, prompt, system, max_tokens, temperature, validate) if cached else \
+                self._call_with_retries(task, prompt, system, max_tokens, temperature)
+            task_future = asyncio.ensure_future(call)
+            self._in_flight[key] = task_future
+            task_future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        text = await asyncio.shield(task_future)
+        return AIResponse(text=text, model_version=self.model_version)
+
+    async def _cached_call(
+        self,
+        key: str,
+        task: str,
+        prompt: str,
+        system: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> str:
+        text = await self.cache.get(key)
+        if text is not None and validate is not None:
+            try:
+                validate(text)
+            except AIProviderError:
+                logger.warning("Evicting invalid cached AI %s response", task)
+                await self.cache.evict(key)
+                text = None
+        if text is None:
+            text = await self._call_with_retries(task, prompt, system, max_tokens, temperature)
+            if validate is not None:
+                validate(text)
+            await self.cache.set(key, task, self.model_version, text)
+        return text
+
+    async def _call_with_retries(self, task: str, prompt: str, system: Optional[str], max_tokens: int, temperature: float) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    self.calls += 1
+                    text = await asyncio.wait_for(
+                        self.provider.complete(task, prompt, system, max_tokens, temperature),
+                        timeout=self.timeout_seconds,
+                    )
+                self._observe(task, time.perf_counter() - started)
+                return text
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                error = AIProviderError(f"{self.provider.name} call timed out after {self.timeout_seconds}s", retryable=True)
+            except AIProviderError as exc:
+                error = exc
+
+            if not error.retryable or attempt >= self.max_retries:
+                self.failures += 1
+                raise error
+
+            # Exponential backoff with full jitter
+            delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+            attempt += 1
+            self.retries += 1
+            logger.warning("AI %s call failed (%s); retry %d in %.2fs", task, error, attempt, delay)
+            await asyncio.sleep(delay)
+
+    def _observe(self, task: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(task)
+            if histogram is None:
+                histogram = self._histograms[task] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Call counters and latency histograms for this worker"""
+        with self._lock:
+            latency = {task: histogram.snapshot() for task, histogram in self._histograms.items()}
+        return {
+            "provider": self.provider.name,
+            "model_version": self.model_version,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "latency": latency,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+def parse_json_response(text: str) -> Any:
+    """Parse a JSON completion, tolerating surrounding markdown code fences"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    try:
+        return json.loads(text)
+    except ValueError as exc:
+        raise AIProviderError(f"Provider returned invalid JSON: {exc}") from exc
+
+
+def _build_provider() -> AIProvider:
+    provider = settings.AI_PROVIDER
+    if provider == "openai":
+        if not settings.OPENAI_API_KEY:
+            raise RuntimeError("AI_PROVIDER=openai requires OPENAI_API_KEY")
+        return OpenAIProvider(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
+    if provider == "anthropic":
+        if not settings.ANTHROPIC_API_KEY:
+            raise RuntimeError("AI_PROVIDER=anthropic requires ANTHROPIC_API_KEY")
+        return AnthropicProvider(settings.ANTHROPIC_API_KEY, settings.ANTHROPIC_MODEL)
+    return StubProvider(latency_ms=settings.AI_STUB_LATENCY_MS)
+
+
+_client: Optional[AIClient] = None
+_client_lock = threading.Lock()
+
+
+def get_ai_client() -> AIClient:
+    """Return the per-worker AI client configured from settings"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AIClient(
+                    _build_provider(),
+                    max_concurrency=settings.AI_MAX_CONCURRENCY,
+                    timeout_seconds=settings.AI_TIMEOUT_SECONDS,
+                    max_retries=settings.AI_MAX_RETRIES,
+                    retry_base_delay=settings.AI_RETRY_BASE_DELAY_SECONDS,
+                    retry_max_delay=settings.AI_RETRY_MAX_DELAY_SECONDS,
+                    cache=build_response_cache(),
+                )
+    return _client
@@ -0,0 +1,251 @@
+"""
+AI response cache
+
+Content-addressed cache for AI provider responses. Keys are a SHA-256 of the task,
+model version, sampling parameters and whitespace-normalized prompt, so a model
+upgrade never serves responses from the previous model.
+
+Two tiers:
+- a per-worker in-memory TTLCache (AI_CACHE_MEMORY_SIZE entries)
+- with AI_CACHE_BACKEND=postgres, the shared tutor.ai_response_cache table
+
+Entries expire after AI_CACHE_TTL_SECONDS. The table is pruned every
+AI_CACHE_PRUNE_EVERY writes: expired rows are deleted and then the least
+recently used rows beyond AI_CACHE_MAX_ROWS.
+Cache errors are logged and treated as misses; they never fail a generation.
+
+The table is accessed through short sessions of its own (one statement each), not
+the caller's session: concurrent generations share none, and callers no longer hold
+a connection while the provider runs. On top of the caller's connection, each
+worker therefore checks out up to AI_CACHE_DB_CONCURRENCY extra pooled connections;
+size DB_POOL_SIZE / DB_MAX_OVERFLOW for it.
+"""
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Optional, Dict, Any, Set
+from datetime import timedelta
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+
+from src.core.cache import TTLCache, MISSING
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.models.database import AIResponseCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Collapse whitespace runs so formatting-only differences share a cache entry"""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def cache_key(task: str, model_version: str, system: Optional[str], prompt: str, max_tokens: int, temperature: float) -> str:
+    """SHA-256 hex digest identifying one provider request"""
+    return hashlib.sha256(json.dumps([
+        task,
+        model_version,
+        normalize_prompt(system),
+        normalize_prompt(prompt),
+        max_tokens,
+        temperature,
+    ]).encode("utf-8")).hexdigest()
+
+
+class AIResponseCacheStore:
+    """Two-tier response cache with hit-rate counters"""
+
+    def __init__(
+        self,
+        backend: str,
+        ttl_seconds: int,
+        max_rows: int,
+        memory_size: int,
+        prune_every: int,
+        db_concurrency: int = 4,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self.db_concurrency = db_concurrency
+        # Created lazily so it binds to the running event loop
+        self._connections: Optional[asyncio.Semaphore] = None
+        self.memory = TTLCache(ttl_seconds=ttl_seconds, max_size=memory_size)
+        self._lock = threading.Lock()
+        self._prune_tasks: Set[asyncio.Task] = set()
+        self.lookups = 0
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.stores = 0
+        self.bypassed = 0
+        self.errors = 0
+        self.pruned = 0
+
+    @property
+    def persistent(self) -> bool:
+        return self.backend == "postgres"
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def record_bypass(self) -> None:
+        self._count("bypassed")
+
+    def _connection_slot(self) -> asyncio.Semaphore:
+        """Bounds the pooled connections this worker uses for the cache table"""
+        if self._connections is None:
+            self._connections = asyncio.Semaphore(max(self.db_concurrency, 1))
+        return self._connections
+
+    async def get(self, key: str) -> Optional[str]:
+        """Cached response text, or None on a miss"""
+        self._count("lookups")
+        text = self.memory.get(key)
+        if text is not MISSING:
+            self._count("memory_hits")
+            return text
+        if not self.persistent:
+            return None
+
+        # Read and touch (LRU) in one statement; expired rows are misses
+        stmt = (
+            update(AIResponseCache)
+            .where(
+                AIResponseCache.cache_key == key,
+                AIResponseCache.created_at > func.now() - timedelta(seconds=self.ttl_seconds),
+            )
+            .values(last_used_at=func.now(), hit_count=AIResponseCache.hit_count + 1)
+            .returning(AIResponseCache.response)
+        )
+        try:
+            async with self._connection_slot(), AsyncSessionLocal() as db:
+                text = (await db.execute(stmt)).scalar()
+                await db.commit()
+        except Exception:
+            self._count("errors")
+            logger.warning("AI response cache lookup failed", exc_info=True)
+            return None
+        if text is None:
+            return None
+        self._count("store_hits")
+        self.memory.set(key, text)
+        return text
+
+    async def set(self, key: str, task: str, model_version: str, text: str) -> None:
+        """Store a response (replacing an expired entry with the same key)"""
+        self.memory.set(key, text)
+        self._count("stores")
+        if not self.persistent:
+            return
+
+        stmt = pg_insert(AIResponseCache).values(
+            cache_key=key,
+            task=task,
+            model_version=model_version,
+            response=text,
+            hit_count=0,
+            created_at=func.now(),
+            last_used_at=func.now(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AIResponseCache.cache_key],
+            set_={
+                "response": stmt.excluded.response,
+                "hit_count": 0,
+                "created_at": func.now(),
+                "last_used_at": func.now(),
+            },
+        )
+        try:
+            async with self._connection_slot(), AsyncSessionLocal() as db:
+                await db.execute(stmt)
+                await db.commit()
+        except Exception:
+            self._count("errors")
+            logger.warning("AI response cache store failed", exc_info=True)
+            return
+
+        if self.prune_every and self.stores % self.prune_every == 0:
+            prune_task = asyncio.create_task(self.prune())
+            self._prune_tasks.add(prune_task)
+            prune_task.add_done_callback(self._prune_tasks.discard)
+
+    async def evict(self, key: str) -> None:
+        """Drop an entry from both tiers (e.g. a response that no longer parses)"""
+        self.memory.invalidate(key)
+        if not self.persistent:
+            return
+        try:
+            async with self._connection_slot(), AsyncSessionLocal() as db:
+                await db.execute(delete(AIResponseCache).where(AIResponseCache.cache_key == key))
+                await db.commit()
+        except Exception:
+            self._count("errors")
+            logger.warning("AI response cache eviction failed", exc_info=True)
+
+    async def prune(self) -> int:
+        """Delete expired rows, then least recently used rows beyond max_rows; returns rows deleted"""
+        if not self.persistent:
+            return 0
+        expired = delete(AIResponseCache).where(
+            AIResponseCache.created_at <= func.now() - timedelta(seconds=self.ttl_seconds)
+        )
+        overflow = delete(AIResponseCache).where(
+            AIResponseCache.cache_key.in_(
+                select(AIResponseCache.cache_key)
+                .order_by(AIResponseCache.last_used_at.desc())
+                .offset(self.max_rows)
+            )
+        )
+        try:
+            async with self._connection_slot(), AsyncSessionLocal() as db:
+                deleted = (await db.execute(expired)).rowcount
+                deleted += (await db.execute(overflow)).rowcount
+                await db.commit()
+        except Exception:
+            self._count("errors")
+            logger.warning("AI response cache prune failed", exc_info=True)
+            return 0
+        self._count("pruned", deleted)
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate counters for this worker"""
+        with self._lock:
+            hits = self.memory_hits + self.store_hits
+            return {
+                "backend": self.backend,
+                "ttl_seconds": self.ttl_seconds,
+                "lookups": self.lookups,
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.lookups - hits,
+                "hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0,
+                "stores": self.stores,
+                "bypassed": self.bypassed,
+                "errors": self.errors,
+                "pruned": self.pruned,
+                "memory_size": len(self.memory),
+            }
+
+
+def build_response_cache() -> Optional[AIResponseCacheStore]:
+    """Response cache configured from settings (None when AI_CACHE_ENABLED is off)"""
+    if not settings.AI_CACHE_ENABLED:
+        return None
+    return AIResponseCacheStore(
+        backend=settings.AI_CACHE_BACKEND,
+        ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+        max_rows=settings.AI_CACHE_MAX_ROWS,
+        memory_size=settings.AI_CACHE_MEMORY_SIZE,
+        prune_every=settings.AI_CACHE_PRUNE_EVERY,
+        db_concurrency=settings.AI_CACHE_DB_CONCURRENCY,
+    )
@@ -40,18 +40,108 @@ class Settings(BaseSettings):
     DB_NAME: Optional[str] = None
     DB_USER: Optional[str] = None
     DB_PASSWORD: Optional[str] = None
-    
+
+    # Async (asyncpg) database URL; derived from DATABASE_URL when not set
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Database connection pool
+    # "queue" keeps a per-worker pool of open connections; "null" opens a new
+    # connection per session (use behind an external pooler such as PgBouncer)
+    DB_POOL_MODE: str = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    # Optional total connection budget shared by all uvicorn workers.
+    # When set together with WEB_CONCURRENCY, each worker's pool_size + max_overflow
+    # is capped at DB_MAX_CONNECTIONS // WEB_CONCURRENCY.
+    DB_MAX_CONNECTIONS: Optional[int] = None
+    WEB_CONCURRENCY: Optional[int] = None  # uvicorn worker count
+
     # Security
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Stateless auth: trust role/tenant/grade claims in access tokens and only
+    # re-check the user's permissions version against the database every N minutes
+    AUTH_STATELESS_MODE: bool = False
+    AUTH_STATELESS_RECHECK_MINUTES: int = 5
+    
+    # Authenticated principal cache (per worker); 0 disables caching
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    
+    # Tenant domain resolution cache (per worker); misses are cached for a shorter time
+    TENANT_DOMAIN_CACHE_TTL_SECONDS: int = 300
+    TENANT_DOMAIN_NEGATIVE_CACHE_TTL_SECONDS: int = 30
+    TENANT_DOMAIN_CACHE_MAX_SIZE: int = 1000
+    
+    # Question inventory: pre-generated stock per (subject, grade, difficulty, type)
+    QUESTION_INVENTORY_ENABLED: bool = False
+    QUESTION_INVENTORY_TARGET: int = 50  # Stock the refiller tops each bucket up to
+    QUESTION_INVENTORY_LOW_WATERMARK: int = 10  # Wake the refiller at or below this level
+    QUESTION_INVENTORY_REFILL_BATCH: int = 25  # Questions generated per refill transaction
+    QUESTION_INVENTORY_REFILL_INTERVAL_SECONDS: int = 30
+    
+    # Maximum ids accepted by GET /questions?ids=...
+    QUESTION_BULK_FETCH_MAX_IDS: int = 100
+    
+    # Compiled answer validators cached per question (per worker)
+    ANSWER_VALIDATOR_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_VALIDATOR_CACHE_MAX_SIZE: int = 50000
+    
+    # Days covered by performance_by_time and compared by improvement_trends (daily rollups)
+    PROGRESS_TREND_DAYS: int = 30
+    
+    # Progress analytics (weak/strong areas, improvement rate) over the daily rollups
+    ANALYTICS_WINDOW_DAYS: int = 180
+    ANALYTICS_HALF_LIFE_DAYS: float = 14.0  # Decay of older days in the improvement slope
+    ANALYTICS_MIN_ANSWERS: int = 5  # Answers an area needs before it is rated weak or strong
+    ANALYTICS_WEAK_THRESHOLD: float = 0.6  # Weak if the accuracy upper bound is below this
+    ANALYTICS_STRONG_THRESHOLD: float = 0.8  # Strong if the accuracy lower bound is above this
+    ANALYTICS_CONFIDENCE_Z: float = 1.96  # Wilson interval z-score (95%)
+    ANALYTICS_MAX_AREAS: int = 5  # Weak/strong areas listed per student
+    
+    # Timed session expiry: an in-process timing wheel expires this worker's sessions at
+    # their deadline; a periodic bulk sweep catches the rest (other workers, restarts)
+    SESSION_EXPIRY_ENABLED: bool = True
+    SESSION_EXPIRY_TICK_SECONDS: float = 1.0  # Timing wheel resolution
+    SESSION_EXPIRY_SWEEP_INTERVAL_SECONDS: int = 60
+    SESSION_EXPIRY_GRACE_SECONDS: int = 5  # Answers are still accepted this long after the deadline
+    
+    # Competition leaderboards: ranked in memory per worker, synced with sessions
+    # completed by other workers at most every LEADERBOARD_SYNC_SECONDS
+    LEADERBOARD_PRELOAD_ENABLED: bool = True  # Load active competitions at startup
+    LEADERBOARD_SYNC_SECONDS: float = 2.0
+    LEADERBOARD_SYNC_OVERLAP_SECONDS: int = 120  # Must exceed the expiry sweep interval plus grace
+    LEADERBOARD_MAX_COMPETITIONS: int = 200  # Boards kept per worker (least recently used dropped)
+    # Live leaderboard streams (SSE): one update per competition per tick, shared by all subscribers
+    LEADERBOARD_STREAM_TICK_SECONDS: float = 1.0
+    LEADERBOARD_STREAM_TOP_N: int = 20
+    LEADERBOARD_STREAM_KEEPALIVE_SECONDS: int = 15
+    
+    # Competition finalization: final ranks are computed once end_date is this far behind
+    COMPETITION_FINALIZER_ENABLED: bool = True
+    COMPETITION_FINALIZE_INTERVAL_SECONDS: int = 60
+    COMPETITION_FINALIZE_DELAY_SECONDS: int = 30  # Lets answers submitted at the deadline commit
+    # A competition question set build claimed longer ago than this is taken over by the next starter
+    COMPETITION_QUESTION_SET_BUILD_TIMEOUT_SECONDS: int = 300
+    # Final leaderboards and results never change, so they are cached per worker
+    COMPETITION_RESULTS_CACHE_TTL_SECONDS: int = 3600
+    COMPETITION_RESULTS_CACHE_MAX_SIZE: int = 1000
+    
     # Password
     PASSWORD_MIN_LENGTH: int = 8
     OTP_EXPIRATION_SECONDS: int = 900  # 15 minutes
     MAX_LOGIN_ATTEMPTS: int = 5
     LOCKOUT_DURATION_MINUTES: int = 30
+    # bcrypt runs on a dedicated executor so it does not block the event loop.
+    # "thread" is the default (bcrypt releases the GIL); "process" isolates it fully.
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: Optional[int] = None  # Defaults to min(4, CPU count)
     
     # CORS
     CORS_ORIGINS: Optional[List[str]] = None
@@ -61,6 +151,27 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4"
     ANTHROPIC_API_KEY: Optional[str] = None
     ANTHROPIC_MODEL: str = "claude-3-opus-20240229"
+    # "stub" is a deterministic offline backend for development and load tests
+    AI_PROVIDER: str = "stub"  # stub, openai, anthropic
+    AI_MAX_CONCURRENCY: int = 8  # In-flight provider calls per worker
+    AI_TIMEOUT_SECONDS: float = 30.0
+    AI_MAX_RETRIES: int = 3
+    AI_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    AI_RETRY_MAX_DELAY_SECONDS: float = 8.0
+    AI_MAX_TOKENS: int = 1024
+    AI_STUB_LATENCY_MS: int = 0  # Simulated provider latency for the stub backend
+    # AI response cache keyed by normalized prompt hash and model version.
+    # "postgres" shares entries across workers (tutor.ai_response_cache); "memory" is per worker.
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_BACKEND: str = "postgres"  # postgres, memory
+    AI_CACHE_TTL_SECONDS: int = 604800  # 7 days
+    AI_CACHE_MAX_ROWS: int = 100000  # Least recently used rows beyond this are pruned
+    AI_CACHE_MEMORY_SIZE: int = 1000  # Per-worker in-memory entries in front of the table
+    AI_CACHE_PRUNE_EVERY: int = 500  # Prune the table every N cache writes per worker
+    AI_CACHE_DB_CONCURRENCY: int = 4  # Extra pooled connections per worker for cache table reads/writes
+    # Cacheable question prompts are spread over this many variants per
+    # subject/grade/difficulty/topic/type so sessions do not all get the same questions
+    AI_CACHE_QUESTION_VARIANTS: int = 50
     
     # Email
     EMAIL_PROVIDER: Optional[str] = None  # sendgrid, ses, mailgun, smtp
@@ -92,7 +203,39 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
         extra = "ignore"  # Ignore extra fields instead of rejecting them
-    
+
+    @field_validator("DB_POOL_MODE")
+    @classmethod
+    def validate_db_pool_mode(cls, value: str) -> str:
+        value = value.lower()
+        if value not in ("queue", "null"):
+            raise ValueError("DB_POOL_MODE must be 'queue' or 'null'")
+        return value
+
+    @field_validator("AI_PROVIDER")
+    @classmethod
+    def validate_ai_provider(cls, value: str) -> str:
+        value = value.lower()
+        if value not in ("stub", "openai", "anthropic"):
+            raise ValueError("AI_PROVIDER must be 'stub', 'openai' or 'anthropic'")
+        return value
+
+    @field_validator("AI_CACHE_BACKEND")
+    @classmethod
+    def validate_ai_cache_backend(cls, value: str) -> str:
+        value = value.lower()
+        if value not in ("postgres", "memory"):
+            raise ValueError("AI_CACHE_BACKEND must be 'postgres' or 'memory'")
+        return value
+
+    @field_validator("PASSWORD_HASH_EXECUTOR")
+    @classmethod
+    def validate_password_hash_executor(cls, value: str) -> str:
+        value = value.lower()
+        if value not in ("thread", "process"):
+            raise ValueError("PASSWORD_HASH_EXECUTOR must be 'thread' or 'process'")
+        return value
+
     # #region agent log
     @model_validator(mode='after')
     def construct_database_url(self):
@@ -2,11 +2,17 @@
 Database configuration and session management
 """
 from sqlalchemy import create_engine, event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import NullPool
-from typing import Generator
+from sqlalchemy.pool import NullPool, QueuePool, AsyncAdaptedQueuePool
+from typing import Generator, AsyncGenerator, Dict, Any, Tuple
 import json
+import os
+import threading
+import time
 
 from src.core.config import settings
 
@@ -20,6 +26,100 @@ def _log(hypothesis_id, location, message, data):
 _log("D", "database.py:import", "Database module importing", {"database_url_exists": bool(settings.DATABASE_URL), "database_url_preview": settings.DATABASE_URL[:50] + "..." if settings.DATABASE_URL and len(settings.DATABASE_URL) > 50 else settings.DATABASE_URL})
 # #endregion
 
+class PoolWaitStats:
+    """Running totals for time spent waiting on a pooled connection (per worker process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total_ms": round(self.total_wait * 1000, 3),
+                "wait_time_avg_ms": round(self.total_wait * 1000 / attempts, 3) if attempts else 0.0,
+                "wait_time_max_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+pool_wait_stats = PoolWaitStats()
+async_pool_wait_stats = PoolWaitStats()
+
+
+class _WaitTimingMixin:
+    """Records how long each pool checkout waited for a connection"""
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    """QueuePool for the sync engine with checkout wait-time tracking"""
+    wait_stats = pool_wait_stats
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool for the asyncpg engine with checkout wait-time tracking"""
+    wait_stats = async_pool_wait_stats
+
+
+def _resolve_pool_size() -> Tuple[int, int]:
+    """
+    Resolve (pool_size, max_overflow) for this worker process.
+    If a total connection budget and worker count are configured, the per-worker
+    pool is shrunk so that all workers together stay within DB_MAX_CONNECTIONS.
+    """
+    pool_size = settings.DB_POOL_SIZE
+    max_overflow = settings.DB_MAX_OVERFLOW
+    if settings.DB_MAX_CONNECTIONS and settings.WEB_CONCURRENCY:
+        per_worker = max(1, settings.DB_MAX_CONNECTIONS // settings.WEB_CONCURRENCY)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = min(max_overflow, per_worker - pool_size)
+    return pool_size, max_overflow
+
+
+def _engine_options(poolclass: type = InstrumentedQueuePool) -> Dict[str, Any]:
+    """Build create_engine() keyword arguments from settings"""
+    options: Dict[str, Any] = {"echo": settings.DEBUG}
+    if settings.DB_POOL_MODE == "null":
+        options["poolclass"] = NullPool
+        return options
+
+    pool_size, max_overflow = _resolve_pool_size()
+    options.update(
+        poolclass=poolclass,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+
 # Create engine
 try:
     # #region agent log
@@ -27,8 +127,7 @@ try:
     # #endregion
     engine = create_engine(
         settings.DATABASE_URL,
-        poolclass=NullPool,
-        echo=settings.DEBUG,
+        **_engine_options(),
     )
     # #region agent log
     _log("D", "database.py:create_engine", "Engine created successfully", {})
@@ -46,6 +145,33 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+
+
+def _async_database_url() -> str:
+    """
+    URL for the asyncpg engine: ASYNC_DATABASE_URL if set, otherwise DATABASE_URL
+    with its driver switched to asyncpg.
+    """
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+# Async engine (asyncpg) used by the hot endpoints so queries do not block the event loop.
+# It shares the pool settings of the sync engine; both pools count against DB_MAX_CONNECTIONS.
+async_engine = create_async_engine(
+    _async_database_url(),
+    **_engine_options(poolclass=InstrumentedAsyncQueuePool),
+)
+
+# Async session factory. expire_on_commit=False because attributes cannot be
+# lazily refreshed outside of an awaited call.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -61,6 +187,43 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency (asyncpg)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _pool_snapshot(pool, wait_stats: PoolWaitStats) -> Dict[str, Any]:
+    """Statistics for a single engine pool"""
+    if not isinstance(pool, QueuePool):
+        return {"mode": "null"}
+
+    pool_size, max_overflow = _resolve_pool_size()
+    return {
+        "mode": "queue",
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        **wait_stats.snapshot(),
+    }
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Live connection pool statistics for this worker process.
+    Use together with WEB_CONCURRENCY to size DB_POOL_SIZE / DB_MAX_OVERFLOW.
+    """
+    return {
+        "pid": os.getpid(),
+        **_pool_snapshot(engine.pool, pool_wait_stats),
+        "async": _pool_snapshot(async_engine.pool, async_pool_wait_stats),
+    }
+
+
 async def init_db():
     """
     Initialize database (create tables if needed)
@@ -5,18 +5,29 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status, Header, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import get_db
+from src.core.database import get_db, get_async_db
 from src.core.security import decode_token
 from src.core.exceptions import UnauthorizedError, ForbiddenError
+from src.core.principal import (
+    resolve_principal, resolve_principal_async, principal_from_claims,
+    permissions_version_confirmed, load_permissions_version, load_permissions_version_async
+)
 from src.models.user import UserRole, AccountStatus
-from src.models.database import UserAccount, SystemAdminAccount, TenantAdminAccount, UserSubjectRole
 from src.services.tenant import TenantService
 
 security = HTTPBearer()
 
 
+def _check_permissions_version(current_version: Optional[int], token_version: int) -> None:
+    """Reject stateless tokens for deleted accounts or issued before a permissions change"""
+    if current_version is None:
+        raise UnauthorizedError("User not found")
+    if current_version != token_version:
+        raise UnauthorizedError("Token is no longer valid, please log in again")
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
@@ -31,73 +42,51 @@ async def get_current_user(
     if user_id is None:
         raise UnauthorizedError("Invalid authentication credentials")
     
-    # Determine user type from payload or query database
-    user_type = payload.get("user_type", "tenant_user")  # Default to tenant_user
+    # Determine user type from payload (default to tenant_user)
+    user_type = payload.get("user_type", "tenant_user")
+    
+    # Stateless tokens: trust the signed claims, re-checking only the permissions version
+    principal = principal_from_claims(payload)
+    if principal is not None:
+        if not permissions_version_confirmed(user_id, payload["pv"]):
+            _check_permissions_version(load_permissions_version(db, user_id, user_type), payload["pv"])
+        return principal
+    
+    # Account, role and grade level are resolved in one query and cached per user
+    principal = resolve_principal(db, user_id, user_type)
+    if not principal:
+        raise UnauthorizedError("User not found")
+    
+    return principal
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    """
+    Get current authenticated user from JWT token (AsyncSession variant for async endpoints)
+    """
+    token = credentials.credentials
+    payload = decode_token(token)
+    
+    user_id: Optional[str] = payload.get("sub")
+    if user_id is None:
+        raise UnauthorizedError("Invalid authentication credentials")
+    
+    user_type = payload.get("user_type", "tenant_user")
+    
+    principal = principal_from_claims(payload)
+    if principal is not None:
+        if not permissions_version_confirmed(user_id, payload["pv"]):
+            _check_permissions_version(await load_permissions_version_async(db, user_id, user_type), payload["pv"])
+        return principal
+    
+    principal = await resolve_principal_async(db, user_id, user_type)
+    if not principal:
+        raise UnauthorizedError("User not found")
     
-    # Get user from database based on type
-    if user_type == "system_admin":
-        user = db.query(SystemAdminAccount).filter(
-            SystemAdminAccount.admin_id == UUID(user_id)
-        ).first()
-        
-        if not user:
-            raise UnauthorizedError("User not found")
-        
-        return {
-            "user_id": str(user.admin_id),
-            "username": user.username,
-            "email": user.email,
-            "role": user.role.value,
-            "tenant_id": None,  # System admins don't have tenant_id
-            "grade_level": None,
-            "user_type": "system_admin",
-        }
-    else:
-        # Tenant user
-        user = db.query(UserAccount).filter(
-            UserAccount.user_id == UUID(user_id)
-        ).first()
-        
-        if not user:
-            raise UnauthorizedError("User not found")
-        
-        # Determine role
-        tenant_admin = db.query(TenantAdminAccount).filter(
-            TenantAdminAccount.user_id == user.user_id
-        ).first()
-        
-        if tenant_admin:
-            role = UserRole.TENANT_ADMIN.value
-        else:
-            # Get role from subject roles
-            subject_role = db.query(UserSubjectRole).filter(
-                UserSubjectRole.user_id == user.user_id
-            ).first()
-            
-            if subject_role:
-                role = subject_role.role.value
-            else:
-                role = UserRole.STUDENT.value  # Default
-        
-        # Get grade level from student profile
-        grade_level = None
-        if role == UserRole.STUDENT.value:
-            from src.models.database import StudentSubjectProfile
-            profile = db.query(StudentSubjectProfile).filter(
-                StudentSubjectProfile.user_id == user.user_id
-            ).first()
-            if profile:
-                grade_level = profile.grade_level
-        
-    return {
-            "user_id": str(user.user_id),
-            "username": user.username,
-            "email": user.email,
-            "role": role,
-            "tenant_id": str(user.tenant_id),
-            "grade_level": grade_level,
-            "user_type": "tenant_user",
-    }
+    return principal
 
 
 async def get_current_tenant(
@@ -38,3 +38,9 @@ class ValidationError(QuizAPIException):
     def __init__(self, detail: str = "Validation error"):
         super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
 
+
+
+class ServiceUnavailableError(QuizAPIException):
+    """Upstream dependency (e.g. AI provider) unavailable"""
+    def __init__(self, detail: str = "Service temporarily unavailable"):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
@@ -0,0 +1,216 @@
+"""
+Principal resolution for authenticated requests.
+
+Loads everything get_current_user needs (account, tenant admin flag, subject role and
+student grade level) in a single query and keeps the result in a TTL-bounded
+in-process cache keyed by user id. Services that change roles, account status or
+student profiles call invalidate_principal(); other workers pick the change up
+when their entry expires (PRINCIPAL_CACHE_TTL_SECONDS).
+
+In AUTH_STATELESS_MODE the principal comes from the verified token claims instead;
+the only database read is the account's permissions_version, checked at most once
+per AUTH_STATELESS_RECHECK_MINUTES per user and worker (or sooner after a local
+invalidate_principal()). bump_permissions_version() makes outstanding tokens stale.
+"""
+from typing import Optional, Dict, Any
+from uuid import UUID
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import TTLCache, MISSING
+from src.core.config import settings
+from src.models.database import (
+    UserAccount, SystemAdminAccount, TenantAdminAccount,
+    UserSubjectRole, StudentSubjectProfile
+)
+from src.models.user import UserRole
+
+
+principal_cache = TTLCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+# user_id -> permissions_version last confirmed against the database (stateless mode)
+permissions_version_cache = TTLCache(
+    ttl_seconds=settings.AUTH_STATELESS_RECHECK_MINUTES * 60,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+
+def _tenant_user_query(user_id: UUID):
+    """One round trip: user row, tenant admin join, first subject role and first grade level"""
+    subject_role = (
+        select(UserSubjectRole.role)
+        .where(UserSubjectRole.user_id == UserAccount.user_id)
+        .limit(1)
+        .correlate(UserAccount)
+        .scalar_subquery()
+    )
+    grade_level = (
+        select(StudentSubjectProfile.grade_level)
+        .where(StudentSubjectProfile.user_id == UserAccount.user_id)
+        .limit(1)
+        .correlate(UserAccount)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            UserAccount.user_id,
+            UserAccount.username,
+            UserAccount.email,
+            UserAccount.tenant_id,
+            TenantAdminAccount.tenant_admin_id,
+            subject_role.label("subject_role"),
+            grade_level.label("grade_level"),
+        )
+        .outerjoin(TenantAdminAccount, TenantAdminAccount.user_id == UserAccount.user_id)
+        .where(UserAccount.user_id == user_id)
+    )
+
+
+def _system_admin_query(user_id: UUID):
+    return select(
+        SystemAdminAccount.admin_id,
+        SystemAdminAccount.username,
+        SystemAdminAccount.email,
+        SystemAdminAccount.role,
+    ).where(SystemAdminAccount.admin_id == user_id)
+
+
+def _query_for(user_id: str, user_type: str):
+    if user_type == "system_admin":
+        return _system_admin_query(UUID(user_id))
+    return _tenant_user_query(UUID(user_id))
+
+
+def _build_principal(row, user_type: str) -> Dict[str, Any]:
+    """Convert a principal query row into the current_user dict used by endpoints"""
+    if user_type == "system_admin":
+        return {
+            "user_id": str(row.admin_id),
+            "username": row.username,
+            "email": row.email,
+            "role": row.role.value,
+            "tenant_id": None,  # System admins don't have tenant_id
+            "grade_level": None,
+            "user_type": "system_admin",
+        }
+
+    if row.tenant_admin_id:
+        role = UserRole.TENANT_ADMIN.value
+    elif row.subject_role:
+        role = row.subject_role.value
+    else:
+        role = UserRole.STUDENT.value  # Default
+
+    return {
+        "user_id": str(row.user_id),
+        "username": row.username,
+        "email": row.email,
+        "role": role,
+        "tenant_id": str(row.tenant_id),
+        "grade_level": row.grade_level if role == UserRole.STUDENT.value else None,
+        "user_type": "tenant_user",
+    }
+
+
+def _cached(user_id: str, user_type: str) -> Optional[Dict[str, Any]]:
+    principal = principal_cache.get(user_id)
+    if principal is MISSING or principal["user_type"] != user_type:
+        return None
+    return dict(principal)
+
+
+def resolve_principal(db: Session, user_id: str, user_type: str = "tenant_user") -> Optional[Dict[str, Any]]:
+    """Resolve the current_user dict for a token subject, or None if the account does not exist"""
+    principal = _cached(user_id, user_type)
+    if principal is not None:
+        return principal
+
+    row = db.execute(_query_for(user_id, user_type)).first()
+    if not row:
+        return None
+
+    principal = _build_principal(row, user_type)
+    principal_cache.set(user_id, principal)
+    return dict(principal)
+
+
+async def resolve_principal_async(db: AsyncSession, user_id: str, user_type: str = "tenant_user") -> Optional[Dict[str, Any]]:
+    """AsyncSession variant of resolve_principal"""
+    principal = _cached(user_id, user_type)
+    if principal is not None:
+        return principal
+
+    row = (await db.execute(_query_for(user_id, user_type))).first()
+    if not row:
+        return None
+
+    principal = _build_principal(row, user_type)
+    principal_cache.set(user_id, principal)
+    return dict(principal)
+
+
+def principal_from_claims(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build the current_user dict from a stateless access token, or None if the token is not one"""
+    if not settings.AUTH_STATELESS_MODE or not payload.get("stateless"):
+        return None
+    return {
+        "user_id": payload["sub"],
+        "username": payload.get("username"),
+        "email": payload.get("email"),
+        "role": payload["role"],
+        "tenant_id": payload["tenant_id"],
+        "grade_level": payload["grade_level"],
+        "user_type": payload.get("user_type", "tenant_user"),
+    }
+
+
+def _permissions_version_query(user_id: str, user_type: str):
+    model = SystemAdminAccount if user_type == "system_admin" else UserAccount
+    key = SystemAdminAccount.admin_id if user_type == "system_admin" else UserAccount.user_id
+    return select(model.permissions_version).where(key == UUID(user_id))
+
+
+def permissions_version_confirmed(user_id: str, version: int) -> bool:
+    """True if this worker confirmed the token's permissions version within the re-check window"""
+    return permissions_version_cache.get(user_id) == version
+
+
+def load_permissions_version(db: Session, user_id: str, user_type: str = "tenant_user") -> Optional[int]:
+    """Read the current permissions_version (None if the account does not exist) and remember it"""
+    version = db.execute(_permissions_version_query(user_id, user_type)).scalar_one_or_none()
+    if version is not None:
+        permissions_version_cache.set(user_id, version)
+    return version
+
+
+async def load_permissions_version_async(db: AsyncSession, user_id: str, user_type: str = "tenant_user") -> Optional[int]:
+    """AsyncSession variant of load_permissions_version"""
+    version = (await db.execute(_permissions_version_query(user_id, user_type))).scalar_one_or_none()
+    if version is not None:
+        permissions_version_cache.set(user_id, version)
+    return version
+
+
+def bump_permissions_version(db: Session, user_id: UUID, user_type: str = "tenant_user") -> None:
+    """
+    Increment an account's permissions_version so stateless tokens issued before the
+    change are rejected. Runs inside the caller's transaction; call before commit.
+    """
+    model = SystemAdminAccount if user_type == "system_admin" else UserAccount
+    key = SystemAdminAccount.admin_id if user_type == "system_admin" else UserAccount.user_id
+    db.execute(
+        update(model)
+        .where(key == user_id)
+        .values(permissions_version=model.permissions_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def invalidate_principal(user_id: UUID) -> None:
+    """Drop the cached principal for a user (call after role, status or profile changes)"""
+    principal_cache.invalidate(str(user_id))
+    permissions_version_cache.invalidate(str(user_id))
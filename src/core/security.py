@@ -1,10 +1,14 @@
 """
 Security utilities: JWT tokens, password hashing, etc.
 """
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
+import asyncio
 import bcrypt
+import os
+import threading
 from fastapi import HTTPException, status
 
 from src.core.config import settings
@@ -30,8 +34,55 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+_hash_executor: Optional[Executor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def _get_hash_executor() -> Executor:
+    """Create the password hashing executor on first use (one per worker process)"""
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                workers = settings.PASSWORD_HASH_WORKERS or min(4, os.cpu_count() or 1)
+                if settings.PASSWORD_HASH_EXECUTOR == "process":
+                    _hash_executor = ProcessPoolExecutor(max_workers=workers)
+                else:
+                    _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    """Stop the password hashing executor (called on application shutdown)"""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False)
+            _hash_executor = None
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the hashing executor, without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the hashing executor, without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), get_password_hash, password)
+
+
+# Claims an access token must carry to be verified without a database lookup
+STATELESS_CLAIMS = ("role", "tenant_id", "grade_level", "pv")
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token"""
+    """
+    Create JWT access token.
+    In AUTH_STATELESS_MODE, tokens whose data includes role, tenant_id, grade_level and
+    the permissions version (pv) are marked stateless so get_current_user can trust them.
+    """
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -39,6 +90,8 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
         expire = datetime.utcnow() + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire, "type": "access"})
+    if settings.AUTH_STATELESS_MODE and all(claim in to_encode for claim in STATELESS_CLAIMS):
+        to_encode["stateless"] = True
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
@@ -0,0 +1,154 @@
+"""
+Indexable skip list
+"""
+from typing import Any, Iterator, List, Optional, Tuple
+import random
+
+
+class _Last:
+    """Key of the tail sentinel; compares greater than every key"""
+
+    def __lt__(self, other: Any) -> bool:
+        return False
+
+    def __le__(self, other: Any) -> bool:
+        return other is self
+
+    def __gt__(self, other: Any) -> bool:
+        return other is not self
+
+    def __ge__(self, other: Any) -> bool:
+        return True
+
+
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key: Any, value: Any, levels: int):
+        self.key = key
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * levels
+        # width[i]: positions skipped by following next[i]
+        self.width: List[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """
+    Sorted map from unique, comparable keys to values with positional access.
+
+    Every link records how many positions it skips, so insert, remove, rank (position
+    of a key) and lookup by position are all O(log n) expected; iterating a slice
+    costs O(log n + length). Not thread-safe: callers hold their own lock.
+    """
+
+    MAX_LEVELS = 32  # Enough for 2**32 keys at p = 1/2
+
+    def __init__(self, seed: Optional[int] = None):
+        self._tail = _Node(_Last(), None, self.MAX_LEVELS)
+        self._head = _Node(None, None, self.MAX_LEVELS)
+        self._head.next = [self._tail] * self.MAX_LEVELS
+        self._levels = 1
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_levels(self) -> int:
+        levels = 1
+        while levels < self.MAX_LEVELS and self._random.random() < 0.5:
+            levels += 1
+        return levels
+
+    def _find(self, key: Any) -> Tuple[List[_Node], List[int]]:
+        """Last node before key on each level, and its position (head is 0)"""
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        positions = [0] * self.MAX_LEVELS
+        node, position = self._head, 0
+        for level in range(self._levels - 1, -1, -1):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key: Any, value: Any = None) -> None:
+        """Insert key (which must not be present)"""
+        chain, positions = self._find(key)
+        levels = self._random_levels()
+        if levels > self._levels:
+            for level in range(self._levels, levels):
+                # Head links on new levels skip the whole list
+                self._head.width[level] = self._size + 1
+            self._levels = levels
+        node = _Node(key, value, levels)
+        position = positions[0] + 1
+        for level in range(levels):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            skipped = position - positions[level]
+            node.width[level] = previous.width[level] - skipped + 1
+            previous.width[level] = skipped
+        for level in range(levels, self._levels):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key: Any) -> Any:
+        """Remove key and return its value; raises KeyError if missing"""
+        chain, _ = self._find(key)
+        node = chain[0].next[0]
+        if node is self._tail or node.key != key:
+            raise KeyError(key)
+        for level in range(self._levels):
+            previous = chain[level]
+            if level < len(node.next):
+                previous.width[level] += node.width[level] - 1
+                previous.next[level] = node.next[level]
+            else:
+                previous.width[level] -= 1
+        self._size -= 1
+        return node.value
+
+    def rank(self, key: Any) -> Optional[int]:
+        """0-based position of key, or None if missing"""
+        chain, positions = self._find(key)
+        node = chain[0].next[0]
+        if node is self._tail or node.key != key:
+            return None
+        return positions[0]
+
+    def _node_at(self, index: int) -> _Node:
+        node, position = self._head, 0
+        target = index + 1
+        for level in range(self._levels - 1, -1, -1):
+            while position + node.width[level] <= target:
+                position += node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int) -> Tuple[Any, Any]:
+        """(key, value) at a 0-based position"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("skip list index out of range")
+        node = self._node_at(index)
+        return node.key, node.value
+
+    def islice(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[Any, Any]]:
+        """(key, value) pairs at positions start..stop-1"""
+        stop = self._size if stop is None else min(stop, self._size)
+        if start >= stop:
+            return
+        node = self._node_at(start)
+        for _ in range(stop - start):
+            yield node.key, node.value
+            node = node.next[0]
+
+    def __iter__(self) -> Iterator[Any]:
+        node = self._head.next[0]
+        while node is not self._tail:
+            yield node.key
+            node = node.next[0]
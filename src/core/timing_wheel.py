@@ -0,0 +1,117 @@
+"""
+Hierarchical timing wheel
+"""
+from typing import Dict, Hashable, List, Sequence, Set, Tuple
+import threading
+
+
+class TimingWheel:
+    """
+    Thread-safe hierarchical timing wheel for many timers with coarse (tick) resolution.
+
+    Level 0 has one slot per tick; each higher level has one slot per full turn of the
+    level below (with the defaults: 60 x 1s, 60 x 1min, 24 x 1h). A timer is placed at
+    the lowest level whose current turn contains its deadline, and is cascaded down as
+    the wheel turns. Timers more than one top-level turn away wait in an overflow map.
+    schedule and cancel are O(1); advance costs O(ticks elapsed + timers due).
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, slots_per_level: Sequence[int] = (60, 60, 24), now: float = 0.0):
+        self.tick_seconds = tick_seconds
+        self.slots_per_level = tuple(slots_per_level)
+        # Ticks covered by one slot of each level
+        self._spans: List[int] = []
+        span = 1
+        for slots in self.slots_per_level:
+            self._spans.append(span)
+            span *= slots
+        self._turn = span  # Ticks in one turn of the top level
+        self._levels: List[List[Set[Hashable]]] = [[set() for _ in range(slots)] for slots in self.slots_per_level]
+        self._overflow: Set[Hashable] = set()
+        self._due: Set[Hashable] = set()
+        # key -> (deadline tick, level, slot); level -1 is overflow, -2 is due
+        self._timers: Dict[Hashable, Tuple[int, int, int]] = {}
+        self._current = self._to_tick(now)
+        self._lock = threading.Lock()
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Schedule (or reschedule) key to fire at the deadline timestamp"""
+        # Round up so a timer never fires before its deadline
+        deadline_tick = -int(-deadline // self.tick_seconds)
+        with self._lock:
+            self._remove(key)
+            self._place(key, deadline_tick)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel a timer; returns False if it was not scheduled"""
+        with self._lock:
+            return self._remove(key)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Turn the wheel to now and return the keys whose deadlines have passed"""
+        target = self._to_tick(now)
+        with self._lock:
+            while self._current < target:
+                self._current += 1
+                self._cascade()
+                slot = self._levels[0][self._current % self.slots_per_level[0]]
+                for key in slot:
+                    self._timers[key] = (self._timers[key][0], -2, 0)
+                self._due |= slot
+                slot.clear()
+            due = list(self._due)
+            for key in due:
+                del self._timers[key]
+            self._due.clear()
+            return due
+
+    def _cascade(self) -> None:
+        """Move timers down from higher-level slots whose time has come"""
+        if self._current % self._turn == 0:
+            waiting, self._overflow = self._overflow, set()
+            for key in waiting:
+                self._place(key, self._timers[key][0])
+        for level in range(len(self.slots_per_level) - 1, 0, -1):
+            span = self._spans[level]
+            if self._current % span:
+                continue
+            slot = self._levels[level][(self._current // span) % self.slots_per_level[level]]
+            keys = list(slot)
+            slot.clear()
+            for key in keys:
+                self._place(key, self._timers[key][0])
+
+    def _place(self, key: Hashable, deadline_tick: int) -> None:
+        if deadline_tick <= self._current:
+            self._due.add(key)
+            self._timers[key] = (deadline_tick, -2, 0)
+            return
+        for level, slots in enumerate(self.slots_per_level):
+            parent_span = self._spans[level] * slots
+            # Lowest level whose current turn (parent slot) also contains the deadline
+            if deadline_tick // parent_span == self._current // parent_span:
+                slot = (deadline_tick // self._spans[level]) % slots
+                self._levels[level][slot].add(key)
+                self._timers[key] = (deadline_tick, level, slot)
+                return
+        self._overflow.add(key)
+        self._timers[key] = (deadline_tick, -1, 0)
+
+    def _remove(self, key: Hashable) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        _, level, slot = timer
+        if level == -2:
+            self._due.discard(key)
+        elif level == -1:
+            self._overflow.discard(key)
+        else:
+            self._levels[level][slot].discard(key)
+        return True
@@ -1,7 +1,7 @@
 """
 Main FastAPI application entry point
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import json
@@ -39,7 +39,15 @@ except Exception as e:
     raise
 
 try:
-    from src.core.database import init_db
+    from src.core.database import init_db, get_pool_stats, async_engine
+    from src.core.security import shutdown_hash_executor
+    from src.services.question_inventory import question_inventory_refiller, inventory_metrics
+    from src.services.session_expiry import session_expiry_engine
+    from src.services.leaderboard import leaderboard_engine
+    from src.services.leaderboard_stream import leaderboard_streams
+    from src.services.competition_results import competition_finalizer
+    from src.core.ai import get_ai_client
+    from src.core.dependencies import require_system_admin
     # #region agent log
     _log("D", "main.py:import", "Database module imported successfully", {})
     # #endregion
@@ -58,6 +66,14 @@ async def lifespan(app: FastAPI):
     _log("D", "main.py:lifespan", "Lifespan startup", {})
     # #endregion
     await init_db()
+    if settings.QUESTION_INVENTORY_ENABLED:
+        await question_inventory_refiller.start()
+    if settings.SESSION_EXPIRY_ENABLED:
+        await session_expiry_engine.start()
+    if settings.LEADERBOARD_PRELOAD_ENABLED:
+        await leaderboard_engine.preload()
+    if settings.COMPETITION_FINALIZER_ENABLED:
+        await competition_finalizer.start()
     # #region agent log
     _log("D", "main.py:lifespan", "Database initialized", {})
     # #endregion
@@ -66,7 +82,12 @@ async def lifespan(app: FastAPI):
     # #region agent log
     _log("D", "main.py:lifespan", "Lifespan shutdown", {})
     # #endregion
-    pass
+    await question_inventory_refiller.stop()
+    await session_expiry_engine.stop()
+    await leaderboard_streams.stop()
+    await competition_finalizer.stop()
+    await async_engine.dispose()
+    shutdown_hash_executor()
 
 # #region agent log
 _log("D", "main.py:app_creation", "About to create FastAPI app", {})
@@ -137,3 +158,39 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+# Per-worker internals (pool, caches, AI counters) are for system admins only
+@app.get("/health/db-pool", dependencies=[Depends(require_system_admin)])
+async def db_pool_status():
+    """Database connection pool statistics for this worker"""
+    return get_pool_stats()
+
+
+@app.get("/health/question-inventory", dependencies=[Depends(require_system_admin)])
+async def question_inventory_status():
+    """Question inventory draw/refill metrics for this worker"""
+    return inventory_metrics.snapshot()
+
+
+@app.get("/health/session-expiry", dependencies=[Depends(require_system_admin)])
+async def session_expiry_status():
+    """Timed session expiry counters for this worker"""
+    return session_expiry_engine.stats()
+
+
+@app.get("/health/leaderboards", dependencies=[Depends(require_system_admin)])
+async def leaderboards_status():
+    """In-memory competition leaderboard and stream counters for this worker"""
+    return {**leaderboard_engine.stats(), "streams": leaderboard_streams.stats()}
+
+
+@app.get("/health/competition-finalizer", dependencies=[Depends(require_system_admin)])
+async def competition_finalizer_status():
+    """Competition finalization counters for this worker"""
+    return competition_finalizer.stats()
+
+
+@app.get("/health/ai", dependencies=[Depends(require_system_admin)])
+async def ai_status():
+    """AI provider call counters and latency histograms for this worker"""
+    return get_ai_client().stats()
@@ -2,7 +2,7 @@
 SQLAlchemy database models matching the SQL schema in db/migration/0.0.10__initial_schema.sql
 """
 import re
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, ForeignKey, JSON, DECIMAL, TypeDecorator
+from sqlalchemy import Column, String, Integer, Boolean, Date, DateTime, Text, ForeignKey, JSON, DECIMAL, TypeDecorator
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY, ENUM
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -231,6 +231,7 @@ class UserAccount(Base):
     updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = Column(DateTime(timezone=True))
     created_by = Column(UUID(as_uuid=True))
+    permissions_version = Column(Integer, nullable=False, default=0)  # Bumped on role/status/profile changes
     
     # Relationships
     tenant = relationship("Tenant", back_populates="user_accounts")
@@ -344,6 +345,7 @@ class SystemAdminAccount(Base):
     updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = Column(DateTime(timezone=True))
     created_by = Column(UUID(as_uuid=True), ForeignKey("tutor.system_admin_accounts.admin_id"))
+    permissions_version = Column(Integer, nullable=False, default=0)  # Bumped on role/status changes
 
 
 class PasswordResetOTP(Base):
@@ -396,6 +398,33 @@ class Question(Base):
     ai_model_version = Column(String(50))
 
 
+class QuestionInventory(Base):
+    """Question inventory - pre-generated questions not yet drawn into a session - matches tutor.question_inventory"""
+    __tablename__ = "question_inventory"
+    __table_args__ = {"schema": "tutor"}
+    
+    question_id = Column(UUID(as_uuid=True), ForeignKey("tutor.questions.question_id", ondelete="CASCADE"), primary_key=True)
+    subject_id = Column(UUID(as_uuid=True), ForeignKey("tutor.subjects.subject_id"), nullable=False)
+    grade_level = Column(Integer)
+    difficulty = Column(pg_enum(QuestionDifficulty), nullable=False)
+    question_type = Column(pg_enum(QuestionType), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
+class AIResponseCache(Base):
+    """AI response cache - provider responses keyed by normalized prompt hash - matches tutor.ai_response_cache"""
+    __tablename__ = "ai_response_cache"
+    __table_args__ = {"schema": "tutor"}
+    
+    cache_key = Column(String(64), primary_key=True)
+    task = Column(String(50), nullable=False)
+    model_version = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    last_used_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
 class QuizSession(Base):
     """Quiz session model - matches tutor.quiz_sessions"""
     __tablename__ = "quiz_sessions"
@@ -412,9 +441,12 @@ class QuizSession(Base):
     status = Column(pg_enum(SessionStatus), nullable=False, default=SessionStatus.IN_PROGRESS)
     score = Column(DECIMAL(10, 2), nullable=False, default=0)
     max_score = Column(DECIMAL(10, 2), nullable=False, default=0)
+    questions_answered = Column(Integer, nullable=False, default=0)
+    current_question = Column(Integer, nullable=False, default=0)  # One past the furthest answered question
     started_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     completed_at = Column(DateTime(timezone=True))
     time_limit = Column(Integer)
+    expires_at = Column(DateTime(timezone=True))  # started_at + time_limit
 
 
 class AnswerSubmission(Base):
@@ -461,6 +493,22 @@ class StudentProgress(Base):
     last_updated = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class StudentDailyProgress(Base):
+    """Daily answer rollup model - matches tutor.student_daily_progress"""
+    __tablename__ = "student_daily_progress"
+    __table_args__ = {"schema": "tutor"}
+    
+    student_id = Column(UUID(as_uuid=True), ForeignKey("tutor.user_accounts.user_id"), primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tutor.tenants.tenant_id"), nullable=False)
+    subject_code = Column(String(100), primary_key=True)
+    topic = Column(String(255), primary_key=True, default="")  # "" when the question has no topic
+    day = Column(Date, primary_key=True)  # UTC
+    total_questions = Column(Integer, nullable=False, default=0)
+    correct_answers = Column(Integer, nullable=False, default=0)
+    score_sum = Column(DECIMAL(12, 2), nullable=False, default=0)
+    max_score_sum = Column(DECIMAL(12, 2), nullable=False, default=0)
+
+
 class StudentTutorAssignment(Base):
     """Student-tutor assignment model - matches tutor.student_tutor_assignments"""
     __tablename__ = "student_tutor_assignments"
@@ -529,6 +577,7 @@ class Competition(Base):
     created_by = Column(UUID(as_uuid=True), nullable=False)
     cancelled_at = Column(DateTime(timezone=True))
     cancelled_by = Column(UUID(as_uuid=True))
+    finalized_at = Column(DateTime(timezone=True))  # Final ranks computed (set by the finalization job)
     cancellation_reason = Column(Text)
 
 
@@ -550,6 +599,17 @@ class CompetitionRegistration(Base):
     notes = Column(Text)
 
 
+class CompetitionQuestionSet(Base):
+    """Shared competition question set model - matches tutor.competition_question_sets"""
+    __tablename__ = "competition_question_sets"
+    __table_args__ = {"schema": "tutor"}
+    
+    competition_id = Column(UUID(as_uuid=True), ForeignKey("tutor.competitions.competition_id"), primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tutor.tenants.tenant_id"), primary_key=True)
+    question_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False, default=list)  # Canonical order
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
 class CompetitionSession(Base):
     """Competition session model - matches tutor.competition_sessions"""
     __tablename__ = "competition_sessions"
@@ -563,12 +623,16 @@ class CompetitionSession(Base):
     started_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     completed_at = Column(DateTime(timezone=True))
     time_limit = Column(Integer)
+    expires_at = Column(DateTime(timezone=True))  # started_at + time_limit
     score = Column(DECIMAL(10, 2), nullable=False, default=0)
     max_score = Column(DECIMAL(10, 2), nullable=False, default=0)
     accuracy = Column(DECIMAL(5, 2))
     completion_time = Column(Integer)
     questions_answered = Column(Integer, nullable=False, default=0)
     status = Column(pg_enum(CompetitionSessionStatus), nullable=False, default=CompetitionSessionStatus.IN_PROGRESS)
+    final_rank = Column(Integer)  # Student's best session only, set at finalization
+    grade_level = Column(Integer)  # Grade bracket at finalization
+    grade_rank = Column(Integer)  # Rank within the grade bracket
 
 
 class AuditLog(Base):
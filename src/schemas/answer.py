@@ -1,7 +1,7 @@
 """
 Answer schemas
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Any
 from uuid import UUID
 
@@ -31,6 +31,30 @@ class SubmitAnswerResponse(BaseModel):
         from_attributes = True
 
 
+class BatchAnswerItem(BaseModel):
+    """One answer in a batch submission"""
+    question_id: UUID
+    answer: Any
+    time_spent: Optional[int] = None
+    hints_used: Optional[List[UUID]] = None
+
+
+class SubmitAnswersBatchRequest(BaseModel):
+    """Submit all answers for a quiz session"""
+    answers: List[BatchAnswerItem] = Field(..., min_length=1)
+
+
+class SubmitAnswersBatchResponse(BaseModel):
+    """Batch answer submission response, with one result per submitted answer"""
+    session_id: UUID
+    submitted: int
+    score: float
+    max_score: float
+    questions_answered: int  # Session total after this batch
+    session_status: str
+    results: List[SubmitAnswerResponse]
+
+
 class ValidateAnswerRequest(BaseModel):
     """Validate answer request (pre-submission)"""
     answer: Any
@@ -17,6 +17,7 @@ class CompetitionRules(BaseModel):
     scoring_rules: Optional[Dict[str, Any]] = None
     hints_allowed: bool = False
     narratives_allowed: bool = False
+    shuffle_questions: bool = True  # Same questions for everyone, in a per-student order
 
 
 class CompetitionEligibility(BaseModel):
@@ -111,11 +112,22 @@ class CompetitionRegistrationResponse(BaseModel):
     student_id: UUID
     status: str
     registered_at: datetime
+    waitlist_position: Optional[int] = None  # Set while waiting for a seat
     
     class Config:
         from_attributes = True
 
 
+class CompetitionRegistrationCancelResponse(BaseModel):
+    """Competition registration cancellation response"""
+    registration_id: UUID
+    competition_id: UUID
+    student_id: UUID
+    status: str
+    cancelled_at: datetime
+    promoted: List[UUID] = []  # Waitlisted students given the freed seat
+
+
 class LeaderboardEntry(BaseModel):
     """Leaderboard entry"""
     rank: int
@@ -127,6 +139,7 @@ class LeaderboardEntry(BaseModel):
     completion_time: Optional[int] = None
     questions_answered: int
     completed_at: Optional[datetime] = None
+    grade_level: Optional[int] = None
 
 
 class CompetitionLeaderboardResponse(BaseModel):
@@ -146,6 +159,7 @@ class CompetitionResultsResponse(BaseModel):
     name: str
     status: str
     ended_at: Optional[datetime] = None
+    finalized_at: Optional[datetime] = None
     total_participants: int
     winners: List[LeaderboardEntry]
     statistics: Dict[str, Any]
@@ -6,6 +6,8 @@ from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
 
+from src.schemas.question import QuestionResponse
+
 
 class CreateSessionRequest(BaseModel):
     """Create quiz session request"""
@@ -17,6 +19,7 @@ class CreateSessionRequest(BaseModel):
     num_questions: int
     topics: Optional[List[str]] = None
     time_limit: Optional[int] = None
+    include_questions: bool = False  # Embed question payloads (without answers) in the response
 
 
 class CreateSessionResponse(BaseModel):
@@ -25,6 +28,7 @@ class CreateSessionResponse(BaseModel):
     questions: List[UUID]
     created_at: datetime
     expires_at: Optional[datetime] = None
+    question_details: Optional[List[QuestionResponse]] = None  # Only with include_questions
     
     class Config:
         from_attributes = True
@@ -40,6 +44,7 @@ class SessionStatusResponse(BaseModel):
     max_score: float
     time_elapsed: int
     questions_answered: int
+    expires_at: Optional[datetime] = None  # Deadline for timed sessions
     
     class Config:
         from_attributes = True
@@ -55,7 +60,8 @@ class SessionResultsResponse(BaseModel):
     questions_answered: int
     time_elapsed: int
     completed_at: Optional[datetime] = None
-    questions: Optional[List[dict]] = None
+    questions_skipped: int = 0
+    questions: Optional[List[dict]] = None  # One entry per session question, in session order
     
     class Config:
         from_attributes = True
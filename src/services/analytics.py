@@ -0,0 +1,236 @@
+"""
+Progress analytics
+
+Per-area accuracy, weak/strong areas and improvement rates for one student or a
+whole cohort. The daily rollups (tutor.student_daily_progress) are loaded with one
+query as columnar NumPy arrays. Every statistic is then a grouped array operation
+(np.unique / np.bincount), with no per-student loops, so a tenant with thousands of
+students is one batch.
+
+- An area is a subject topic, or the subject itself for questions without a topic.
+- Accuracy per (student, area) comes with a Wilson score interval
+  (ANALYTICS_CONFIDENCE_Z). Areas need ANALYTICS_MIN_ANSWERS answers to be rated.
+  An area is weak when its upper bound is below ANALYTICS_WEAK_THRESHOLD, and strong
+  when its lower bound is above ANALYTICS_STRONG_THRESHOLD. Both lists are ranked by
+  that bound and capped at ANALYTICS_MAX_AREAS.
+- The improvement rate is the slope of daily accuracy, in percentage points per
+  week. It is a least-squares fit weighted by answers per day and decayed with a
+  half-life of ANALYTICS_HALF_LIFE_DAYS.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Optional, Dict, Any, List, Iterable, Union
+from uuid import UUID
+from datetime import datetime, timedelta
+import numpy as np
+
+from src.core.config import settings
+from src.models.database import StudentDailyProgress
+
+
+def area_label(subject_code: str, topic: str) -> str:
+    return f"{topic} ({subject_code})" if topic else subject_code
+
+
+def wilson_interval(correct: np.ndarray, total: np.ndarray, z: float):
+    """Wilson score interval (lower, upper) for correct / total, elementwise"""
+    total = np.maximum(total, 1)
+    p = correct / total
+    z2 = z * z
+    denominator = 1 + z2 / total
+    center = (p + z2 / (2 * total)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / total + z2 / (4 * total * total)) / denominator
+    return np.clip(center - half_width, 0.0, 1.0), np.clip(center + half_width, 0.0, 1.0)
+
+
+def _top_per_group(groups: np.ndarray, keys: np.ndarray, mask: np.ndarray, limit: int) -> np.ndarray:
+    """Indices of up to limit rows per group where mask holds, ordered by group then key"""
+    candidates = np.flatnonzero(mask)
+    order = candidates[np.lexsort((keys[candidates], groups[candidates]))]
+    if order.size == 0:
+        return order
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    rank = np.arange(order.size) - np.repeat(starts, np.diff(np.r_[starts, order.size]))
+    return order[rank < limit]
+
+
+class ProgressAnalytics:
+    """Columnar daily rollups for a set of students, with vectorized statistics"""
+
+    def __init__(
+        self,
+        student_ids: np.ndarray,
+        subject_codes: np.ndarray,
+        topics: np.ndarray,
+        days: np.ndarray,
+        totals: np.ndarray,
+        correct: np.ndarray,
+        today: int,
+    ):
+        # One element per rollup row; days are proleptic ordinals (date.toordinal)
+        self.students, self.student_index = np.unique(student_ids, return_inverse=True)
+        labels = np.array([area_label(code, topic) for code, topic in zip(subject_codes, topics)], dtype=object)
+        self.areas, self.area_index = np.unique(labels, return_inverse=True) if labels.size else (labels, np.zeros(0, dtype=np.int64))
+        self.days = days.astype(np.int64)
+        self.totals = totals.astype(np.float64)
+        self.correct = correct.astype(np.float64)
+        self.today = today
+
+    @classmethod
+    def load(
+        cls,
+        db: Session,
+        tenant_id: UUID,
+        student_ids: Optional[Union[Iterable[UUID], Any]] = None,
+        window_days: Optional[int] = None,
+    ) -> "ProgressAnalytics":
+        """
+        Rollups of a tenant's students over the last window_days (ANALYTICS_WINDOW_DAYS),
+        optionally limited to student_ids (ids or a select of ids)
+        """
+        window_days = window_days or settings.ANALYTICS_WINDOW_DAYS
+        today = datetime.utcnow().date()
+        stmt = select(
+            StudentDailyProgress.student_id,
+            StudentDailyProgress.subject_code,
+            StudentDailyProgress.topic,
+            StudentDailyProgress.day,
+            StudentDailyProgress.total_questions,
+            StudentDailyProgress.correct_answers,
+        ).where(
+            StudentDailyProgress.tenant_id == tenant_id,
+            StudentDailyProgress.day > today - timedelta(days=window_days),
+        )
+        if student_ids is not None:
+            if not hasattr(student_ids, "subquery"):
+                student_ids = list(student_ids)
+            stmt = stmt.where(StudentDailyProgress.student_id.in_(student_ids))
+        rows = db.execute(stmt).all()
+        columns = list(zip(*rows)) if rows else [()] * 6
+        return cls(
+            student_ids=np.array([str(student_id) for student_id in columns[0]], dtype=object),
+            subject_codes=np.array(columns[1], dtype=object),
+            topics=np.array(columns[2], dtype=object),
+            days=np.fromiter((day.toordinal() for day in columns[3]), dtype=np.int64, count=len(rows)),
+            totals=np.array(columns[4], dtype=np.float64),
+            correct=np.array(columns[5], dtype=np.float64),
+            today=today.toordinal(),
+        )
+
+    def area_accuracy(self) -> Dict[str, np.ndarray]:
+        """Totals, accuracy and Wilson bounds per (student, area) pair present in the data"""
+        n_areas = max(len(self.areas), 1)
+        pairs, pair_index = np.unique(self.student_index * n_areas + self.area_index, return_inverse=True)
+        totals = np.bincount(pair_index, weights=self.totals, minlength=pairs.size)
+        correct = np.bincount(pair_index, weights=self.correct, minlength=pairs.size)
+        lower, upper = wilson_interval(correct, totals, settings.ANALYTICS_CONFIDENCE_Z)
+        return {
+            "student": pairs // n_areas,
+            "area": pairs % n_areas,
+            "totals": totals,
+            "correct": correct,
+            "accuracy": np.divide(correct, totals, out=np.zeros(totals.shape), where=totals > 0),
+            "lower": lower,
+            "upper": upper,
+        }
+
+    def improvement_rates(self) -> np.ndarray:
+        """Per-student weighted accuracy slope in percentage points per week (NaN with fewer than two days)"""
+        n_students = len(self.students)
+        if n_students == 0:
+            return np.zeros(0)
+        # Collapse areas into one point per (student, day)
+        span = int(self.days.max() - self.days.min()) + 1
+        keys, index = np.unique(self.student_index * span + (self.days - self.days.min()), return_inverse=True)
+        totals = np.bincount(index, weights=self.totals, minlength=keys.size)
+        correct = np.bincount(index, weights=self.correct, minlength=keys.size)
+        student = keys // span
+        x = (keys % span + self.days.min() - self.today).astype(np.float64)  # Days before today (<= 0)
+        y = correct / totals * 100
+        w = totals * np.power(0.5, -x / settings.ANALYTICS_HALF_LIFE_DAYS)
+
+        def group_sum(values: np.ndarray) -> np.ndarray:
+            return np.bincount(student, weights=values, minlength=n_students)
+
+        sw, swx, swy = group_sum(w), group_sum(w * x), group_sum(w * y)
+        swxx, swxy = group_sum(w * x * x), group_sum(w * x * y)
+        day_counts = np.bincount(student, minlength=n_students)
+        denominator = sw * swxx - swx * swx
+        valid = (day_counts >= 2) & (denominator > 1e-12)
+        slope = np.full(n_students, np.nan)
+        slope[valid] = (sw[valid] * swxy[valid] - swx[valid] * swy[valid]) / denominator[valid]
+        return slope * 7
+
+    def student_summaries(self, include_areas: bool = False) -> Dict[str, Dict[str, Any]]:
+        """improvement_rate, weak_areas and strong_areas (and per-area stats) by student id"""
+        stats = self.area_accuracy()
+        rated = stats["totals"] >= settings.ANALYTICS_MIN_ANSWERS
+        limit = settings.ANALYTICS_MAX_AREAS
+        weak = _top_per_group(stats["student"], stats["upper"], rated & (stats["upper"] < settings.ANALYTICS_WEAK_THRESHOLD), limit)
+        strong = _top_per_group(stats["student"], -stats["lower"], rated & (stats["lower"] > settings.ANALYTICS_STRONG_THRESHOLD), limit)
+        rates = self.improvement_rates()
+
+        summaries = {
+            student_id: {
+                "improvement_rate": None if np.isnan(rate) else round(float(rate), 2),
+                "weak_areas": [],
+                "strong_areas": [],
+            }
+            for student_id, rate in zip(self.students, rates)
+        }
+        for key, selected in (("weak_areas", weak), ("strong_areas", strong)):
+            for student, area in zip(stats["student"][selected], stats["area"][selected]):
+                summaries[self.students[student]][key].append(self.areas[area])
+        if include_areas:
+            for summary in summaries.values():
+                summary["areas"] = []
+            for i in np.lexsort((stats["area"], stats["student"])):
+                summaries[self.students[stats["student"][i]]]["areas"].append({
+                    "area": self.areas[stats["area"][i]],
+                    "total_questions": int(stats["totals"][i]),
+                    "correct_answers": int(stats["correct"][i]),
+                    "accuracy": round(float(stats["accuracy"][i]) * 100, 2),
+                    "accuracy_lower": round(float(stats["lower"][i]) * 100, 2),
+                    "accuracy_upper": round(float(stats["upper"][i]) * 100, 2),
+                })
+        return summaries
+
+    def cohort_areas(self) -> List[Dict[str, Any]]:
+        """Accuracy per area across the cohort, weakest (lowest upper bound) first"""
+        n_areas = len(self.areas)
+        if n_areas == 0:
+            return []
+        totals = np.bincount(self.area_index, weights=self.totals, minlength=n_areas)
+        correct = np.bincount(self.area_index, weights=self.correct, minlength=n_areas)
+        lower, upper = wilson_interval(correct, totals, settings.ANALYTICS_CONFIDENCE_Z)
+        stats = self.area_accuracy()
+        students = np.bincount(stats["area"], minlength=n_areas)
+        weak_students = np.bincount(
+            stats["area"],
+            weights=((stats["totals"] >= settings.ANALYTICS_MIN_ANSWERS) & (stats["upper"] < settings.ANALYTICS_WEAK_THRESHOLD)).astype(np.float64),
+            minlength=n_areas,
+        )
+        return [
+            {
+                "area": self.areas[i],
+                "students": int(students[i]),
+                "students_weak": int(weak_students[i]),
+                "total_questions": int(totals[i]),
+                "accuracy": round(float(correct[i] / totals[i]) * 100, 2) if totals[i] else 0.0,
+                "accuracy_lower": round(float(lower[i]) * 100, 2),
+                "accuracy_upper": round(float(upper[i]) * 100, 2),
+            }
+            for i in np.argsort(upper, kind="stable")
+        ]
+
+    def cohort_summary(self, include_areas: bool = False) -> Dict[str, Any]:
+        """Cohort-wide area stats plus per-student summaries"""
+        students = self.student_summaries(include_areas)
+        rates = np.array([s["improvement_rate"] for s in students.values() if s["improvement_rate"] is not None])
+        return {
+            "students_with_activity": len(students),
+            "median_improvement_rate": round(float(np.median(rates)), 2) if rates.size else None,
+            "areas": self.cohort_areas(),
+            "students": students,
+        }
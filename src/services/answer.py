@@ -2,11 +2,19 @@
 Answer service
 """
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, Any, List
-from uuid import UUID
+from sqlalchemy import insert, update, and_, case, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Dict, Any, List, Tuple
+from uuid import UUID, uuid4
+from datetime import datetime
 
 from src.models.database import AnswerSubmission, Question, QuizSession
+from src.models.user import SessionStatus
 from src.core.exceptions import NotFoundError, BadRequestError
+from src.services.answer_validation import Validator, get_validator, get_validators
+from src.services.session_expiry import session_expiry_engine, deadline_passed
+from src.services.progress import ProgressService, submission_entry
+from src.services.leaderboard import complete_competition_session_stmt, leaderboard_engine
 
 
 class AnswerService:
@@ -25,10 +33,7 @@ class AnswerService:
         time_spent: Optional[int] = None,
         hints_used: Optional[List[UUID]] = None,
     ) -> Dict[str, Any]:
-        """
-        Submit and validate an answer
-        TODO: Integrate with AI service for semantic validation
-        """
+        """Submit and validate an answer; session answers also update the session's live progress"""
         # Get question
         question = self.db.query(Question).filter(
             Question.question_id == question_id,
@@ -38,22 +43,29 @@ class AnswerService:
         if not question:
             raise NotFoundError("Question not found")
         
-        # Validate session if provided
+        # Validate session if provided; its row stays locked until commit (see _record_progress)
         if session_id:
             session = self.db.query(QuizSession).filter(
                 QuizSession.session_id == session_id,
                 QuizSession.tenant_id == tenant_id,
                 QuizSession.student_id == student_id,
-            ).first()
+            ).with_for_update().first()
             
             if not session:
                 raise NotFoundError("Session not found")
+            self._check_not_expired(session)
         
         # Validate answer based on question type and subject validation method
         # TODO: Implement AI-based validation for different question types
-        is_correct = self._validate_answer(question, answer)
-        score = self._calculate_score(question, answer, is_correct, hints_used)
-        max_score = question.extra_metadata.get("points", 1.0) if question.extra_metadata else 1.0
+        row, result = self._score_submission(question, answer, hints_used)
+        
+        # Update session progress before inserting, so a repeat answer is not counted twice
+        progress = None
+        if session_id:
+            progress = self._record_progress(session, [(question_id, row["score"], row["max_score"])])
+        ProgressService(self.db).record_submissions(tenant_id, student_id, [
+            submission_entry(question, row["is_correct"], row["score"], row["max_score"], datetime.utcnow())
+        ])
         
         # Create submission record
         submission = AnswerSubmission(
@@ -62,29 +74,211 @@ class AnswerService:
             student_id=student_id,
             session_id=session_id,
             answer=answer,
-            is_correct=is_correct,
-            score=score,
-            max_score=max_score,
-            feedback=self._generate_feedback(question, answer, is_correct),
             time_spent=time_spent or 0,
             hints_used=hints_used or [],
+            **row,
         )
         
         self.db.add(submission)
         self.db.commit()
-        self.db.refresh(submission)
+        if progress:
+            leaderboard_engine.record(progress["competition_results"])
+        
+        return result
+    
+    def submit_answers(
+        self,
+        session_id: UUID,
+        tenant_id: UUID,
+        student_id: UUID,
+        answers: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        Submit a whole quiz session's answers in one transaction.
+        answers items have question_id, answer and optionally time_spent and hints_used.
+        Questions are loaded in one query, scored in memory and every submission is
+        inserted with one multi-row INSERT; nothing is recorded if any answer is invalid.
+        """
+        if not answers:
+            raise BadRequestError("No answers submitted")
+        
+        # Locked until commit, serializing submissions to this session (see _record_progress)
+        session = self.db.query(QuizSession).filter(
+            QuizSession.session_id == session_id,
+            QuizSession.tenant_id == tenant_id,
+            QuizSession.student_id == student_id,
+        ).with_for_update().first()
+        
+        if not session:
+            raise NotFoundError("Session not found")
+        self._check_not_expired(session)
+        
+        question_ids = [item["question_id"] for item in answers]
+        if len(set(question_ids)) != len(question_ids):
+            raise BadRequestError("Each question can only be answered once per batch")
+        
+        session_questions = set(session.questions or [])
+        not_in_session = [str(question_id) for question_id in question_ids if question_id not in session_questions]
+        if not_in_session:
+            raise BadRequestError(f"Questions not in this session: {', '.join(not_in_session)}")
+        
+        questions = {
+            question.question_id: question
+            for question in self.db.query(Question).filter(
+                Question.question_id.in_(question_ids),
+                Question.tenant_id == tenant_id,
+            )
+        }
+        if len(questions) != len(question_ids):
+            raise NotFoundError("Question not found")
+        
+        validators = get_validators(self.db, questions.values())
+        submitted_at = datetime.utcnow()
+        rows = []
+        results = []
+        for item in answers:
+            question = questions[item["question_id"]]
+            row, result = self._score_submission(
+                question, item["answer"], item.get("hints_used"), validators[question.question_id]
+            )
+            rows.append({
+                "submission_id": uuid4(),
+                "tenant_id": tenant_id,
+                "question_id": question.question_id,
+                "student_id": student_id,
+                "session_id": session_id,
+                "answer": item["answer"],
+                "time_spent": item.get("time_spent") or 0,
+                "hints_used": item.get("hints_used") or [],
+                "submitted_at": submitted_at,
+                **row,
+            })
+            results.append(result)
+        
+        progress = self._record_progress(
+            session, [(row["question_id"], row["score"], row["max_score"]) for row in rows]
+        )
+        ProgressService(self.db).record_submissions(tenant_id, student_id, [
+            submission_entry(questions[row["question_id"]], row["is_correct"], row["score"], row["max_score"], submitted_at)
+            for row in rows
+        ])
+        self.db.execute(insert(AnswerSubmission), rows)
+        self.db.commit()
+        leaderboard_engine.record(progress["competition_results"])
         
         return {
-            "question_id": question_id,
+            "session_id": session_id,
+            "submitted": len(results),
+            "score": sum(result["score"] for result in results),
+            "max_score": sum(result["max_score"] for result in results),
+            "questions_answered": progress["questions_answered"],
+            "session_status": progress["status"].value,
+            "results": results,
+        }
+    
+    def _record_progress(
+        self,
+        session: QuizSession,
+        answered: List[Tuple[UUID, float, float]],
+    ) -> Dict[str, Any]:
+        """
+        Add (question_id, score, max_score) answers to the session's live counters in one
+        UPDATE ... RETURNING. Only the first answer to each question counts; the session
+        is completed once every question is answered, along with the competition session
+        wrapping it (whose leaderboard entry is returned as competition_results, to be
+        recorded after commit). Must run before the submissions are inserted, with the
+        session row locked (loaded FOR UPDATE) so that a concurrent submission of the same
+        question waits for this one to commit and is then seen as already answered.
+        """
+        already_answered = {
+            question_id for (question_id,) in self.db.query(AnswerSubmission.question_id).filter(
+                AnswerSubmission.session_id == session.session_id,
+                AnswerSubmission.question_id.in_([question_id for question_id, _, _ in answered]),
+            ).distinct()
+        }
+        positions = {question_id: index + 1 for index, question_id in enumerate(session.questions or [])}
+        first: Dict[UUID, Tuple[float, float]] = {}
+        for question_id, score, max_score in answered:
+            if question_id not in already_answered and question_id in positions:
+                first.setdefault(question_id, (score, max_score))
+        
+        count = len(first)
+        answered_all = and_(
+            QuizSession.status == SessionStatus.IN_PROGRESS,
+            QuizSession.questions_answered + count >= func.cardinality(QuizSession.questions),
+        )
+        stmt = (
+            update(QuizSession)
+            .where(QuizSession.session_id == session.session_id)
+            .values(
+                score=QuizSession.score + sum(score for score, _ in first.values()),
+                max_score=QuizSession.max_score + sum(max_score for _, max_score in first.values()),
+                questions_answered=QuizSession.questions_answered + count,
+                current_question=func.greatest(
+                    QuizSession.current_question,
+                    max((positions[question_id] for question_id in first), default=0),
+                ),
+                status=case(
+                    (answered_all, literal(SessionStatus.COMPLETED, QuizSession.status.type)),
+                    else_=QuizSession.status,
+                ),
+                completed_at=case((answered_all, func.now()), else_=QuizSession.completed_at),
+            )
+            .returning(
+                QuizSession.score,
+                QuizSession.max_score,
+                QuizSession.questions_answered,
+                QuizSession.current_question,
+                QuizSession.status,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        progress = dict(self.db.execute(stmt).mappings().one())
+        progress["competition_results"] = []
+        if progress["status"] == SessionStatus.COMPLETED:
+            session_expiry_engine.cancel(session.session_id)
+            progress["competition_results"] = self.db.execute(
+                complete_competition_session_stmt(session.session_id)
+            ).mappings().all()
+        return progress
+    
+    @staticmethod
+    def _check_not_expired(session: QuizSession) -> None:
+        """Answers are refused once a timed session has expired (after the grace period)"""
+        if session.status == SessionStatus.EXPIRED or deadline_passed(session.expires_at):
+            raise BadRequestError("Session has expired")
+    
+    def _score_submission(
+        self,
+        question: Question,
+        answer: Any,
+        hints_used: Optional[List[UUID]],
+        validator: Optional[Validator] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Score an answer; returns (AnswerSubmission column values, API result)"""
+        is_correct = self._validate_answer(question, answer, validator)
+        score = self._calculate_score(question, answer, is_correct, hints_used)
+        max_score = question.extra_metadata.get("points", 1.0) if question.extra_metadata else 1.0
+        feedback = self._generate_feedback(question, answer, is_correct)
+        
+        row = {
+            "is_correct": is_correct,
+            "score": score,
+            "max_score": max_score,
+            "feedback": feedback,
+        }
+        result = {
+            "question_id": question.question_id,
             "correct": is_correct,
             "score": float(score),
             "max_score": float(max_score),
-            "feedback": submission.feedback,
+            "feedback": feedback,
             "correct_answer": question.correct_answer,
             "explanation": None,  # TODO: Generate explanation
             "areas_correct": [] if not is_correct else ["Answer is correct"],
             "areas_incorrect": [] if is_correct else ["Answer is incorrect"],
         }
+        return row, result
     
     def validate_answer(
         self,
@@ -116,17 +310,12 @@ class AnswerService:
             "areas_incorrect": [] if is_correct else ["Answer is incorrect"],
         }
     
-    def _validate_answer(self, question: Question, answer: Any) -> bool:
-        """Validate answer against correct answer"""
-        # Simple validation - TODO: Implement AI-based semantic validation
-        if question.question_type == "multiple_choice":
-            return str(answer).strip().lower() == str(question.correct_answer).strip().lower()
-        elif question.question_type == "true_false":
-            return bool(answer) == bool(question.correct_answer)
-        else:
-            # For text-based answers, use simple string comparison
-            # TODO: Use AI for semantic validation
-            return str(answer).strip().lower() == str(question.correct_answer).strip().lower()
+    def _validate_answer(self, question: Question, answer: Any, validator: Optional[Validator] = None) -> bool:
+        """Validate answer with the question's compiled validator (see answer_validation)"""
+        # TODO: Use AI for semantic validation (ai_semantic / ai_structured subjects)
+        if validator is None:
+            validator = get_validator(self.db, question)
+        return validator(answer)
     
     def _calculate_score(
         self,
@@ -155,3 +344,53 @@ class AnswerService:
         else:
             return f"Incorrect. The correct answer is: {question.correct_answer}"
 
+
+class AsyncAnswerService:
+    """
+    Answer service for AsyncSession.
+    Runs the sync AnswerService inside AsyncSession.run_sync so the scoring and
+    transaction rules stay in one place while database I/O awaits asyncpg.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def submit_answer(
+        self,
+        question_id: UUID,
+        tenant_id: UUID,
+        student_id: UUID,
+        answer: Any,
+        session_id: Optional[UUID] = None,
+        time_spent: Optional[int] = None,
+        hints_used: Optional[List[UUID]] = None,
+    ) -> Dict[str, Any]:
+        """Submit and validate an answer"""
+        return await self.db.run_sync(
+            lambda sync_db: AnswerService(sync_db).submit_answer(
+                question_id=question_id,
+                tenant_id=tenant_id,
+                student_id=student_id,
+                answer=answer,
+                session_id=session_id,
+                time_spent=time_spent,
+                hints_used=hints_used,
+            )
+        )
+    
+    async def submit_answers(
+        self,
+        session_id: UUID,
+        tenant_id: UUID,
+        student_id: UUID,
+        answers: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Submit a whole quiz session's answers in one transaction"""
+        return await self.db.run_sync(
+            lambda sync_db: AnswerService(sync_db).submit_answers(
+                session_id=session_id,
+                tenant_id=tenant_id,
+                student_id=student_id,
+                answers=answers,
+            )
+        )
@@ -0,0 +1,229 @@
+"""
+Answer validators
+
+A validator is compiled once per question from its correct_answer and the
+subject's answer_validation_method, then cached per worker by question_id, so
+scoring an answer only normalizes the submitted value.
+
+correct_answer is a JSON object; "answer" holds the expected value and these
+optional keys refine validation:
+- "validator": force a registered validator by name
+- "accepted": alternative answers that are also correct
+- "tolerance": absolute tolerance for numeric answers
+- "pattern": regular expression the whole answer must match
+- "answers": list of expected values (multi-select / set)
+- "ordered": true if a list answer must be in the given order
+
+Registered validators: exact, normalized_text, numeric, regex, set, ordered,
+multi_select. AI-based methods (ai_semantic, ai_structured) and
+code_execution currently fall back to normalized text comparison, as does a
+question whose metadata names an unknown validator or an invalid pattern (logged).
+"""
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
+from uuid import UUID
+import logging
+import math
+import re
+
+from src.core.cache import TTLCache, MISSING
+from src.core.config import settings
+from src.models.database import Question, Subject
+from src.models.user import ValidationMethod
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_THOUSANDS = re.compile(r"^[+-]?\d{1,3}(,\d{3})+(\.\d+)?$")
+
+# Compiled validators by question_id (questions are immutable once generated)
+answer_validator_cache = TTLCache(
+    ttl_seconds=settings.ANSWER_VALIDATOR_CACHE_TTL_SECONDS,
+    max_size=settings.ANSWER_VALIDATOR_CACHE_MAX_SIZE,
+)
+
+Validator = Callable[[Any], bool]
+_registry: Dict[str, Callable[[Dict[str, Any]], Validator]] = {}
+
+
+def register_validator(name: str):
+    """Register a validator factory: factory(correct_answer) -> validator(answer) -> bool"""
+    def decorator(factory: Callable[[Dict[str, Any]], Validator]):
+        _registry[name] = factory
+        return factory
+    return decorator
+
+
+def _unwrap(value: Any) -> Any:
+    """Submitted answers may be raw values or {"answer": value} objects"""
+    if isinstance(value, dict) and "answer" in value:
+        return value["answer"]
+    return value
+
+
+def _normalize_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return _WHITESPACE.sub(" ", str(value)).strip().casefold()
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if _THOUSANDS.match(text):
+        text = text.replace(",", "")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _expected_values(correct_answer: Dict[str, Any]) -> List[Any]:
+    """The expected answer followed by accepted alternatives"""
+    values = [correct_answer.get("answer")] if "answer" in correct_answer else []
+    return values + list(correct_answer.get("accepted") or [])
+
+
+def _as_list(value: Any) -> List[Any]:
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    if isinstance(value, str):
+        return [part for part in (item.strip() for item in value.split(",")) if part]
+    return [value]
+
+
+@register_validator("exact")
+def _exact(correct_answer: Dict[str, Any]) -> Validator:
+    expected = frozenset(str(value).strip() for value in _expected_values(correct_answer))
+    return lambda answer: str(_unwrap(answer)).strip() in expected
+
+
+@register_validator("normalized_text")
+def _normalized_text(correct_answer: Dict[str, Any]) -> Validator:
+    expected = frozenset(_normalize_text(value) for value in _expected_values(correct_answer))
+    return lambda answer: _normalize_text(_unwrap(answer)) in expected
+
+
+@register_validator("numeric")
+def _numeric(correct_answer: Dict[str, Any]) -> Validator:
+    expected = [number for number in map(_to_number, _expected_values(correct_answer)) if number is not None]
+    tolerance = float(correct_answer.get("tolerance") or 0.0)
+
+    def validate(answer: Any) -> bool:
+        number = _to_number(_unwrap(answer))
+        return number is not None and any(
+            math.isclose(number, value, rel_tol=1e-9, abs_tol=tolerance) for value in expected
+        )
+    return validate
+
+
+@register_validator("regex")
+def _regex(correct_answer: Dict[str, Any]) -> Validator:
+    pattern = re.compile(correct_answer["pattern"], re.IGNORECASE)
+    return lambda answer: pattern.fullmatch(str(_unwrap(answer)).strip()) is not None
+
+
+def _normalized_items(values: Iterable[Any]) -> List[str]:
+    return [_normalize_text(value) for value in values]
+
+
+@register_validator("set")
+def _set(correct_answer: Dict[str, Any]) -> Validator:
+    expected: FrozenSet[str] = frozenset(_normalized_items(_as_list(correct_answer.get("answers", correct_answer.get("answer")))))
+    return lambda answer: frozenset(_normalized_items(_as_list(_unwrap(answer)))) == expected
+
+
+@register_validator("ordered")
+def _ordered(correct_answer: Dict[str, Any]) -> Validator:
+    expected = _normalized_items(_as_list(correct_answer.get("answers", correct_answer.get("answer"))))
+    return lambda answer: _normalized_items(_as_list(_unwrap(answer))) == expected
+
+
+@register_validator("multi_select")
+def _multi_select(correct_answer: Dict[str, Any]) -> Validator:
+    # Options are matched as whole values: a comma inside an option is not a separator
+    expected = frozenset(_normalized_items(correct_answer.get("answers") or []))
+
+    def validate(answer: Any) -> bool:
+        answer = _unwrap(answer)
+        selected = answer if isinstance(answer, (list, tuple, set)) else [answer]
+        return frozenset(_normalized_items(selected)) == expected
+    return validate
+
+
+def _validator_name(question_type: str, correct_answer: Dict[str, Any], method: Optional[ValidationMethod]) -> str:
+    """Pick a registered validator for a question"""
+    if correct_answer.get("validator"):
+        return correct_answer["validator"]
+    if correct_answer.get("pattern"):
+        return "regex"
+    if isinstance(correct_answer.get("answers"), list):
+        if correct_answer.get("ordered"):
+            return "ordered"
+        return "multi_select" if question_type == "multiple_choice" else "set"
+    expected = correct_answer.get("answer")
+    if isinstance(expected, list):
+        return "ordered" if correct_answer.get("ordered") else "set"
+    if "tolerance" in correct_answer or (_to_number(expected) is not None and question_type != "multiple_choice"):
+        return "numeric"
+    if method == ValidationMethod.EXACT_MATCH and question_type not in ("multiple_choice", "true_false"):
+        return "exact"
+    return "normalized_text"
+
+
+def compile_validator(
+    question_type: str,
+    correct_answer: Any,
+    method: Optional[ValidationMethod] = None,
+) -> Validator:
+    """Build a validator for one question; bad validator metadata falls back to normalized_text"""
+    if not isinstance(correct_answer, dict):
+        correct_answer = {"answer": correct_answer}
+    name = _validator_name(getattr(question_type, "value", question_type), correct_answer, method)
+    try:
+        factory = _registry.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown answer validator: {name}")
+        return factory(correct_answer)
+    except (re.error, ValueError, TypeError) as exc:
+        logger.warning("Invalid answer validator metadata (%s); using normalized_text", exc)
+        return _registry["normalized_text"](correct_answer)
+
+
+def get_validators(db: Session, questions: Iterable[Question]) -> Dict[UUID, Validator]:
+    """
+    Compiled validators for questions, from the cache where possible.
+    Subject validation methods for cache misses are loaded in one query.
+    """
+    validators: Dict[UUID, Validator] = {}
+    misses: List[Question] = []
+    for question in questions:
+        validator = answer_validator_cache.get(question.question_id)
+        if validator is MISSING:
+            misses.append(question)
+        else:
+            validators[question.question_id] = validator
+
+    if misses:
+        methods: Dict[UUID, ValidationMethod] = dict(
+            db.query(Subject.subject_id, Subject.answer_validation_method).filter(
+                Subject.subject_id.in_({question.subject_id for question in misses})
+            ).all()
+        )
+        for question in misses:
+            validator = compile_validator(
+                question.question_type,
+                question.correct_answer,
+                methods.get(question.subject_id),
+            )
+            answer_validator_cache.set(question.question_id, validator)
+            validators[question.question_id] = validator
+    return validators
+
+
+def get_validator(db: Session, question: Question) -> Validator:
+    """Compiled validator for one question"""
+    return get_validators(db, [question])[question.question_id]
@@ -11,7 +11,7 @@ from src.models.database import (
     UserAccount, SystemAdminAccount, PasswordResetOTP, 
     UserSubjectRole, TenantAdminAccount, Tenant
 )
-from src.core.security import verify_password, get_password_hash, generate_otp, create_access_token
+from src.core.security import verify_password_async, get_password_hash_async, generate_otp, create_access_token
 from src.core.config import settings
 from src.core.exceptions import NotFoundError, BadRequestError, UnauthorizedError
 from src.services.tenant import TenantService
@@ -25,7 +25,7 @@ class AuthService:
         self.db = db
         self.tenant_service = TenantService(db)
     
-    def authenticate_user(
+    async def authenticate_user(
         self,
         username: str,
         password: str,
@@ -78,7 +78,7 @@ class AuthService:
             return None
         
         # Verify password
-        if not verify_password(password, user.password_hash):
+        if not await verify_password_async(password, user.password_hash):
             return None
         
         # Check account status
@@ -181,9 +181,10 @@ class AuthService:
             "requires_password_change": user.requires_password_change,
             "account_status": account_status,
             "user_type": user_type,  # "tenant_user" or "system_admin"
+            "permissions_version": user.permissions_version or 0,
         }
     
-    def change_password(
+    async def change_password(
         self,
         user_id: UUID,
         user_type: str,  # "tenant_user" or "system_admin"
@@ -214,11 +215,11 @@ class AuthService:
             raise NotFoundError("User not found")
         
         # Verify current password if provided
-        if current_password and not verify_password(current_password, user.password_hash):
+        if current_password and not await verify_password_async(current_password, user.password_hash):
             raise UnauthorizedError("Current password is incorrect")
         
         # Update password
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = await get_password_hash_async(new_password)
         user.requires_password_change = False
         
         # Update account status if pending activation
@@ -232,7 +233,7 @@ class AuthService:
             "requires_password_change": False,
         }
     
-    def request_password_reset(self, email: str) -> Dict[str, Any]:
+    async def request_password_reset(self, email: str) -> Dict[str, Any]:
         """
         Request password reset OTP
         """
@@ -257,7 +258,7 @@ class AuthService:
         
         # Generate OTP
         otp = generate_otp()
-        otp_hash = get_password_hash(otp)
+        otp_hash = await get_password_hash_async(otp)
         
         # Create OTP record (only for tenant users - system admins use user_id)
         otp_record = PasswordResetOTP(
@@ -278,7 +279,7 @@ class AuthService:
             "message": "If the email exists, an OTP has been sent",
         }
     
-    def reset_password_with_otp(
+    async def reset_password_with_otp(
         self,
         email: str,
         otp: str,
@@ -304,7 +305,7 @@ class AuthService:
             raise BadRequestError("Invalid or expired OTP")
         
         # Verify OTP
-        if not verify_password(otp, otp_record.otp_code_hash):
+        if not await verify_password_async(otp, otp_record.otp_code_hash):
             raise BadRequestError("Invalid OTP")
         
         # Find user
@@ -328,7 +329,7 @@ class AuthService:
             raise NotFoundError("User not found")
         
         # Update password
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = await get_password_hash_async(new_password)
         user.requires_password_change = False
         
         # Mark OTP as used
@@ -352,8 +353,8 @@ class AuthService:
             "token_type": "Bearer",
         }
     
-    def resend_otp(self, email: str) -> Dict[str, Any]:
+    async def resend_otp(self, email: str) -> Dict[str, Any]:
         """
         Resend OTP for password reset
         """
-        return self.request_password_reset(email)
+        return await self.request_password_reset(email)
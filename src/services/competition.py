@@ -1,17 +1,174 @@
 """
 Competition service
 """
-from sqlalchemy.orm import Session
-from typing import Optional, Dict, Any, List
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+from typing import Optional, Dict, Any, List, Sequence
 from uuid import UUID, uuid4
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import logging
+import random
 
 from src.models.database import (
-    Competition, CompetitionRegistration, CompetitionSession,
-    QuizSession, UserAccount, Subject
+    Competition, CompetitionRegistration, CompetitionSession, CompetitionQuestionSet,
+    Subject
 )
+from src.models.user import RegistrationStatus
+from src.core.config import settings
 from src.core.exceptions import NotFoundError, BadRequestError
 from src.services.session import SessionService
+from src.services.question import InventoryShortfall, generate_contents
+from src.services.leaderboard import leaderboard_engine, leaderboard_entry
+from src.services.competition_results import (
+    final_results_cache, final_leaderboard_stmt, final_total_stmt, final_position_stmt,
+    final_statistics_stmt, final_attempts_stmt,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# How often callers waiting for another worker's question set build check on it
+QUESTION_SET_POLL_SECONDS = 0.5
+
+
+def question_order(question_ids: Sequence[UUID], competition_id: UUID, student_id: UUID) -> List[UUID]:
+    """A student's permutation of a competition's question set (stable across calls)"""
+    seed = hashlib.blake2b(competition_id.bytes + student_id.bytes, digest_size=8).digest()
+    order = list(question_ids)
+    random.Random(int.from_bytes(seed, "big")).shuffle(order)
+    return order
+
+
+def _question_set_key(competition_id: UUID, tenant_id: UUID) -> tuple:
+    return (
+        CompetitionQuestionSet.competition_id == competition_id,
+        CompetitionQuestionSet.tenant_id == tenant_id,
+    )
+
+
+def _claim_question_set_stmt(competition_id: UUID, tenant_id: UUID, exists: bool):
+    """
+    Claim the build of a tenant's question set: insert it empty, or (exists) take over an
+    empty set whose claim (created_at) is older than COMPETITION_QUESTION_SET_BUILD_TIMEOUT_SECONDS.
+    Returns a row only for the claimer.
+    """
+    if not exists:
+        return (
+            pg_insert(CompetitionQuestionSet)
+            .values(competition_id=competition_id, tenant_id=tenant_id, question_ids=[], created_at=func.now())
+            .on_conflict_do_nothing()
+            .returning(CompetitionQuestionSet.competition_id)
+        )
+    return (
+        update(CompetitionQuestionSet)
+        .where(
+            *_question_set_key(competition_id, tenant_id),
+            func.cardinality(CompetitionQuestionSet.question_ids) == 0,
+            CompetitionQuestionSet.created_at
+            < func.now() - timedelta(seconds=settings.COMPETITION_QUESTION_SET_BUILD_TIMEOUT_SECONDS),
+        )
+        .values(created_at=func.now())
+        .returning(CompetitionQuestionSet.competition_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _waitlisted(competition_id: UUID, registration=CompetitionRegistration) -> List[Any]:
+    return [
+        registration.competition_id == competition_id,
+        registration.status != RegistrationStatus.CANCELLED,
+        registration.waitlist_position.isnot(None),
+    ]
+
+
+def _register_stmt(competition_id: UUID, tenant_id: UUID, student_id: UUID):
+    """Insert a registration (reviving a cancelled one); returns no row if already registered"""
+    stmt = pg_insert(CompetitionRegistration).values(
+        competition_id=competition_id,
+        tenant_id=tenant_id,
+        student_id=student_id,
+        status=RegistrationStatus.REGISTERED,
+        registered_at=func.now(),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[CompetitionRegistration.competition_id, CompetitionRegistration.student_id],
+        set_={
+            "status": RegistrationStatus.REGISTERED,
+            "registered_at": func.now(),
+            "confirmed_at": None,
+            "cancelled_at": None,
+            "cancelled_by": None,
+            "waitlist_position": None,
+        },
+        where=CompetitionRegistration.status == RegistrationStatus.CANCELLED,
+    ).returning(
+        CompetitionRegistration.registration_id,
+        CompetitionRegistration.status,
+        CompetitionRegistration.registered_at,
+    )
+
+
+def _claim_seats_stmt(competition_id: UUID, seats: int = 1):
+    """Take seats only if they are free; returns no row when the competition is full"""
+    return (
+        update(Competition)
+        .where(
+            Competition.competition_id == competition_id,
+            or_(
+                Competition.max_participants.is_(None),
+                Competition.participant_count + seats <= Competition.max_participants,
+            ),
+        )
+        .values(participant_count=Competition.participant_count + seats)
+        .returning(Competition.participant_count)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _waitlist_stmt(competition_id: UUID, registration_id: UUID):
+    """
+    Put a registration at the back of the waitlist. Concurrent registrations can draw
+    the same position; ties are served by registered_at and renumbered on promotion.
+    """
+    queued = aliased(CompetitionRegistration)
+    back = (
+        select(func.coalesce(func.max(queued.waitlist_position), 0) + 1)
+        .where(*_waitlisted(competition_id, queued))
+        .scalar_subquery()
+    )
+    return (
+        update(CompetitionRegistration)
+        .where(CompetitionRegistration.registration_id == registration_id)
+        .values(waitlist_position=back)
+        .returning(CompetitionRegistration.waitlist_position)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _renumber_waitlist_stmt(competition_id: UUID):
+    """Close the gaps in waitlist positions (1..n in queue order)"""
+    queue = (
+        select(
+            CompetitionRegistration.registration_id,
+            func.row_number().over(
+                order_by=(CompetitionRegistration.waitlist_position, CompetitionRegistration.registered_at)
+            ).label("position"),
+        )
+        .where(*_waitlisted(competition_id))
+        .subquery()
+    )
+    return (
+        update(CompetitionRegistration)
+        .where(
+            CompetitionRegistration.registration_id == queue.c.registration_id,
+            CompetitionRegistration.waitlist_position != queue.c.position,
+        )
+        .values(waitlist_position=queue.c.position)
+        .execution_options(synchronize_session=False)
+    )
 
 
 class CompetitionService:
@@ -97,7 +254,7 @@ class CompetitionService:
             "updated_at": competition.updated_at,
         }
     
-    def create_competition(
+    async def create_competition(
         self,
         tenant_id: Optional[UUID],
         created_by: UUID,
@@ -150,13 +307,22 @@ class CompetitionService:
         self.db.add(competition)
         self.db.commit()
         self.db.refresh(competition)
-        
-        return {
+        result = {
             "competition_id": competition.competition_id,
             "name": competition.name,
             "status": competition.status,
             "created_at": competition.created_at,
         }
+        
+        # Tenant competitions get their questions now; public ones get a set per tenant on
+        # first start, as does a tenant competition whose build failed here
+        if tenant_id:
+            try:
+                await self.prepare_question_set(competition, tenant_id)
+            except Exception:
+                logger.exception("Question set build failed for competition %s; left to first start", result["competition_id"])
+        
+        return result
     
     def register_for_competition(
         self,
@@ -164,7 +330,13 @@ class CompetitionService:
         tenant_id: UUID,
         student_id: UUID,
     ) -> Dict[str, Any]:
-        """Register student for competition"""
+        """
+        Register student for competition, or waitlist them once max_participants is reached.
+        Built for registration-open spikes: the registration is an INSERT ... ON CONFLICT
+        (a repeat registration is rejected by the unique key, not a read-check), and the
+        seat is claimed last with one conditional UPDATE ... RETURNING on participant_count,
+        so the competition row is locked only just before commit and never overbooked.
+        """
         # Get competition
         competition = self.db.query(Competition).filter(
             Competition.competition_id == competition_id,
@@ -178,47 +350,111 @@ class CompetitionService:
         if now < competition.registration_start or now > competition.registration_end:
             raise BadRequestError("Registration period is closed")
         
-        # Check if already registered
-        existing = self.db.query(CompetitionRegistration).filter(
-            CompetitionRegistration.competition_id == competition_id,
-            CompetitionRegistration.student_id == student_id,
-            CompetitionRegistration.status == "registered",
-        ).first()
-        
-        if existing:
+        registration = self.db.execute(_register_stmt(competition_id, tenant_id, student_id)).mappings().first()
+        if registration is None:
+            self.db.rollback()
             raise BadRequestError("Already registered for this competition")
         
-        # Check max participants
-        if competition.max_participants:
-            current_count = competition.participant_count or 0
-            if current_count >= competition.max_participants:
-                raise BadRequestError("Maximum participants reached")
-        
-        # Create registration
-        registration = CompetitionRegistration(
-            competition_id=competition_id,
-            tenant_id=tenant_id,
-            student_id=student_id,
-            status="registered",
-        )
-        
-        self.db.add(registration)
+        waitlist_position = None
+        if self.db.execute(_claim_seats_stmt(competition_id)).first() is None:
+            waitlist_position = self.db.execute(
+                _waitlist_stmt(competition_id, registration["registration_id"])
+            ).scalar_one()
+        self.db.commit()
         
-        # Update participant count
-        competition.participant_count = (competition.participant_count or 0) + 1
+        return {
+            "registration_id": registration["registration_id"],
+            "competition_id": competition_id,
+            "student_id": student_id,
+            "status": registration["status"],
+            "registered_at": registration["registered_at"],
+            "waitlist_position": waitlist_position,
+        }
+    
+    def cancel_registration(
+        self,
+        competition_id: UUID,
+        student_id: UUID,
+        cancelled_by: UUID,
+    ) -> Dict[str, Any]:
+        """Cancel a registration; a freed seat goes to the head of the waitlist"""
+        registration = self.db.query(CompetitionRegistration).filter(
+            CompetitionRegistration.competition_id == competition_id,
+            CompetitionRegistration.student_id == student_id,
+            CompetitionRegistration.status != RegistrationStatus.CANCELLED,
+        ).with_for_update().first()
         
+        if not registration:
+            raise NotFoundError("Registration not found")
+        
+        held_seat = registration.waitlist_position is None
+        registration.status = RegistrationStatus.CANCELLED
+        registration.cancelled_at = datetime.utcnow()
+        registration.cancelled_by = cancelled_by
+        registration.waitlist_position = None
+        self.db.flush()
+        
+        if held_seat:
+            self.db.execute(
+                update(Competition)
+                .where(Competition.competition_id == competition_id)
+                .values(participant_count=func.greatest(Competition.participant_count - 1, 0))
+                .execution_options(synchronize_session=False)
+            )
+            promoted = self._promote_waitlist(competition_id)
+        else:
+            promoted = []
+            self.db.execute(_renumber_waitlist_stmt(competition_id))
         self.db.commit()
-        self.db.refresh(registration)
         
         return {
             "registration_id": registration.registration_id,
             "competition_id": competition_id,
             "student_id": student_id,
             "status": registration.status,
-            "registered_at": registration.registered_at,
+            "cancelled_at": registration.cancelled_at,
+            "promoted": [str(promoted_id) for promoted_id in promoted],
         }
     
-    def start_competition_session(
+    def _promote_waitlist(self, competition_id: UUID) -> List[UUID]:
+        """Set-based promotion of the head of the waitlist into free seats (caller commits)"""
+        seats = self.db.execute(
+            select(Competition.max_participants, Competition.participant_count)
+            .where(Competition.competition_id == competition_id)
+            .with_for_update()
+        ).first()
+        if seats is None:
+            return []
+        free = None if seats.max_participants is None else seats.max_participants - seats.participant_count
+        if free is not None and free <= 0:
+            return []
+        
+        head = (
+            select(CompetitionRegistration.registration_id)
+            .where(*_waitlisted(competition_id))
+            .order_by(CompetitionRegistration.waitlist_position, CompetitionRegistration.registered_at)
+            .with_for_update(skip_locked=True)
+        )
+        if free is not None:
+            head = head.limit(free)
+        promoted = self.db.execute(
+            update(CompetitionRegistration)
+            .where(CompetitionRegistration.registration_id.in_(head.scalar_subquery()))
+            .values(waitlist_position=None)
+            .returning(CompetitionRegistration.student_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if promoted:
+            self.db.execute(
+                update(Competition)
+                .where(Competition.competition_id == competition_id)
+                .values(participant_count=Competition.participant_count + len(promoted))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.execute(_renumber_waitlist_stmt(competition_id))
+        return promoted
+    
+    async def start_competition_session(
         self,
         competition_id: UUID,
         tenant_id: UUID,
@@ -247,6 +483,8 @@ class CompetitionService:
         
         if not registration:
             raise BadRequestError("Not registered for this competition")
+        if registration.waitlist_position is not None:
+            raise BadRequestError("Still on the waitlist for this competition")
         
         # Check if already started
         existing_session = self.db.query(CompetitionSession).filter(
@@ -258,14 +496,17 @@ class CompetitionService:
         if existing_session:
             raise BadRequestError("Competition session already started")
         
-        # Create quiz session
+        # Create quiz session over the competition's shared questions (generated at most once)
         rules = competition.rules or {}
-        session_data = self.session_service.create_session(
+        subject = self.session_service.validate_session_request(tenant_id, student_id, competition.subject_id, None)
+        question_ids = await self.prepare_question_set(competition, tenant_id)
+        if rules.get("shuffle_questions", True):
+            question_ids = question_order(question_ids, competition_id, student_id)
+        session_data = self.session_service.create_session_for_questions(
             tenant_id=tenant_id,
             student_id=student_id,
-            subject_id=competition.subject_id,
-            num_questions=rules.get("num_questions", 10),
-            difficulty=rules.get("difficulty"),
+            subject=subject,
+            question_ids=question_ids,
             time_limit=rules.get("time_limit"),
         )
         
@@ -276,6 +517,7 @@ class CompetitionService:
             student_id=student_id,
             session_id=session_data["session_id"],
             time_limit=rules.get("time_limit"),
+            expires_at=session_data["expires_at"],
             status="in_progress",
         )
         
@@ -290,9 +532,87 @@ class CompetitionService:
             "session_id": session_data["session_id"],
             "started_at": comp_session.started_at,
             "time_limit": comp_session.time_limit,
+            "expires_at": comp_session.expires_at,
             "questions": session_data["questions"],
         }
     
+    async def prepare_question_set(self, competition: Competition, tenant_id: UUID) -> List[UUID]:
+        """
+        The competition's shared questions for a tenant, built once per competition and
+        tenant. The first caller claims the set by committing it empty and builds it
+        (_build_question_set); concurrent callers poll, holding no transaction, until it is
+        filled. A failed build drops its claim, and a claim older than
+        COMPETITION_QUESTION_SET_BUILD_TIMEOUT_SECONDS (a builder that died) is taken over.
+        """
+        competition_id = competition.competition_id
+        key = _question_set_key(competition_id, tenant_id)
+        while True:
+            question_ids = self.db.execute(select(CompetitionQuestionSet.question_ids).where(*key)).scalar_one_or_none()
+            if question_ids:
+                return question_ids
+            claimed = self.db.execute(
+                _claim_question_set_stmt(competition_id, tenant_id, exists=question_ids is not None)
+            ).first()
+            self.db.commit()
+            if claimed:
+                return await self._build_question_set(competition, tenant_id)
+            await asyncio.sleep(QUESTION_SET_POLL_SECONDS)
+    
+    async def _build_question_set(self, competition: Competition, tenant_id: UUID) -> List[UUID]:
+        """
+        Build a claimed question set: AI content is generated outside any transaction, then
+        stock is drawn and the questions inserted and stored in the set in one short one
+        """
+        key = _question_set_key(competition.competition_id, tenant_id)
+        rules = competition.rules or {}
+        count = rules.get("num_questions", 10)
+        difficulty = rules.get("difficulty")
+        question_service = self.session_service.question_service
+        try:
+            subject, request, stocked = question_service.plan_questions(
+                count, subject_id=competition.subject_id, difficulty=difficulty
+            )
+            self.db.commit()
+            contents = await generate_contents(request, count - stocked)
+            while True:
+                try:
+                    questions = question_service.generate_questions(
+                        tenant_id=tenant_id,
+                        count=count,
+                        subject=subject,
+                        difficulty=difficulty,
+                        commit=False,
+                        contents=contents,
+                    )
+                    break
+                except InventoryShortfall as shortfall:
+                    self.db.rollback()
+                    contents = contents + await generate_contents(request, shortfall.missing)
+            
+            question_ids = [question["question_id"] for question in questions]
+            stored = self.db.execute(
+                update(CompetitionQuestionSet)
+                .where(*key, func.cardinality(CompetitionQuestionSet.question_ids) == 0)
+                .values(question_ids=question_ids)
+                .returning(CompetitionQuestionSet.competition_id)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if stored is None:
+                # Our claim went stale and another caller stored the set first
+                self.db.rollback()
+                return self.db.execute(select(CompetitionQuestionSet.question_ids).where(*key)).scalar_one()
+            self.db.commit()
+            return question_ids
+        except Exception:
+            self.db.rollback()
+            self.db.execute(
+                delete(CompetitionQuestionSet)
+                .where(*key, func.cardinality(CompetitionQuestionSet.question_ids) == 0)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            raise
+    
     def get_leaderboard(
         self,
         competition_id: UUID,
@@ -300,8 +620,13 @@ class CompetitionService:
         limit: int = 100,
         offset: int = 0,
         grade_level: Optional[int] = None,
+        student_id: Optional[UUID] = None,
     ) -> Dict[str, Any]:
-        """Get competition leaderboard"""
+        """
+        Get competition leaderboard from the in-memory ranking (best completed session
+        per student), or from the final ranks once the competition is finalized;
+        user_rank and user_position are student_id's, if given
+        """
         competition = self.db.query(Competition).filter(
             Competition.competition_id == competition_id,
         ).first()
@@ -309,55 +634,113 @@ class CompetitionService:
         if not competition:
             raise NotFoundError("Competition not found")
         
-        # Get completed sessions
-        query = self.db.query(CompetitionSession).filter(
-            CompetitionSession.competition_id == competition_id,
-            CompetitionSession.status == "completed",
-        )
-        
-        if grade_level:
-            # Join with student profiles to filter by grade
-            from src.models.database import StudentSubjectProfile
-            query = query.join(StudentSubjectProfile).filter(
-                StudentSubjectProfile.grade_level == grade_level
-            )
-        
-        sessions = query.order_by(
-            CompetitionSession.score.desc(),
-            CompetitionSession.accuracy.desc(),
-            CompetitionSession.completion_time.asc(),
-        ).limit(limit).offset(offset).all()
-        
-        leaderboard = []
-        for idx, session in enumerate(sessions, start=offset + 1):
-            student = self.db.query(UserAccount).filter(
-                UserAccount.user_id == session.student_id,
-            ).first()
-            
-            leaderboard.append({
-                "rank": idx,
-                "student_id": str(session.student_id),
-                "student_name": (student.name or student.username) if student else "Unknown",
-                "score": float(session.score),
-                "max_score": float(session.max_score),
-                "accuracy": float(session.accuracy) if session.accuracy else 0.0,
-                "completion_time": session.completion_time,
-                "questions_answered": session.questions_answered,
-                "completed_at": session.completed_at,
-            })
+        if competition.finalized_at:
+            return self._final_leaderboard(competition, limit, offset, grade_level, student_id)
         
-        total = self.db.query(CompetitionSession).filter(
-            CompetitionSession.competition_id == competition_id,
-            CompetitionSession.status == "completed",
-        ).count()
+        board = leaderboard_engine.board(self.db, competition_id)
+        # Grade brackets are the students' grade level in the competition's subject
+        grade_level = grade_level or None
+        leaderboard = board.page(offset, limit, grade_level)
+        total = board.total(grade_level)
+        user_position = board.position(str(student_id), grade_level) if student_id else None
         
         return {
             "competition_id": competition_id,
             "type": type,
-            "last_updated": datetime.utcnow(),
+            "last_updated": board.last_updated,
             "leaderboard": leaderboard,
             "total_participants": total,
-            "user_rank": None,
-            "user_position": None,
+            "user_rank": user_position["rank"] if user_position else None,
+            "user_position": user_position,
         }
-
+    
+    def _final_leaderboard(
+        self,
+        competition: Competition,
+        limit: int,
+        offset: int,
+        grade_level: Optional[int],
+        student_id: Optional[UUID],
+    ) -> Dict[str, Any]:
+        """Leaderboard of a finalized competition; pages are cached since they never change"""
+        key = ("leaderboard", competition.competition_id, grade_level, limit, offset)
+        page = final_results_cache.get(key)
+        if page is None:
+            leaderboard = [
+                {"rank": row["rank"], **leaderboard_entry(row)}
+                for row in self.db.execute(
+                    final_leaderboard_stmt(competition.competition_id, limit, offset, grade_level)
+                ).mappings()
+            ]
+            total = self.db.execute(final_total_stmt(competition.competition_id, grade_level)).scalar()
+            page = (leaderboard, total)
+            final_results_cache.set(key, page)
+        leaderboard, total = page
+        
+        user_position = None
+        if student_id:
+            row = self.db.execute(
+                final_position_stmt(competition.competition_id, student_id, grade_level)
+            ).mappings().first()
+            if row:
+                user_position = {"rank": row["rank"], **leaderboard_entry(row)}
+        
+        return {
+            "competition_id": competition.competition_id,
+            "type": "final",
+            "last_updated": competition.finalized_at,
+            "leaderboard": leaderboard,
+            "total_participants": total,
+            "user_rank": user_position["rank"] if user_position else None,
+            "user_position": user_position,
+        }
+    
+    def get_results(self, competition_id: UUID, limit: int = 100) -> Dict[str, Any]:
+        """
+        Final leaderboard, winners (top 10) and statistics of a finalized competition,
+        overall and per grade bracket
+        """
+        competition = self.db.query(Competition).filter(
+            Competition.competition_id == competition_id,
+        ).first()
+        
+        if not competition:
+            raise NotFoundError("Competition not found")
+        if not competition.finalized_at:
+            raise BadRequestError("Competition results are not final yet")
+        
+        key = ("results", competition_id, limit)
+        results = final_results_cache.get(key)
+        if results is not None:
+            return results
+        
+        leaderboard = self._final_leaderboard(competition, limit, 0, None, None)
+        statistics: Dict[str, Any] = {"sessions": self.db.execute(final_attempts_stmt(competition_id)).scalar()}
+        grades = []
+        for row in self.db.execute(final_statistics_stmt(competition_id)).mappings():
+            stats = {
+                "participants": row["participants"],
+                "average_score": float(row["average_score"] or 0),
+                "highest_score": float(row["highest_score"] or 0),
+                "average_accuracy": float(row["average_accuracy"] or 0),
+                "average_completion_time": int(row["average_completion_time"]) if row["average_completion_time"] is not None else None,
+            }
+            if row["is_total"]:
+                statistics.update(stats)
+            else:
+                grades.append({"grade_level": row["grade_level"], **stats})
+        statistics["grade_levels"] = sorted(grades, key=lambda grade: (grade["grade_level"] is None, grade["grade_level"] or 0))
+        
+        results = {
+            "competition_id": competition_id,
+            "name": competition.name,
+            "status": competition.status,
+            "ended_at": competition.end_date,
+            "finalized_at": competition.finalized_at,
+            "total_participants": leaderboard["total_participants"],
+            "winners": leaderboard["leaderboard"][:10],
+            "statistics": statistics,
+            "leaderboard": leaderboard["leaderboard"],
+        }
+        final_results_cache.set(key, results)
+        return results
@@ -0,0 +1,327 @@
+"""
+Competition finalization and final results
+
+Once a competition's end_date is COMPETITION_FINALIZE_DELAY_SECONDS behind, the
+finalization job closes it in one transaction, entirely in SQL, so a competition
+with 100k sessions is never loaded into Python:
+
+1. Open sessions are auto-submitted at end_date with their quiz session's score.
+2. Every completed session is ranked with window functions in one pass. Each
+   student's best session (row_number per student) gets final_rank overall and
+   grade_rank within its grade bracket (the student's grade level in the
+   competition subject). Accuracy is recomputed from score / max_score.
+3. The competition becomes ended with finalized_at set.
+
+Workers coordinate with FOR UPDATE SKIP LOCKED on the competition row. After
+finalization the final leaderboard and results never change, so reads are range
+scans on the final_rank / grade_rank indexes, cached in final_results_cache.
+"""
+from sqlalchemy import select, update, func, case, literal, and_, or_
+from typing import Optional, Dict, Any, List
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import threading
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.models.database import Competition, CompetitionSession, QuizSession, StudentSubjectProfile
+from src.models.user import CompetitionStatus, CompetitionSessionStatus, SessionStatus
+from src.services.leaderboard import competition_result_values, entry_columns, leaderboard_engine
+
+logger = logging.getLogger(__name__)
+
+# Final leaderboard pages and results by competition (immutable once finalized)
+final_results_cache = TTLCache(
+    ttl_seconds=settings.COMPETITION_RESULTS_CACHE_TTL_SECONDS,
+    max_size=settings.COMPETITION_RESULTS_CACHE_MAX_SIZE,
+)
+
+
+def _due_competition_stmt():
+    """Next competition to finalize, locked so other workers skip it"""
+    return (
+        select(Competition.competition_id, Competition.subject_id, Competition.end_date)
+        .where(
+            Competition.finalized_at.is_(None),
+            Competition.status != CompetitionStatus.CANCELLED,
+            Competition.end_date <= func.now() - timedelta(seconds=settings.COMPETITION_FINALIZE_DELAY_SECONDS),
+        )
+        .order_by(Competition.end_date)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def _open_sessions(competition_id: UUID):
+    return select(CompetitionSession.session_id).where(
+        CompetitionSession.competition_id == competition_id,
+        CompetitionSession.status == CompetitionSessionStatus.IN_PROGRESS,
+    )
+
+
+def _close_quiz_sessions_stmt(competition_id: UUID, end_date: datetime):
+    """Expire the quiz sessions of a competition's open sessions at end_date"""
+    return (
+        update(QuizSession)
+        .where(
+            QuizSession.session_id.in_(_open_sessions(competition_id).scalar_subquery()),
+            QuizSession.status == SessionStatus.IN_PROGRESS,
+        )
+        .values(status=SessionStatus.EXPIRED, completed_at=end_date)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _close_competition_sessions_stmt(competition_id: UUID, end_date: datetime):
+    """Auto-submit a competition's open sessions at end_date (completed if anything was answered)"""
+    finished_at = func.least(func.coalesce(QuizSession.completed_at, end_date), end_date)
+    return (
+        update(CompetitionSession)
+        .where(
+            CompetitionSession.session_id == QuizSession.session_id,
+            CompetitionSession.competition_id == competition_id,
+            CompetitionSession.status == CompetitionSessionStatus.IN_PROGRESS,
+        )
+        .values(
+            status=case(
+                (QuizSession.questions_answered > 0, literal(CompetitionSessionStatus.COMPLETED, CompetitionSession.status.type)),
+                else_=literal(CompetitionSessionStatus.EXPIRED, CompetitionSession.status.type),
+            ),
+            **competition_result_values(finished_at),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _rank_sessions_stmt(competition_id: UUID, subject_id: UUID):
+    """
+    Rank every completed session in one pass: best session per student, then
+    final_rank overall and grade_rank per grade bracket. Ties are broken like the
+    live leaderboard (accuracy, completion time, completion order, student id).
+    """
+    grades = (
+        select(StudentSubjectProfile.user_id, func.max(StudentSubjectProfile.grade_level).label("grade_level"))
+        .where(StudentSubjectProfile.subject_id == subject_id)
+        .group_by(StudentSubjectProfile.user_id)
+        .subquery("grades")
+    )
+    accuracy = case(
+        (CompetitionSession.max_score > 0, func.round(CompetitionSession.score * 100 / CompetitionSession.max_score, 2)),
+        else_=0,
+    )
+
+    def ranking(columns) -> tuple:
+        return (
+            columns.score.desc(),
+            columns.accuracy.desc(),
+            columns.completion_time.asc().nulls_last(),
+            columns.completed_at.asc(),
+            columns.student_id,
+        )
+
+    attempts = (
+        select(
+            CompetitionSession.competition_session_id,
+            CompetitionSession.student_id,
+            CompetitionSession.score,
+            accuracy.label("accuracy"),
+            CompetitionSession.completion_time,
+            CompetitionSession.completed_at,
+            grades.c.grade_level,
+        )
+        .outerjoin(grades, grades.c.user_id == CompetitionSession.student_id)
+        .where(
+            CompetitionSession.competition_id == competition_id,
+            CompetitionSession.status == CompetitionSessionStatus.COMPLETED,
+        )
+        .subquery("attempts")
+    )
+    best = (
+        select(
+            attempts,
+            func.row_number().over(partition_by=attempts.c.student_id, order_by=ranking(attempts.c)).label("attempt"),
+        )
+        .subquery("best")
+    )
+    ranked = (
+        select(
+            best.c.competition_session_id,
+            best.c.accuracy,
+            best.c.grade_level,
+            func.row_number().over(order_by=ranking(best.c)).label("final_rank"),
+            func.row_number().over(partition_by=best.c.grade_level, order_by=ranking(best.c)).label("grade_rank"),
+        )
+        .where(best.c.attempt == 1)
+        .subquery("ranked")
+    )
+    return (
+        update(CompetitionSession)
+        .where(CompetitionSession.competition_session_id == ranked.c.competition_session_id)
+        .values(
+            final_rank=ranked.c.final_rank,
+            grade_level=ranked.c.grade_level,
+            grade_rank=case((ranked.c.grade_level.isnot(None), ranked.c.grade_rank)),
+            accuracy=ranked.c.accuracy,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _finalized_stmt(competition_id: UUID):
+    return (
+        update(Competition)
+        .where(Competition.competition_id == competition_id)
+        .values(status=CompetitionStatus.ENDED, finalized_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def final_leaderboard_stmt(competition_id: UUID, limit: int, offset: int, grade_level: Optional[int] = None):
+    """One page of a finalized leaderboard: a range scan on dense ranks, no OFFSET"""
+    rank = CompetitionSession.grade_rank if grade_level else CompetitionSession.final_rank
+    stmt = select(rank.label("rank"), *entry_columns()).where(
+        CompetitionSession.competition_id == competition_id,
+        rank > offset,
+        rank <= offset + limit,
+    )
+    if grade_level:
+        stmt = stmt.where(CompetitionSession.grade_level == grade_level)
+    return stmt.order_by(rank)
+
+
+def final_total_stmt(competition_id: UUID, grade_level: Optional[int] = None):
+    """Ranked students (overall or in a grade bracket); ranks are dense so this is max(rank)"""
+    rank = CompetitionSession.grade_rank if grade_level else CompetitionSession.final_rank
+    stmt = select(func.coalesce(func.max(rank), 0)).where(CompetitionSession.competition_id == competition_id)
+    if grade_level:
+        stmt = stmt.where(CompetitionSession.grade_level == grade_level)
+    return stmt
+
+
+def final_position_stmt(competition_id: UUID, student_id: UUID, grade_level: Optional[int] = None):
+    """A student's ranked (best) session"""
+    rank = CompetitionSession.grade_rank if grade_level else CompetitionSession.final_rank
+    stmt = select(rank.label("rank"), *entry_columns()).where(
+        CompetitionSession.competition_id == competition_id,
+        CompetitionSession.student_id == student_id,
+        rank.isnot(None),
+    )
+    if grade_level:
+        stmt = stmt.where(CompetitionSession.grade_level == grade_level)
+    return stmt
+
+
+def final_statistics_stmt(competition_id: UUID):
+    """Aggregates over ranked (best) sessions, per grade bracket plus an overall row (grade_level NULL, is_total)"""
+    ranked = and_(CompetitionSession.competition_id == competition_id, CompetitionSession.final_rank.isnot(None))
+    return (
+        select(
+            CompetitionSession.grade_level,
+            func.grouping(CompetitionSession.grade_level).label("is_total"),
+            func.count().label("participants"),
+            func.round(func.avg(CompetitionSession.score), 2).label("average_score"),
+            func.max(CompetitionSession.score).label("highest_score"),
+            func.round(func.avg(CompetitionSession.accuracy), 2).label("average_accuracy"),
+            func.round(func.avg(CompetitionSession.completion_time)).label("average_completion_time"),
+        )
+        .where(ranked)
+        .group_by(func.rollup(CompetitionSession.grade_level))
+    )
+
+
+def final_attempts_stmt(competition_id: UUID):
+    """Sessions finished in a competition, ranked or not"""
+    return select(func.count()).where(
+        CompetitionSession.competition_id == competition_id,
+        or_(
+            CompetitionSession.status == CompetitionSessionStatus.COMPLETED,
+            CompetitionSession.status == CompetitionSessionStatus.EXPIRED,
+        ),
+    )
+
+
+class CompetitionFinalizer:
+    """Periodic finalization of ended competitions (see module docstring)"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.finalized = 0
+        self.sessions_closed = 0
+        self.sessions_ranked = 0
+        self.errors = 0
+        self.last_run_at: Optional[datetime] = None
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.finalize_due()
+            except Exception:
+                self._count("errors")
+                logger.exception("Competition finalization failed")
+            await asyncio.sleep(settings.COMPETITION_FINALIZE_INTERVAL_SECONDS)
+
+    async def finalize_due(self) -> List[UUID]:
+        """Finalize every competition that is due, one transaction each"""
+        finalized = []
+        while True:
+            competition_id = await self.finalize_next()
+            if competition_id is None:
+                break
+            finalized.append(competition_id)
+        self.last_run_at = datetime.now(timezone.utc)
+        return finalized
+
+    async def finalize_next(self) -> Optional[UUID]:
+        """Finalize the oldest due competition not locked by another worker"""
+        async with AsyncSessionLocal() as db:
+            due = (await db.execute(_due_competition_stmt())).first()
+            if due is None:
+                return None
+            await db.execute(_close_quiz_sessions_stmt(due.competition_id, due.end_date))
+            closed = (await db.execute(_close_competition_sessions_stmt(due.competition_id, due.end_date))).rowcount
+            ranked = (await db.execute(_rank_sessions_stmt(due.competition_id, due.subject_id))).rowcount
+            await db.execute(_finalized_stmt(due.competition_id))
+            await db.commit()
+        # Reads of a finalized competition come from the final ranks
+        leaderboard_engine.evict(due.competition_id)
+        self._count("finalized")
+        self._count("sessions_closed", closed)
+        self._count("sessions_ranked", ranked)
+        logger.info("Finalized competition %s: %s sessions ranked", due.competition_id, ranked)
+        return due.competition_id
+
+    def stats(self) -> Dict[str, Any]:
+        """Finalization counters for this worker"""
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "finalized": self.finalized,
+                "sessions_closed": self.sessions_closed,
+                "sessions_ranked": self.sessions_ranked,
+                "errors": self.errors,
+                "last_run_at": self.last_run_at,
+                "cache": final_results_cache.stats(),
+            }
+
+
+competition_finalizer = CompetitionFinalizer()
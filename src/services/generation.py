@@ -0,0 +1,162 @@
+"""
+AI content generation for questions, hints and narratives
+
+Builds provider prompts, calls the shared AIClient and parses its responses.
+Provider failures (after AIClient retries) surface as ServiceUnavailableError.
+Responses go through the AI response cache; pass use_cache=False to bypass it.
+"""
+from typing import Optional, Dict, Any, List
+from uuid import uuid4
+import asyncio
+import json
+import random
+
+from src.core.ai import get_ai_client, parse_json_response, AIProviderError
+from src.core.config import settings
+from src.core.exceptions import ServiceUnavailableError
+
+SYSTEM_PROMPT = (
+    "You are an experienced tutor writing study material for school students. "
+    "Be accurate, age-appropriate and concise."
+)
+
+
+def _question_prompt(
+    subject_name: str,
+    grade_level: Optional[int],
+    difficulty: str,
+    topic: Optional[str],
+    question_type: str,
+    variant: str,
+) -> str:
+    lines = [
+        f"Write one {difficulty} {question_type.replace('_', ' ')} question for the subject {subject_name}.",
+        f"Grade level: {grade_level}" if grade_level else "Grade level: any",
+        f"Topic: {topic}" if topic else "Topic: any topic in the subject",
+        f"Variation seed: {variant}",
+        "Respond with JSON only, using the keys question_text, options (a list, or null unless the "
+        "question is multiple choice), correct_answer (an object with an \"answer\" key) and explanation.",
+    ]
+    return "\n".join(lines)
+
+
+def _parse_question(text: str, model_version: str) -> Dict[str, Any]:
+    data = parse_json_response(text)
+    if not isinstance(data, dict) or not data.get("question_text") or "correct_answer" not in data:
+        raise AIProviderError("Provider returned an incomplete question")
+    correct_answer = data["correct_answer"]
+    if not isinstance(correct_answer, dict):
+        correct_answer = {"answer": correct_answer}
+    return {
+        "question_text": data["question_text"],
+        "options": data.get("options"),
+        "correct_answer": correct_answer,
+        "explanation": data.get("explanation"),
+        "ai_model_version": model_version,
+    }
+
+
+def _validate_question(text: str) -> None:
+    _parse_question(text, "")
+
+
+async def generate_question_contents(
+    subject_name: str,
+    grade_level: Optional[int],
+    difficulty: str,
+    topic: Optional[str],
+    question_type: str,
+    count: int,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Generate count distinct questions concurrently (bounded by the client's semaphore).
+    Cacheable prompts draw distinct variant numbers from a fixed pool so that repeated
+    requests hit the cache; uncached prompts get a random seed for fresh questions.
+    """
+    if count <= 0:
+        return []
+    client = get_ai_client()
+    if use_cache:
+        variants = [str(n) for n in random.sample(range(1, max(settings.AI_CACHE_QUESTION_VARIANTS, count) + 1), count)]
+    else:
+        variants = [uuid4().hex[:8] for _ in range(count)]
+    prompts = [
+        _question_prompt(subject_name, grade_level, difficulty, topic, question_type, variant)
+        for variant in variants
+    ]
+    try:
+        responses = await asyncio.gather(*(
+            client.complete("question", prompt, SYSTEM_PROMPT, use_cache=use_cache, validate=_validate_question)
+            for prompt in prompts
+        ))
+        return [_parse_question(response.text, response.model_version) for response in responses]
+    except AIProviderError as exc:
+        raise ServiceUnavailableError(f"Question generation failed: {exc}") from exc
+
+
+def _is_text_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _parse_narrative(text: str) -> Dict[str, Any]:
+    """Narrative and explanation, checked against the shape QuestionNarrativeResponse requires"""
+    data = parse_json_response(text)
+    if not isinstance(data, dict) or not data.get("narrative") or not isinstance(data["narrative"], str):
+        raise AIProviderError("Provider returned an incomplete narrative")
+    explanation = data.get("explanation")
+    if explanation is not None and not (
+        isinstance(explanation, dict)
+        and isinstance(explanation.get("concept"), str)
+        and _is_text_list(explanation.get("steps"))
+        and isinstance(explanation.get("why_correct"), str)
+        and all(explanation.get(key) is None or _is_text_list(explanation[key]) for key in ("common_mistakes", "related_concepts"))
+    ):
+        raise AIProviderError("Provider returned an incomplete narrative explanation")
+    return {"narrative": data["narrative"], "explanation": explanation}
+
+
+def _validate_hint(text: str) -> None:
+    if not text.strip():
+        raise AIProviderError("Provider returned an empty hint")
+
+
+async def generate_hint_text(
+    question_text: str,
+    question_type: str,
+    hint_level: int,
+    previous_attempts: Optional[List[Any]] = None,
+    use_cache: bool = True,
+) -> str:
+    """Generate a hint; level 1 is a gentle nudge, level 4 nearly walks through the solution"""
+    prompt = "\n".join([
+        f"Question ({question_type.replace('_', ' ')}): {question_text}",
+        f"Previous attempts: {json.dumps(previous_attempts, default=str)}" if previous_attempts else "Previous attempts: none",
+        f"Write hint level {hint_level} of 4 (1 = gentle nudge, 4 = outline of the solution steps).",
+        "Do not reveal the final answer. Respond with the hint text only.",
+    ])
+    try:
+        response = await get_ai_client().complete(
+            "hint", prompt, SYSTEM_PROMPT, temperature=0.3, use_cache=use_cache, validate=_validate_hint
+        )
+    except AIProviderError as exc:
+        raise ServiceUnavailableError(f"Hint generation failed: {exc}") from exc
+    return response.text.strip()
+
+
+async def generate_narrative(question_text: str, correct_answer: Any, use_cache: bool = True) -> Dict[str, Any]:
+    """Generate an educational narrative and structured explanation for a question"""
+    prompt = "\n".join([
+        f"Question: {question_text}",
+        f"Correct answer: {json.dumps(correct_answer, default=str)}",
+        "Explain this question to a student. Respond with JSON only, using the keys narrative (a short "
+        "story-style explanation) and explanation (an object with concept, steps (list), why_correct, "
+        "common_mistakes (list) and related_concepts (list)).",
+    ])
+    try:
+        response = await get_ai_client().complete(
+            "narrative", prompt, SYSTEM_PROMPT, temperature=0.3, use_cache=use_cache, validate=_parse_narrative
+        )
+        return _parse_narrative(response.text)
+    except AIProviderError as exc:
+        raise ServiceUnavailableError(f"Narrative generation failed: {exc}") from exc
@@ -7,6 +7,7 @@ from uuid import UUID, uuid4
 
 from src.models.database import Hint, Question
 from src.core.exceptions import NotFoundError, BadRequestError
+from src.services.generation import generate_hint_text
 
 
 class HintService:
@@ -15,7 +16,7 @@ class HintService:
     def __init__(self, db: Session):
         self.db = db
     
-    def get_hint(
+    async def get_hint(
         self,
         question_id: UUID,
         tenant_id: UUID,
@@ -25,8 +26,7 @@ class HintService:
         hints_already_shown: Optional[List[UUID]] = None,
     ) -> Dict[str, Any]:
         """
-        Get hint for a question
-        TODO: Integrate with AI service to generate contextual hints
+        Get hint for a question (generated with AI the first time a level is requested)
         """
         # Get question
         question = self.db.query(Question).filter(
@@ -63,19 +63,29 @@ class HintService:
         if existing_hint:
             hint = existing_hint
         else:
-            # Generate new hint using AI
-            # TODO: Integrate with AI service
-            hint_text = self._generate_hint_text(question, hint_level, previous_attempts)
+            # Generate new hint using AI, with the read transaction ended so no pooled
+            # connection is held for the provider call; the insert is a new short transaction
+            question_text = question.question_text
+            question_type = getattr(question.question_type, "value", question.question_type)
+            self.db.rollback()
+            hint_text = await generate_hint_text(question_text, question_type, hint_level, previous_attempts)
             
-            hint = Hint(
-                tenant_id=tenant_id,
-                question_id=question_id,
-                hint_level=hint_level,
-                hint_text=hint_text,
-            )
-            self.db.add(hint)
-            self.db.commit()
-            self.db.refresh(hint)
+            # Another request may have stored this level while the provider ran
+            hint = self.db.query(Hint).filter(
+                Hint.question_id == question_id,
+                Hint.tenant_id == tenant_id,
+                Hint.hint_level == hint_level,
+            ).first()
+            if hint is None:
+                hint = Hint(
+                    tenant_id=tenant_id,
+                    question_id=question_id,
+                    hint_level=hint_level,
+                    hint_text=hint_text,
+                )
+                self.db.add(hint)
+                self.db.commit()
+                self.db.refresh(hint)
         
         # Calculate remaining hints
         remaining_hints = 4 - hint_level
@@ -86,24 +96,3 @@ class HintService:
             "hint_text": hint.hint_text,
             "remaining_hints": remaining_hints,
         }
-    
-    def _generate_hint_text(
-        self,
-        question: Question,
-        hint_level: int,
-        previous_attempts: Optional[List[Any]],
-    ) -> str:
-        """
-        Generate hint text using AI
-        TODO: Integrate with AI service
-        """
-        # Placeholder implementation
-        hint_texts = {
-            1: "Consider the key concepts related to this topic.",
-            2: "Think about the fundamental principles that apply here.",
-            3: "Focus on the specific approach needed to solve this.",
-            4: "The solution involves applying the following steps...",
-        }
-        
-        return hint_texts.get(hint_level, "Hint not available")
-
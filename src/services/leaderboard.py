@@ -0,0 +1,360 @@
+"""
+Competition leaderboards
+
+Each worker keeps the ranking of a competition's completed sessions in memory
+(an IndexableSkipList ordered by score desc, accuracy desc, completion time asc),
+so top-N, a page, or one student's rank is O(log n) instead of sorting every
+session on every poll.
+
+- A student is ranked by their best completed session.
+- Each grade bracket (the student's grade level in the competition subject, as in
+  final grade ranks) has its own ranking, so grade pages and ranks are O(log n) too.
+- Sessions completed in this worker (last answer submitted, or auto-submitted at
+  expiry) are added as soon as they commit.
+- A board is loaded from the database on first use (and at startup for active
+  competitions). On read, it picks up sessions completed by other workers once
+  LEADERBOARD_SYNC_SECONDS have passed. Each sync re-reads sessions completed in
+  the last LEADERBOARD_SYNC_OVERLAP_SECONDS, because expiry backdates completed_at
+  to the deadline.
+"""
+from sqlalchemy import select, update, func, case, cast, literal, Integer
+from sqlalchemy.orm import Session
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict, deque
+import asyncio
+import logging
+import math
+import threading
+import time
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.core.skiplist import IndexableSkipList
+from src.models.database import Competition, CompetitionSession, QuizSession, StudentSubjectProfile, UserAccount
+from src.models.user import CompetitionSessionStatus, CompetitionStatus
+
+logger = logging.getLogger(__name__)
+
+# Upserts remembered per board for change feeds (leaderboard streams)
+CHANGELOG_SIZE = 1000
+
+
+def competition_result_values(finished_at) -> Dict[str, Any]:
+    """Competition session columns taken from its quiz session (UPDATE ... FROM quiz_sessions)"""
+    return {
+        "completed_at": finished_at,
+        "score": QuizSession.score,
+        "max_score": QuizSession.max_score,
+        "questions_answered": QuizSession.questions_answered,
+        "accuracy": case(
+            (QuizSession.max_score > 0, func.round(QuizSession.score * 100 / QuizSession.max_score, 2)),
+            else_=0,
+        ),
+        "completion_time": cast(func.extract("epoch", finished_at - CompetitionSession.started_at), Integer),
+    }
+
+
+def entry_columns() -> List[Any]:
+    """Columns of a leaderboard entry, usable in a SELECT or RETURNING over competition_sessions"""
+    student_name = (
+        select(func.coalesce(UserAccount.name, UserAccount.username))
+        .where(UserAccount.user_id == CompetitionSession.student_id)
+        .scalar_subquery()
+    )
+    # Set when the competition is finalized; until then the student's grade in its subject
+    profile_grade = (
+        select(func.max(StudentSubjectProfile.grade_level))
+        .where(
+            StudentSubjectProfile.user_id == CompetitionSession.student_id,
+            StudentSubjectProfile.subject_id == Competition.subject_id,
+            Competition.competition_id == CompetitionSession.competition_id,
+        )
+        .scalar_subquery()
+    )
+    return [
+        CompetitionSession.competition_id,
+        CompetitionSession.student_id,
+        student_name.label("student_name"),
+        func.coalesce(CompetitionSession.grade_level, profile_grade).label("grade_level"),
+        CompetitionSession.score,
+        CompetitionSession.max_score,
+        CompetitionSession.accuracy,
+        CompetitionSession.completion_time,
+        CompetitionSession.questions_answered,
+        CompetitionSession.completed_at,
+        CompetitionSession.status,
+    ]
+
+
+def complete_competition_session_stmt(session_id: UUID):
+    """Complete the open competition session wrapping a just-completed quiz session"""
+    return (
+        update(CompetitionSession)
+        .where(
+            CompetitionSession.session_id == QuizSession.session_id,
+            CompetitionSession.session_id == session_id,
+            CompetitionSession.status == CompetitionSessionStatus.IN_PROGRESS,
+        )
+        .values(
+            status=literal(CompetitionSessionStatus.COMPLETED, CompetitionSession.status.type),
+            **competition_result_values(func.coalesce(QuizSession.completed_at, func.now())),
+        )
+        .returning(*entry_columns())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def leaderboard_entry(row: Any) -> Dict[str, Any]:
+    """Leaderboard entry (without rank) from an entry_columns() row"""
+    return {
+        "competition_id": row["competition_id"],
+        "student_id": str(row["student_id"]),
+        "student_name": row["student_name"] or "Unknown",
+        "score": float(row["score"] or 0),
+        "max_score": float(row["max_score"] or 0),
+        "accuracy": float(row["accuracy"]) if row["accuracy"] else 0.0,
+        "completion_time": row["completion_time"],
+        "questions_answered": row["questions_answered"],
+        "completed_at": row["completed_at"],
+        "grade_level": row["grade_level"],
+    }
+
+
+def ranking_key(entry: Dict[str, Any]) -> Tuple:
+    """Sort key: score desc, accuracy desc, completion time asc, then earliest completion"""
+    completed_at = entry["completed_at"]
+    if completed_at is not None and completed_at.tzinfo is None:
+        completed_at = completed_at.replace(tzinfo=timezone.utc)
+    return (
+        -entry["score"],
+        -entry["accuracy"],
+        entry["completion_time"] if entry["completion_time"] is not None else math.inf,
+        completed_at.timestamp() if completed_at is not None else math.inf,
+        entry["student_id"],
+    )
+
+
+class Leaderboard:
+    """Ranking of one competition: best completed session per student"""
+
+    def __init__(self, competition_id: UUID):
+        self.competition_id = competition_id
+        self.ranking = IndexableSkipList()
+        self._keys: Dict[str, Tuple] = {}
+        self._grades: Dict[int, IndexableSkipList] = {}  # Ranking per grade bracket
+        self._student_grades: Dict[str, Optional[int]] = {}
+        self.lock = threading.Lock()
+        self.synced_at: Optional[datetime] = None  # Database time covered by the last load/sync
+        self.checked_at = 0.0  # time.monotonic() of the last load/sync
+        self.last_updated = datetime.utcnow()
+        self.version = 0  # Bumped by every upsert that changes the ranking
+        self._changes: "deque[Tuple[int, str]]" = deque(maxlen=CHANGELOG_SIZE)
+
+    def __len__(self) -> int:
+        return len(self.ranking)
+
+    def upsert(self, entry: Dict[str, Any]) -> bool:
+        """Add a completed session; returns False if the student already ranks higher"""
+        key = ranking_key(entry)
+        with self.lock:
+            current = self._keys.get(entry["student_id"])
+            if current is not None:
+                if current <= key:
+                    return False
+                self.ranking.remove(current)
+                grade = self._student_grades[entry["student_id"]]
+                if grade is not None:
+                    self._grades[grade].remove(current)
+            self.ranking.insert(key, entry)
+            self._keys[entry["student_id"]] = key
+            grade = entry["grade_level"]
+            if grade is not None:
+                self._grades.setdefault(grade, IndexableSkipList()).insert(key, entry)
+            self._student_grades[entry["student_id"]] = grade
+            self.last_updated = datetime.utcnow()
+            self.version += 1
+            self._changes.append((self.version, entry["student_id"]))
+            return True
+
+    def _ranking(self, grade_level: Optional[int]) -> IndexableSkipList:
+        if grade_level is None:
+            return self.ranking
+        return self._grades.get(grade_level) or IndexableSkipList()
+
+    def _page(self, offset: int, limit: int, grade_level: Optional[int] = None) -> List[Dict[str, Any]]:
+        ranking = self._ranking(grade_level)
+        return [
+            {"rank": rank, **entry}
+            for rank, (_, entry) in enumerate(ranking.islice(offset, offset + limit), start=offset + 1)
+        ]
+
+    def _position(self, student_id: str, grade_level: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        key = self._keys.get(student_id)
+        if key is None or (grade_level is not None and self._student_grades[student_id] != grade_level):
+            return None
+        ranking = self._ranking(grade_level)
+        index = ranking.rank(key)
+        return {"rank": index + 1, **ranking[index][1]}
+
+    def total(self, grade_level: Optional[int] = None) -> int:
+        """Ranked students, overall or in a grade bracket"""
+        with self.lock:
+            return len(self._ranking(grade_level))
+
+    def page(self, offset: int = 0, limit: int = 100, grade_level: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries at ranks offset + 1 .. offset + limit, overall or in a grade bracket"""
+        with self.lock:
+            return self._page(offset, limit, grade_level)
+
+    def position(self, student_id: str, grade_level: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        A student's entry with its rank (overall or in grade_level's bracket), or None if
+        they have no completed session or are in another bracket
+        """
+        with self.lock:
+            return self._position(student_id, grade_level)
+
+    def feed(self, version: int, top_n: int) -> Dict[str, Any]:
+        """
+        Consistent view for change feeds: current version, total and top_n entries, plus
+        the ranked entries of students changed after version (changed is None once the
+        changelog no longer reaches back that far)
+        """
+        with self.lock:
+            changed = None
+            if version >= self.version - len(self._changes):
+                students = dict.fromkeys(student_id for changed_in, student_id in self._changes if changed_in > version)
+                changed = [self._position(student_id) for student_id in students]
+            return {
+                "version": self.version,
+                "total": len(self.ranking),
+                "last_updated": self.last_updated,
+                "top": self._page(0, top_n),
+                "changed": changed,
+            }
+
+
+class LeaderboardEngine:
+    """In-memory leaderboards of recently used competitions (see module docstring); one per worker"""
+
+    def __init__(self):
+        self._boards: "OrderedDict[UUID, Leaderboard]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.syncs = 0
+        self.recorded = 0
+        self.evicted = 0
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    @staticmethod
+    def _completed_stmt(competition_ids: Iterable[UUID], since: Optional[datetime] = None):
+        stmt = select(*entry_columns()).where(
+            CompetitionSession.competition_id.in_(list(competition_ids)),
+            CompetitionSession.status == CompetitionSessionStatus.COMPLETED,
+        )
+        if since is not None:
+            stmt = stmt.where(CompetitionSession.completed_at >= since)
+        return stmt
+
+    def _store(self, board: Leaderboard) -> None:
+        with self._lock:
+            self._boards[board.competition_id] = board
+            self._boards.move_to_end(board.competition_id)
+            while len(self._boards) > settings.LEADERBOARD_MAX_COMPETITIONS:
+                self._boards.popitem(last=False)
+                self.evicted += 1
+
+    def load(self, db: Session, competition_ids: Iterable[UUID]) -> Dict[UUID, Leaderboard]:
+        """(Re)build the boards of competition_ids from the database with one query"""
+        boards = {competition_id: Leaderboard(competition_id) for competition_id in competition_ids}
+        if not boards:
+            return boards
+        started_at = datetime.now(timezone.utc)
+        for row in db.execute(self._completed_stmt(boards)).mappings():
+            boards[row["competition_id"]].upsert(leaderboard_entry(row))
+        checked_at = time.monotonic()
+        for board in boards.values():
+            board.synced_at = started_at
+            board.checked_at = checked_at
+            self._store(board)
+        self._count("loads", len(boards))
+        return boards
+
+    def load_active(self, db: Session) -> int:
+        """Build the boards of every active competition (startup)"""
+        competition_ids = db.execute(
+            select(Competition.competition_id).where(Competition.status == CompetitionStatus.ACTIVE)
+        ).scalars().all()
+        return len(self.load(db, competition_ids))
+
+    async def preload(self) -> int:
+        """Load active competitions at startup; on failure boards load on first read"""
+        def load() -> int:
+            with SessionLocal() as db:
+                return self.load_active(db)
+        try:
+            return await asyncio.to_thread(load)
+        except Exception:
+            logger.exception("Leaderboard preload failed")
+            return 0
+
+    def _sync(self, db: Session, board: Leaderboard) -> None:
+        """Pick up sessions completed by other workers since the last sync"""
+        started_at = datetime.now(timezone.utc)
+        since = board.synced_at - timedelta(seconds=settings.LEADERBOARD_SYNC_OVERLAP_SECONDS)
+        for row in db.execute(self._completed_stmt([board.competition_id], since)).mappings():
+            board.upsert(leaderboard_entry(row))
+        board.synced_at = started_at
+        board.checked_at = time.monotonic()
+        self._count("syncs")
+
+    def board(self, db: Session, competition_id: UUID) -> Leaderboard:
+        """The competition's board, loaded or synced from the database as needed"""
+        with self._lock:
+            board = self._boards.get(competition_id)
+            if board is not None:
+                self._boards.move_to_end(competition_id)
+        if board is None:
+            return self.load(db, [competition_id])[competition_id]
+        if time.monotonic() - board.checked_at >= settings.LEADERBOARD_SYNC_SECONDS:
+            self._sync(db, board)
+        return board
+
+    def record(self, rows: Iterable[Any]) -> int:
+        """Add committed completed sessions (entry_columns() rows) to loaded boards"""
+        recorded = 0
+        for row in rows:
+            if row["status"] != CompetitionSessionStatus.COMPLETED:
+                continue
+            with self._lock:
+                board = self._boards.get(row["competition_id"])
+            # Boards not loaded here will read the session from the database
+            if board is not None and board.upsert(leaderboard_entry(row)):
+                recorded += 1
+        self._count("recorded", recorded)
+        return recorded
+
+    def evict(self, competition_id: UUID) -> None:
+        """Drop a board so the next read rebuilds it from the database"""
+        with self._lock:
+            self._boards.pop(competition_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Leaderboard counters for this worker"""
+        with self._lock:
+            return {
+                "competitions": len(self._boards),
+                "entries": sum(len(board) for board in self._boards.values()),
+                "loads": self.loads,
+                "syncs": self.syncs,
+                "recorded": self.recorded,
+                "evicted": self.evicted,
+            }
+
+
+leaderboard_engine = LeaderboardEngine()
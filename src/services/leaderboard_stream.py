@@ -0,0 +1,193 @@
+"""
+Leaderboard streams
+
+Live competition leaderboards pushed to clients as Server-Sent Events. A worker
+runs one LeaderboardChannel per watched competition, however many clients
+subscribe. Every LEADERBOARD_STREAM_TICK_SECONDS the channel reads the in-memory
+board once (leaderboard_engine), and if it changed, serializes one event that is
+fanned out to every subscriber.
+
+Events (data is JSON):
+- snapshot: version, total_participants and the top LEADERBOARD_STREAM_TOP_N.
+  Sent on subscribe, when the board was reloaded or changed too much to replay,
+  and to subscribers that fell behind.
+- delta: version, total_participants, and moved: the students whose entry changed
+  since the last event, with rank and previous_rank (None if this channel has not
+  reported them before). It also carries top when the top N changed.
+A comment line is sent after LEADERBOARD_STREAM_KEEPALIVE_SECONDS without events.
+"""
+from typing import Optional, Dict, Any, List, Set, AsyncIterator
+from uuid import UUID
+from datetime import datetime
+from decimal import Decimal
+import asyncio
+import json
+import logging
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.services.leaderboard import Leaderboard, leaderboard_engine
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber before it is reset to the latest snapshot
+STREAM_QUEUE_SIZE = 32
+
+KEEPALIVE = ": keepalive\n\n"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+
+class LeaderboardChannel:
+    """Shared tick loop and subscribers of one competition's stream"""
+
+    def __init__(self, competition_id: UUID):
+        self.competition_id = competition_id
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.snapshot: Optional[str] = None  # Latest snapshot event, for new or lagging subscribers
+        self.events = 0
+        self._board: Optional[Leaderboard] = None
+        self._version = 0
+        self._top: List[Dict[str, Any]] = []
+        self._ranks: Dict[str, int] = {}  # Last rank reported per student
+        self._task: Optional[asyncio.Task] = None
+
+    def _compute(self) -> Optional[str]:
+        """The next event, or None if the board has not changed (runs in a thread)"""
+        with SessionLocal() as db:
+            board = leaderboard_engine.board(db, self.competition_id)
+        reloaded = board is not self._board
+        feed = board.feed(self._version, settings.LEADERBOARD_STREAM_TOP_N)
+        if not reloaded and feed["version"] == self._version:
+            return None
+        self._board = board
+        self._version = feed["version"]
+        top = feed["top"]
+        self.snapshot = sse_event("snapshot", {
+            "competition_id": self.competition_id,
+            "version": feed["version"],
+            "last_updated": feed["last_updated"],
+            "total_participants": feed["total"],
+            "top": top,
+        })
+        if reloaded or feed["changed"] is None:
+            event = self.snapshot
+            self._ranks = {}
+        else:
+            delta = {
+                "competition_id": self.competition_id,
+                "version": feed["version"],
+                "last_updated": feed["last_updated"],
+                "total_participants": feed["total"],
+                "moved": [
+                    {**entry, "previous_rank": self._ranks.get(entry["student_id"])}
+                    for entry in feed["changed"] if entry
+                ],
+            }
+            if top != self._top:
+                delta["top"] = top
+            event = sse_event("delta", delta)
+            for entry in delta["moved"]:
+                self._ranks[entry["student_id"]] = entry["rank"]
+        for entry in top:
+            self._ranks[entry["student_id"]] = entry["rank"]
+        self._top = top
+        return event
+
+    def _publish(self, event: str) -> None:
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind for deltas to make sense: start over from the snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot or event)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_sent = loop.time()
+        while True:
+            try:
+                event = await asyncio.to_thread(self._compute)
+            except Exception:
+                logger.exception("Leaderboard stream update failed for %s", self.competition_id)
+                event = None
+            if event:
+                self._publish(event)
+                self.events += 1
+                last_sent = loop.time()
+            elif loop.time() - last_sent >= settings.LEADERBOARD_STREAM_KEEPALIVE_SECONDS:
+                self._publish(KEEPALIVE)
+                last_sent = loop.time()
+            await asyncio.sleep(settings.LEADERBOARD_STREAM_TICK_SECONDS)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        if self.snapshot:
+            queue.put_nowait(self.snapshot)
+        self.subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+class LeaderboardStreams:
+    """Leaderboard channels of this worker, one per competition with subscribers"""
+
+    def __init__(self):
+        # Only touched from the event loop, so no lock
+        self._channels: Dict[UUID, LeaderboardChannel] = {}
+        self.subscriptions = 0
+
+    async def stream(self, competition_id: UUID) -> AsyncIterator[str]:
+        """Server-Sent Events for one subscriber until it disconnects"""
+        channel = self._channels.get(competition_id)
+        if channel is None:
+            channel = self._channels[competition_id] = LeaderboardChannel(competition_id)
+        queue = channel.subscribe()
+        self.subscriptions += 1
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            channel.unsubscribe(queue)
+            if not channel.subscribers:
+                channel.stop()
+                self._channels.pop(competition_id, None)
+
+    async def stop(self) -> None:
+        for channel in self._channels.values():
+            channel.stop()
+        self._channels.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Stream counters for this worker"""
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(channel.subscribers) for channel in self._channels.values()),
+            "subscriptions": self.subscriptions,
+            "events": sum(channel.events for channel in self._channels.values()),
+        }
+
+
+leaderboard_streams = LeaderboardStreams()
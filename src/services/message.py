@@ -2,7 +2,8 @@
 Message service - updated for new model structure
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Any, List
 from uuid import UUID, uuid4
 from datetime import datetime
@@ -160,19 +161,7 @@ class MessageService:
         for msg in messages:
             sender = self._get_user_info(msg.sender_id, msg.sender_role.value)
             recipient = self._get_user_info(msg.recipient_id, msg.recipient_role.value)
-            
-            result.append({
-                "message_id": str(msg.message_id),
-                "sender_id": str(msg.sender_id),
-                "sender_name": sender.get("name", "Unknown"),
-                "sender_role": msg.sender_role.value,
-                "recipient_id": str(msg.recipient_id),
-                "recipient_name": recipient.get("name", "Unknown"),
-                "content": msg.content,
-                "status": msg.status.value,
-                "read_at": msg.read_at,
-                "created_at": msg.created_at,
-            })
+            result.append(self._message_payload(msg, sender, recipient))
         
         unread_count = self.db.query(Message).filter(
             and_(
@@ -306,10 +295,30 @@ class MessageService:
         hash_obj = hashlib.md5(f"{ids[0]}_{ids[1]}".encode())
         return UUID(hash_obj.hexdigest())
     
+    @staticmethod
+    def _message_payload(msg: Message, sender: Dict[str, Any], recipient: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a message list entry"""
+        return {
+            "message_id": str(msg.message_id),
+            "sender_id": str(msg.sender_id),
+            "sender_name": sender.get("name", "Unknown"),
+            "sender_role": msg.sender_role.value,
+            "recipient_id": str(msg.recipient_id),
+            "recipient_name": recipient.get("name", "Unknown"),
+            "content": msg.content,
+            "status": msg.status.value,
+            "read_at": msg.read_at,
+            "created_at": msg.created_at,
+        }
+    
     def _get_user_info(self, user_id: UUID, role: Optional[str]) -> Dict[str, Any]:
         """Get user information"""
         user = self.db.query(UserAccount).filter(UserAccount.user_id == user_id).first()
-        
+        return self._describe_user(user, role)
+    
+    @staticmethod
+    def _describe_user(user: Optional[UserAccount], role: Optional[str]) -> Dict[str, Any]:
+        """Name/role summary for a user row"""
         if not user:
             return {"name": "Unknown", "role": role or "unknown"}
         
@@ -321,3 +330,73 @@ class MessageService:
             return {"name": user.name or user.username, "role": "tenant_admin"}
         else:
             return {"name": user.name or user.username, "role": role or "unknown"}
+
+
+class AsyncMessageService:
+    """Message service for AsyncSession (read paths used by async endpoints)"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_messages(
+        self,
+        tenant_id: UUID,
+        user_id: UUID,
+        conversation_with: Optional[UUID] = None,
+        unread_only: bool = False,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """Get messages for a user"""
+        stmt = select(Message).where(
+            Message.tenant_id == tenant_id,
+            Message.deleted_at.is_(None),
+            or_(
+                Message.sender_id == user_id,
+                Message.recipient_id == user_id
+            ),
+        )
+        
+        if conversation_with:
+            stmt = stmt.where(
+                or_(
+                    Message.sender_id == conversation_with,
+                    Message.recipient_id == conversation_with
+                )
+            )
+        
+        if unread_only:
+            stmt = stmt.where(Message.read_at.is_(None))
+        
+        stmt = stmt.order_by(Message.created_at.desc()).limit(limit).offset(offset)
+        messages = (await self.db.execute(stmt)).scalars().all()
+        
+        # Resolve all senders/recipients in one query
+        participant_ids = {msg.sender_id for msg in messages} | {msg.recipient_id for msg in messages}
+        users = {}
+        if participant_ids:
+            rows = (await self.db.execute(
+                select(UserAccount).where(UserAccount.user_id.in_(participant_ids))
+            )).scalars().all()
+            users = {user.user_id: user for user in rows}
+        
+        result = []
+        for msg in messages:
+            sender = MessageService._describe_user(users.get(msg.sender_id), msg.sender_role.value)
+            recipient = MessageService._describe_user(users.get(msg.recipient_id), msg.recipient_role.value)
+            result.append(MessageService._message_payload(msg, sender, recipient))
+        
+        unread_count = (await self.db.execute(
+            select(func.count(Message.message_id)).where(
+                Message.tenant_id == tenant_id,
+                Message.recipient_id == user_id,
+                Message.read_at.is_(None),
+                Message.deleted_at.is_(None),
+            )
+        )).scalar() or 0
+        
+        return {
+            "messages": result,
+            "total": len(result),
+            "unread_count": unread_count,
+        }
@@ -1,15 +1,110 @@
 """
 Progress service - updated for new model structure
+
+StudentProgress.subject_stats holds running totals per subject_code, with the
+same totals per topic under "topics":
+
+    {"math": {"total_questions": 12, "correct_answers": 9, "score_sum": 8.1,
+              "max_score_sum": 12.0, "last_activity": "2026-10-17T12:00:00+00:00",
+              "topics": {"fractions": {...same keys...}}}}
+
+They are updated in the answer submission transaction (record_submissions), so a
+progress read is one row however many answers a student has. The same transaction
+adds to tutor.student_daily_progress (one row per student, subject, topic and UTC
+day), which serves time-range and trend queries.
+
+rebuild_progress and rebuild_daily_progress recompute both from answer_submissions
+(scripts/rebuild_student_progress.py).
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import Optional, Dict, Any
+from sqlalchemy import and_, func, select, delete, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Optional, Dict, Any, Iterable, List
 from uuid import UUID
+from datetime import datetime, date, timedelta, timezone
+import copy
 
+from src.core.config import settings
 from src.models.database import (
-    StudentProgress, AnswerSubmission, QuizSession, UserAccount
+    StudentProgress, StudentDailyProgress, AnswerSubmission, Question, QuizSession, UserAccount
 )
 from src.core.exceptions import NotFoundError
+from src.services.analytics import ProgressAnalytics
+
+_COUNTERS = ("total_questions", "correct_answers", "score_sum", "max_score_sum")
+
+
+def _timestamp(value: datetime) -> str:
+    """UTC ISO timestamp (naive datetimes are UTC); fixed format so strings compare in time order"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def add_totals(totals: Dict[str, Any], entry: Dict[str, Any]) -> None:
+    for counter in _COUNTERS:
+        totals[counter] = totals.get(counter, 0) + entry[counter]
+    if entry["last_activity"] > totals.get("last_activity", ""):
+        totals["last_activity"] = entry["last_activity"]
+
+
+def fold_submissions(subject_stats: Dict[str, Any], entries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Add entries to subject_stats in place. An entry is the totals for one or more
+    submissions: subject_code, topic (or None), the _COUNTERS and last_activity.
+    """
+    for entry in entries:
+        subject = subject_stats.setdefault(entry["subject_code"], {"topics": {}})
+        add_totals(subject, entry)
+        if entry["topic"]:
+            add_totals(subject.setdefault("topics", {}).setdefault(entry["topic"], {}), entry)
+    return subject_stats
+
+
+def submission_entry(question: Question, is_correct: bool, score: float, max_score: float, submitted_at: datetime) -> Dict[str, Any]:
+    """fold_submissions entry for one scored answer"""
+    return {
+        "subject_code": question.subject_code,
+        "topic": (question.extra_metadata or {}).get("topic"),
+        "total_questions": 1,
+        "correct_answers": 1 if is_correct else 0,
+        "score_sum": float(score),
+        "max_score_sum": float(max_score),
+        "last_activity": _timestamp(submitted_at),
+    }
+
+
+def daily_rows(tenant_id: UUID, student_id: UUID, entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """StudentDailyProgress rows for submission entries, merged per (subject, topic, day)"""
+    rows: Dict[tuple, Dict[str, Any]] = {}
+    for entry in entries:
+        key = (entry["subject_code"], entry["topic"] or "", date.fromisoformat(entry["last_activity"][:10]))
+        row = rows.get(key)
+        if row is None:
+            rows[key] = row = {
+                "student_id": student_id,
+                "tenant_id": tenant_id,
+                "subject_code": key[0],
+                "topic": key[1],
+                "day": key[2],
+                **{counter: 0 for counter in _COUNTERS},
+            }
+        for counter in _COUNTERS:
+            row[counter] += entry[counter]
+    return list(rows.values())
+
+
+def summarize_totals(totals: Dict[str, Any]) -> Dict[str, Any]:
+    """Response stats (accuracy, average score per answer) from running totals"""
+    total = totals.get("total_questions", 0)
+    correct = totals.get("correct_answers", 0)
+    return {
+        "total_questions": total,
+        "correct_answers": correct,
+        "accuracy": (correct / total * 100) if total > 0 else 0.0,
+        "average_score": (totals.get("score_sum", 0) / total) if total > 0 else 0.0,
+        "last_activity": totals.get("last_activity"),
+    }
 
 
 class ProgressService:
@@ -26,7 +121,7 @@ class ProgressService:
         grade_level: Optional[int] = None,
         time_range: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Get student progress"""
+        """Get student progress from the running totals (one progress row read)"""
         # Validate student
         student = self.db.query(UserAccount).filter(
             and_(
@@ -38,76 +133,294 @@ class ProgressService:
         if not student:
             raise NotFoundError("Student not found")
         
-        # Get or create progress record
         progress = self.db.query(StudentProgress).filter(
             and_(
-            StudentProgress.student_id == student_id,
+                StudentProgress.student_id == student_id,
                 StudentProgress.tenant_id == tenant_id
             )
         ).first()
+        subject_stats = (progress.subject_stats if progress else None) or {}
+        if subject:
+            subject_stats = {code: stats for code, stats in subject_stats.items() if code == subject}
         
-        if not progress:
-            progress = StudentProgress(
-                student_id=student_id,
-                tenant_id=tenant_id,
-                subject_stats={},
-            )
-            self.db.add(progress)
-            self.db.commit()
+        by_subject = {}
+        by_topic: Dict[str, Dict[str, Any]] = {}
+        overall: Dict[str, Any] = {}
+        for code, stats in subject_stats.items():
+            add_totals(overall, stats)
+            topics = stats.get("topics") or {}
+            by_subject[code] = {**summarize_totals(stats), "topics": {topic: summarize_totals(totals) for topic, totals in topics.items()}}
+            for topic, totals in topics.items():
+                add_totals(by_topic.setdefault(topic, {}), totals)
         
-        # Calculate overall stats from answer submissions
-        query = self.db.query(
-            func.count(AnswerSubmission.submission_id).label("total"),
-            func.sum(func.cast(AnswerSubmission.is_correct, func.Integer)).label("correct"),
-            func.avg(AnswerSubmission.score).label("avg_score"),
-        ).filter(
-            and_(
-            AnswerSubmission.student_id == student_id,
-                AnswerSubmission.tenant_id == tenant_id
-            )
-        )
+        overall_stats = summarize_totals(overall)
+        if time_range in ("last_week", "last_month"):
+            # Summed from the window's student_daily_progress rows
+            overall_stats = self._windowed_stats(student_id, tenant_id, time_range, subject)
         
-        # Apply filters
-        if time_range:
-            from datetime import datetime, timedelta
-            if time_range == "last_week":
-                cutoff = datetime.utcnow() - timedelta(days=7)
-                query = query.filter(AnswerSubmission.submitted_at >= cutoff)
-            elif time_range == "last_month":
-                cutoff = datetime.utcnow() - timedelta(days=30)
-                query = query.filter(AnswerSubmission.submitted_at >= cutoff)
-        
-        stats = query.first()
-        
-        total_questions = stats.total or 0
-        correct_answers = stats.correct or 0
-        accuracy = (correct_answers / total_questions * 100) if total_questions > 0 else 0.0
-        average_score = float(stats.avg_score or 0.0)
-        
-        # Get subject stats from progress record
-        subject_stats = progress.subject_stats or {}
-        
-        # Calculate trends (simplified)
-        weak_areas = []
-        strong_areas = []
+        trends = ProgressAnalytics.load(self.db, tenant_id, [student_id]).student_summaries().get(
+            str(student_id), {"improvement_rate": None, "weak_areas": [], "strong_areas": []}
+        )
         
         return {
             "student_id": str(student_id),
             "overall_stats": {
-                "total_questions": total_questions,
-                "correct_answers": correct_answers,
-                "accuracy": accuracy,
-                "average_score": average_score,
+                "total_questions": overall_stats["total_questions"],
+                "correct_answers": overall_stats["correct_answers"],
+                "accuracy": overall_stats["accuracy"],
+                "average_score": overall_stats["average_score"],
             },
-            "by_subject": subject_stats,
-            "by_topic": {},
+            "by_subject": by_subject,
+            "by_topic": {topic: summarize_totals(totals) for topic, totals in by_topic.items()},
             "trends": {
-                "improvement_rate": None,
-                "weak_areas": weak_areas,
-                "strong_areas": strong_areas,
+                "improvement_rate": trends["improvement_rate"],
+                "weak_areas": trends["weak_areas"],
+                "strong_areas": trends["strong_areas"],
             },
         }
     
+    @staticmethod
+    def _since(days: int) -> date:
+        """First UTC day of a window of days ending today"""
+        return datetime.utcnow().date() - timedelta(days=days - 1)
+    
+    def _windowed_stats(self, student_id: UUID, tenant_id: UUID, time_range: str, subject: Optional[str]) -> Dict[str, Any]:
+        """Overall stats over the last week or month from the daily rollups"""
+        days = 7 if time_range == "last_week" else 30
+        query = self.db.query(
+            func.coalesce(func.sum(StudentDailyProgress.total_questions), 0).label("total_questions"),
+            func.coalesce(func.sum(StudentDailyProgress.correct_answers), 0).label("correct_answers"),
+            func.coalesce(func.sum(StudentDailyProgress.score_sum), 0).label("score_sum"),
+        ).filter(
+            StudentDailyProgress.student_id == student_id,
+            StudentDailyProgress.tenant_id == tenant_id,
+            StudentDailyProgress.day >= self._since(days),
+        )
+        if subject:
+            query = query.filter(StudentDailyProgress.subject_code == subject)
+        stats = query.one()
+        return summarize_totals({
+            "total_questions": int(stats.total_questions),
+            "correct_answers": int(stats.correct_answers),
+            "score_sum": float(stats.score_sum),
+        })
+    
+    def get_daily_performance(self, student_id: UUID, tenant_id: UUID, days: int) -> List[Dict[str, Any]]:
+        """Per-day stats for the last days (days without answers are left out)"""
+        rows = self.db.query(
+            StudentDailyProgress.day,
+            func.sum(StudentDailyProgress.total_questions).label("total_questions"),
+            func.sum(StudentDailyProgress.correct_answers).label("correct_answers"),
+            func.sum(StudentDailyProgress.score_sum).label("score_sum"),
+        ).filter(
+            StudentDailyProgress.student_id == student_id,
+            StudentDailyProgress.tenant_id == tenant_id,
+            StudentDailyProgress.day >= self._since(days),
+        ).group_by(StudentDailyProgress.day).order_by(StudentDailyProgress.day).all()
+        series = []
+        for row in rows:
+            stats = summarize_totals({
+                "total_questions": int(row.total_questions),
+                "correct_answers": int(row.correct_answers),
+                "score_sum": float(row.score_sum),
+            })
+            stats.pop("last_activity")
+            series.append({"date": row.day.isoformat(), **stats})
+        return series
+    
+    def get_period_trends(self, student_id: UUID, tenant_id: UUID, days: int) -> Dict[str, Any]:
+        """
+        Accuracy over the last days against the days before that, overall and per
+        subject, from one grouped query over the daily rollups
+        """
+        current_start = self._since(days)
+        previous_start = current_start - timedelta(days=days)
+        current = StudentDailyProgress.day >= current_start
+        columns = []
+        for period, condition in (("current", current), ("previous", ~current)):
+            columns += [
+                func.coalesce(func.sum(StudentDailyProgress.total_questions).filter(condition), 0).label(f"{period}_total"),
+                func.coalesce(func.sum(StudentDailyProgress.correct_answers).filter(condition), 0).label(f"{period}_correct"),
+            ]
+        rows = self.db.query(StudentDailyProgress.subject_code, *columns).filter(
+            StudentDailyProgress.student_id == student_id,
+            StudentDailyProgress.tenant_id == tenant_id,
+            StudentDailyProgress.day >= previous_start,
+        ).group_by(StudentDailyProgress.subject_code).all()
+        
+        def trend(current_total, current_correct, previous_total, previous_correct) -> Dict[str, Any]:
+            current_accuracy = (current_correct / current_total * 100) if current_total else None
+            previous_accuracy = (previous_correct / previous_total * 100) if previous_total else None
+            return {
+                "current_questions": current_total,
+                "previous_questions": previous_total,
+                "current_accuracy": current_accuracy,
+                "previous_accuracy": previous_accuracy,
+                "accuracy_change": (
+                    current_accuracy - previous_accuracy
+                    if current_accuracy is not None and previous_accuracy is not None else None
+                ),
+            }
+        
+        totals = [0, 0, 0, 0]
+        by_subject = {}
+        for row in rows:
+            counts = [int(row.current_total), int(row.current_correct), int(row.previous_total), int(row.previous_correct)]
+            totals = [total + count for total, count in zip(totals, counts)]
+            by_subject[row.subject_code] = trend(*counts)
+        return {
+            "period_days": days,
+            "overall": trend(*totals),
+            "by_subject": by_subject,
+        }
+    
+    def record_submissions(self, tenant_id: UUID, student_id: UUID, entries: List[Dict[str, Any]]) -> None:
+        """
+        Add submission_entry totals to the student's progress row and daily rollups
+        without committing; call inside the submission transaction. The row is created on first use and
+        locked, so concurrent submissions by the same student do not lose updates.
+        """
+        if not entries:
+            return
+        self.db.execute(
+            pg_insert(StudentProgress)
+            .values(student_id=student_id, tenant_id=tenant_id, subject_stats={})
+            .on_conflict_do_nothing(index_elements=[StudentProgress.student_id])
+        )
+        progress = self.db.query(StudentProgress).filter(
+            StudentProgress.student_id == student_id
+        ).populate_existing().with_for_update().one()
+        # Assign a new object so the JSONB change is flushed
+        progress.subject_stats = fold_submissions(copy.deepcopy(progress.subject_stats or {}), entries)
+        progress.last_updated = datetime.utcnow()
+        
+        stmt = pg_insert(StudentDailyProgress).values(daily_rows(tenant_id, student_id, entries))
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[
+                StudentDailyProgress.student_id,
+                StudentDailyProgress.subject_code,
+                StudentDailyProgress.topic,
+                StudentDailyProgress.day,
+            ],
+            set_={counter: getattr(StudentDailyProgress, counter) + getattr(stmt.excluded, counter) for counter in _COUNTERS},
+        ))
+    
+    def rebuild_progress(self, tenant_id: Optional[UUID] = None, student_id: Optional[UUID] = None) -> int:
+        """
+        Recompute subject_stats from answer_submissions (all students, or one tenant
+        or student) and commit; returns the number of progress rows written.
+        Students without submissions in scope are reset to empty stats.
+        """
+        topic = Question.extra_metadata["topic"].as_string()
+        query = self.db.query(
+            AnswerSubmission.student_id,
+            AnswerSubmission.tenant_id,
+            Question.subject_code,
+            topic.label("topic"),
+            func.count().label("total_questions"),
+            func.count().filter(AnswerSubmission.is_correct).label("correct_answers"),
+            func.coalesce(func.sum(AnswerSubmission.score), 0).label("score_sum"),
+            func.coalesce(func.sum(AnswerSubmission.max_score), 0).label("max_score_sum"),
+            func.max(AnswerSubmission.submitted_at).label("last_activity"),
+        ).join(
+            Question, Question.question_id == AnswerSubmission.question_id
+        ).group_by(
+            # By output name: a repeated topic expression would bind its key as a different parameter
+            AnswerSubmission.student_id, AnswerSubmission.tenant_id, Question.subject_code, "topic"
+        )
+        existing = self.db.query(StudentProgress.student_id, StudentProgress.tenant_id)
+        if tenant_id:
+            query = query.filter(AnswerSubmission.tenant_id == tenant_id)
+            existing = existing.filter(StudentProgress.tenant_id == tenant_id)
+        if student_id:
+            query = query.filter(AnswerSubmission.student_id == student_id)
+            existing = existing.filter(StudentProgress.student_id == student_id)
+        
+        stats: Dict[UUID, Dict[str, Any]] = {}
+        tenants: Dict[UUID, UUID] = dict(existing.all())
+        for row in query.yield_per(1000):
+            tenants[row.student_id] = row.tenant_id
+            fold_submissions(stats.setdefault(row.student_id, {}), [{
+                "subject_code": row.subject_code,
+                "topic": row.topic,
+                "total_questions": row.total_questions,
+                "correct_answers": row.correct_answers,
+                "score_sum": float(row.score_sum),
+                "max_score_sum": float(row.max_score_sum),
+                "last_activity": _timestamp(row.last_activity),
+            }])
+        
+        if not tenants:
+            return 0
+        now = datetime.utcnow()
+        rows = [
+            {"student_id": sid, "tenant_id": tid, "subject_stats": stats.get(sid, {}), "last_updated": now}
+            for sid, tid in tenants.items()
+        ]
+        stmt = pg_insert(StudentProgress)
+        self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[StudentProgress.student_id],
+                set_={"subject_stats": stmt.excluded.subject_stats, "last_updated": stmt.excluded.last_updated},
+            ),
+            rows,
+        )
+        self.db.commit()
+        return len(rows)
+    
+    def rebuild_daily_progress(self, tenant_id: Optional[UUID] = None, student_id: Optional[UUID] = None) -> int:
+        """
+        Recompute the daily rollups from answer_submissions (all students, or one
+        tenant or student) with one DELETE and one INSERT ... SELECT, and commit;
+        returns the number of rollup rows written
+        """
+        topic = func.coalesce(Question.extra_metadata["topic"].as_string(), literal(""))
+        day = func.date(func.timezone("UTC", AnswerSubmission.submitted_at))
+        source = select(
+            AnswerSubmission.student_id,
+            AnswerSubmission.tenant_id,
+            Question.subject_code,
+            topic.label("topic"),
+            day.label("day"),
+            func.count().label("total_questions"),
+            func.count().filter(AnswerSubmission.is_correct).label("correct_answers"),
+            func.coalesce(func.sum(AnswerSubmission.score), 0).label("score_sum"),
+            func.coalesce(func.sum(AnswerSubmission.max_score), 0).label("max_score_sum"),
+        ).join(
+            Question, Question.question_id == AnswerSubmission.question_id
+        ).group_by(
+            # By output name (see rebuild_progress)
+            AnswerSubmission.student_id, AnswerSubmission.tenant_id, Question.subject_code, "topic", "day"
+        )
+        clear = delete(StudentDailyProgress)
+        if tenant_id:
+            source = source.where(AnswerSubmission.tenant_id == tenant_id)
+            clear = clear.where(StudentDailyProgress.tenant_id == tenant_id)
+        if student_id:
+            source = source.where(AnswerSubmission.student_id == student_id)
+            clear = clear.where(StudentDailyProgress.student_id == student_id)
+        
+        self.db.execute(clear)
+        written = self.db.execute(
+            StudentDailyProgress.__table__.insert().from_select(
+                ["student_id", "tenant_id", "subject_code", "topic", "day", *_COUNTERS], source
+            )
+        ).rowcount
+        self.db.commit()
+        return written
+    
+    def get_cohort_analytics(
+        self,
+        tenant_id: UUID,
+        student_ids: Optional[Any] = None,
+        include_areas: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Area accuracy and per-student weak/strong areas and improvement rates for a
+        tenant's students (or student_ids: ids or a select of ids), in one batch
+        """
+        return ProgressAnalytics.load(self.db, tenant_id, student_ids).cohort_summary(include_areas)
+    
     def get_performance_analytics(
         self,
         student_id: UUID,
@@ -118,10 +431,14 @@ class ProgressService:
         progress_data = self.get_student_progress(student_id, tenant_id)
         
         # Additional analytics calculations
+        days = settings.PROGRESS_TREND_DAYS
         analytics = {
             "progress": progress_data,
-            "performance_by_time": {},
-            "improvement_trends": {},
+            "performance_by_time": {
+                "days": days,
+                "daily": self.get_daily_performance(student_id, tenant_id, days),
+            },
+            "improvement_trends": self.get_period_trends(student_id, tenant_id, days),
         }
         
         return {
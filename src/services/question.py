@@ -2,14 +2,47 @@
 Question service
 """
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, Any, List
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Dict, Any, List, Tuple, NamedTuple, Callable
 from uuid import UUID, uuid4
 from datetime import datetime
 
 from src.models.database import Question, Subject
+from src.core.config import settings
 from src.core.exceptions import NotFoundError, BadRequestError
 
 
+class InventoryShortfall(Exception):
+    """The inventory supplied fewer questions than planned; missing more need generated content"""
+    
+    def __init__(self, missing: int):
+        super().__init__(f"{missing} questions short")
+        self.missing = missing
+
+
+class ContentRequest(NamedTuple):
+    """What to generate AI question content for (see QuestionService.plan_questions)"""
+    subject_name: str
+    grade_level: Optional[int]
+    difficulty: str
+    topic: Optional[str]
+    question_type: str
+
+
+async def generate_contents(request: ContentRequest, count: int) -> List[Dict[str, Any]]:
+    """AI content for count questions; call it outside any transaction"""
+    from src.services.generation import generate_question_contents
+    return await generate_question_contents(
+        subject_name=request.subject_name,
+        grade_level=request.grade_level,
+        difficulty=request.difficulty,
+        topic=request.topic,
+        question_type=request.question_type,
+        count=count,
+    )
+
+
 class QuestionService:
     """Question service"""
     
@@ -28,10 +61,161 @@ class QuestionService:
         session_id: Optional[UUID] = None,
     ) -> Dict[str, Any]:
         """
-        Generate a question using AI
-        TODO: Integrate with AI service (OpenAI, Anthropic, etc.)
+        Generate a question (placeholder content; AsyncQuestionService generates it with AI)
+        """
+        return self.generate_questions(
+            tenant_id=tenant_id,
+            count=1,
+            subject_id=subject_id,
+            subject_code=subject_code,
+            grade_level=grade_level,
+            difficulty=difficulty,
+            topic=topic,
+            question_type=question_type,
+            session_id=session_id,
+        )[0]
+    
+    def generate_questions(
+        self,
+        tenant_id: Optional[UUID],
+        count: int,
+        subject_id: Optional[UUID] = None,
+        subject_code: Optional[str] = None,
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        question_type: Optional[str] = None,
+        session_id: Optional[UUID] = None,
+        subject: Optional[Subject] = None,
+        use_inventory: bool = True,
+        commit: bool = True,
+        contents: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate count questions for one subject with a single multi-row INSERT.
+        
+        The subject is resolved and validated once. Pass an already loaded subject to
+        skip the lookup, and commit=False to insert inside the caller's transaction
+        (e.g. together with the quiz session that references the questions).
+        When QUESTION_INVENTORY_ENABLED, questions are drawn from the pre-generated
+        inventory first and only the shortfall is generated here, else placeholders.
+        With contents (AI output, see plan_questions), only count - len(contents) are
+        drawn and InventoryShortfall is raised instead of inserting placeholders if the
+        draw comes up short; the caller rolls back, generates the missing content and
+        calls again.
         """
-        # Resolve subject
+        if subject is None:
+            subject = self._resolve_subject(subject_id, subject_code)
+        self._validate_subject(subject, grade_level, question_type)
+        
+        wanted = count if contents is None else count - len(contents)
+        drawn = self.draw_from_inventory(
+            subject, wanted, tenant_id, grade_level, difficulty, topic, question_type, use_inventory
+        ) if wanted > 0 else []
+        if contents is not None and count - len(drawn) > len(contents):
+            raise InventoryShortfall(count - len(drawn) - len(contents))
+        
+        contents = contents or []
+        rows = [
+            self._build_question_row(
+                subject, tenant_id, grade_level, difficulty, topic, question_type,
+                content=contents[i] if i < len(contents) else None,
+            )
+            for i in range(count - len(drawn))
+        ]
+        if rows:
+            self.db.execute(insert(Question), rows)
+        if commit:
+            self.db.commit()
+        
+        return [self._generated_payload(row, session_id) for row in drawn + rows]
+    
+    def plan_questions(
+        self,
+        count: int,
+        subject_id: Optional[UUID] = None,
+        subject_code: Optional[str] = None,
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        question_type: Optional[str] = None,
+        subject: Optional[Subject] = None,
+    ) -> Tuple[Subject, ContentRequest, int]:
+        """
+        Resolve and validate the subject for an AI-generated batch: returns it, the content
+        request, and how many of count the inventory can currently supply (unlocked read)
+        """
+        if subject is None:
+            subject = self._resolve_subject(subject_id, subject_code)
+        self._validate_subject(subject, grade_level, question_type)
+        request = ContentRequest(
+            subject_name=subject.name,
+            grade_level=grade_level,
+            difficulty=self._resolve_difficulty(subject, difficulty),
+            topic=topic,
+            question_type=question_type or "multiple_choice",
+        )
+        stocked = self.inventory_available(subject, count, grade_level, difficulty, topic, question_type)
+        return subject, request, stocked
+    
+    def draw_from_inventory(
+        self,
+        subject: Subject,
+        count: int,
+        tenant_id: Optional[UUID],
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        question_type: Optional[str] = None,
+        use_inventory: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Take up to count stocked questions (in the caller's transaction); [] when the inventory is off"""
+        bucket = self._inventory_bucket(subject, grade_level, difficulty, topic, question_type, use_inventory)
+        if bucket is None:
+            return []
+        from src.services.question_inventory import QuestionInventoryService
+        return QuestionInventoryService(self.db).draw(bucket, count, tenant_id)
+    
+    def inventory_available(
+        self,
+        subject: Subject,
+        count: int,
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        question_type: Optional[str] = None,
+        use_inventory: bool = True,
+    ) -> int:
+        """How many of count questions the inventory could supply right now (unlocked read)"""
+        bucket = self._inventory_bucket(subject, grade_level, difficulty, topic, question_type, use_inventory)
+        if bucket is None:
+            return 0
+        from src.services.question_inventory import QuestionInventoryService
+        return QuestionInventoryService(self.db).available(bucket, count)
+    
+    @classmethod
+    def _inventory_bucket(
+        cls,
+        subject: Subject,
+        grade_level: Optional[int],
+        difficulty: Optional[str],
+        topic: Optional[str],
+        question_type: Optional[str],
+        use_inventory: bool,
+    ):
+        """Inventory bucket serving a request, or None when it is not served from stock"""
+        # Inventory stock carries no topic, so topic-specific requests are generated directly
+        if not use_inventory or topic is not None or not settings.QUESTION_INVENTORY_ENABLED:
+            return None
+        from src.services.question_inventory import InventoryBucket
+        return InventoryBucket(
+            subject_id=subject.subject_id,
+            grade_level=grade_level,
+            difficulty=cls._resolve_difficulty(subject, difficulty),
+            question_type=question_type or "multiple_choice",
+        )
+    
+    def _resolve_subject(self, subject_id: Optional[UUID], subject_code: Optional[str]) -> Subject:
         if subject_id:
             subject = self.db.query(Subject).filter(Subject.subject_id == subject_id).first()
         elif subject_code:
@@ -42,6 +226,10 @@ class QuestionService:
         if not subject:
             raise NotFoundError("Subject not found")
         
+        return subject
+    
+    @staticmethod
+    def _validate_subject(subject: Subject, grade_level: Optional[int], question_type: Optional[str]) -> None:
         from src.models.user import SubjectStatus
         if subject.status != SubjectStatus.ACTIVE:
             raise BadRequestError("Subject is not active")
@@ -55,39 +243,70 @@ class QuestionService:
         if question_type and subject.supported_question_types:
             if question_type not in subject.supported_question_types:
                 raise BadRequestError(f"Question type {question_type} not supported for this subject")
-        
-        # TODO: Call AI service to generate question
-        # For now, create a placeholder question
-        question = Question(
-            tenant_id=tenant_id,
-            subject_id=subject.subject_id,
-            grade_level=grade_level,
-            difficulty=difficulty or subject.settings.get("default_difficulty") if subject.settings else "beginner",
-            question_type=question_type or "multiple_choice",
-            question_text="Placeholder question - AI integration needed",
-            options=["Option A", "Option B", "Option C", "Option D"] if question_type == "multiple_choice" else None,
-            correct_answer={"answer": "Option A"},
-            metadata={
+    
+    @staticmethod
+    def _resolve_difficulty(subject: Subject, difficulty: Optional[str]) -> str:
+        """Requested difficulty, else the subject default, else beginner"""
+        default_difficulty = subject.settings.get("default_difficulty") if subject.settings else None
+        return difficulty or default_difficulty or "beginner"
+    
+    @staticmethod
+    def _build_question_row(
+        subject: Subject,
+        tenant_id: Optional[UUID],
+        grade_level: Optional[int],
+        difficulty: Optional[str],
+        topic: Optional[str],
+        question_type: Optional[str],
+        content: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Column values for one generated question (ids and timestamps are set client-side for bulk insert).
+        content is AI output from generate_question_contents; without it a placeholder is used.
+        """
+        question_type = question_type or "multiple_choice"
+        if content is None:
+            content = {
+                "question_text": "Placeholder question - AI integration needed",
+                "options": ["Option A", "Option B", "Option C", "Option D"],
+                "correct_answer": {"answer": "Option A"},
+            }
+        return {
+            "question_id": uuid4(),
+            "tenant_id": tenant_id,
+            "subject_id": subject.subject_id,
+            "subject_code": subject.subject_code,
+            "grade_level": grade_level,
+            "difficulty": QuestionService._resolve_difficulty(subject, difficulty),
+            "question_type": question_type,
+            "question_text": content["question_text"],
+            "options": content.get("options") if question_type == "multiple_choice" else None,
+            "correct_answer": content["correct_answer"],
+            "extra_metadata": {
                 "topic": topic,
                 "learning_objectives": [],
                 "estimated_time": 60,
+                "explanation": content.get("explanation"),
             },
-        )
-        
-        self.db.add(question)
-        self.db.commit()
-        self.db.refresh(question)
-        
+            "created_at": datetime.utcnow(),
+            "ai_model_version": content.get("ai_model_version"),
+        }
+    
+    @staticmethod
+    def _generated_payload(row: Dict[str, Any], session_id: Optional[UUID]) -> Dict[str, Any]:
+        """Response for a newly generated question"""
+        difficulty = row["difficulty"]
+        metadata = row["extra_metadata"] or {}
         return {
-            "question_id": question.question_id,
-            "question_text": question.question_text,
-            "question_type": question.question_type,
-            "options": question.options,
+            "question_id": row["question_id"],
+            "question_text": row["question_text"],
+            "question_type": row["question_type"],
+            "options": row["options"],
             "metadata": {
-                "difficulty": question.difficulty.value if hasattr(question.difficulty, 'value') else question.difficulty,
-                "estimated_time": question.extra_metadata.get("estimated_time") if question.extra_metadata else None,
-                "learning_objectives": question.extra_metadata.get("learning_objectives", []) if question.extra_metadata else [],
-                "topic": question.extra_metadata.get("topic") if question.extra_metadata else None,
+                "difficulty": difficulty.value if hasattr(difficulty, 'value') else difficulty,
+                "estimated_time": metadata.get("estimated_time"),
+                "learning_objectives": metadata.get("learning_objectives", []),
+                "topic": metadata.get("topic"),
             },
             "session_id": session_id,
         }
@@ -104,6 +323,50 @@ class QuestionService:
         if not question:
             raise NotFoundError("Question not found")
         
+        return self._question_payload(question)
+    
+    def get_questions(self, question_ids: List[UUID], tenant_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+        """Get many questions in one query, in the requested order; unknown ids are skipped"""
+        query = self.db.query(Question).filter(Question.question_id.in_(self._bulk_ids(question_ids)))
+        
+        # Enforce tenant isolation if tenant_id provided
+        if tenant_id:
+            query = query.filter(Question.tenant_id == tenant_id)
+        
+        return self._ordered_payloads(question_ids, query.all())
+    
+    @staticmethod
+    def _bulk_ids(question_ids: List[UUID]) -> List[UUID]:
+        unique_ids = list(dict.fromkeys(question_ids))
+        if not unique_ids:
+            raise BadRequestError("At least one question id is required")
+        if len(unique_ids) > settings.QUESTION_BULK_FETCH_MAX_IDS:
+            raise BadRequestError(f"At most {settings.QUESTION_BULK_FETCH_MAX_IDS} questions can be fetched at once")
+        return unique_ids
+    
+    @staticmethod
+    def _ordered_payloads(question_ids: List[UUID], questions: List[Question]) -> List[Dict[str, Any]]:
+        by_id = {question.question_id: question for question in questions}
+        return [
+            QuestionService._question_payload(by_id[question_id])
+            for question_id in dict.fromkeys(question_ids)
+            if question_id in by_id
+        ]
+    
+    @staticmethod
+    def _question_payload(question: Any) -> Dict[str, Any]:
+        """
+        Public view of a question (never includes the correct answer).
+        Accepts a Question or a generated question row dict (see _build_question_row).
+        """
+        if isinstance(question, dict):
+            return {
+                "question_id": question["question_id"],
+                "question_text": question["question_text"],
+                "question_type": question["question_type"],
+                "options": question["options"],
+                "metadata": question["extra_metadata"] or {},
+            }
         return {
             "question_id": question.question_id,
             "question_text": question.question_text,
@@ -111,25 +374,180 @@ class QuestionService:
             "options": question.options,
             "metadata": question.extra_metadata or {},
         }
+
+
+
+class AsyncQuestionService:
+    """Question service for AsyncSession (async endpoints; AI generation happens here)"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def generate_question(
+        self,
+        tenant_id: Optional[UUID],
+        subject_id: Optional[UUID] = None,
+        subject_code: Optional[str] = None,
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        question_type: Optional[str] = None,
+        session_id: Optional[UUID] = None,
+    ) -> Dict[str, Any]:
+        """Generate a question using AI"""
+        questions = await self.generate_questions(
+            tenant_id=tenant_id,
+            count=1,
+            subject_id=subject_id,
+            subject_code=subject_code,
+            grade_level=grade_level,
+            difficulty=difficulty,
+            topic=topic,
+            question_type=question_type,
+            session_id=session_id,
+        )
+        return questions[0]
+    
+    async def prepare_questions(
+        self,
+        count: int,
+        subject_id: Optional[UUID] = None,
+        subject_code: Optional[str] = None,
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        question_type: Optional[str] = None,
+        subject: Optional[Subject] = None,
+    ) -> Tuple[Subject, ContentRequest, List[Dict[str, Any]]]:
+        """
+        Validate the subject and generate AI content for the part of count the inventory
+        cannot currently supply. Ends the current read-only transaction first, so no pooled
+        connection or inventory row is held while the provider is called; call it before
+        any writes, then pass the result to write_questions.
+        """
+        resolved, request, stocked = await self.db.run_sync(
+            lambda sync_db: QuestionService(sync_db).plan_questions(
+                count, subject_id, subject_code, grade_level, difficulty, topic, question_type, subject
+            )
+        )
+        await self.db.commit()
+        return resolved, request, await generate_contents(request, count - stocked)
+    
+    async def write_questions(
+        self,
+        tenant_id: Optional[UUID],
+        count: int,
+        subject: Subject,
+        request: ContentRequest,
+        contents: List[Dict[str, Any]],
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        question_type: Optional[str] = None,
+        session_id: Optional[UUID] = None,
+        then: Optional[Callable[[Session, List[Dict[str, Any]]], Any]] = None,
+    ) -> Any:
+        """
+        Draw stock and insert the prepared questions in one short transaction, committed
+        here or by then(sync_db, questions), whose result is returned instead of the
+        questions. If concurrent draws took the stock counted by prepare_questions, the
+        transaction is rolled back, content for the gap generated and the write retried.
+        """
+        def write(sync_db: Session) -> Any:
+            questions = QuestionService(sync_db).generate_questions(
+                tenant_id=tenant_id,
+                count=count,
+                grade_level=grade_level,
+                difficulty=difficulty,
+                topic=topic,
+                question_type=question_type,
+                session_id=session_id,
+                subject=subject,
+                commit=then is None,
+                contents=contents,
+            )
+            return then(sync_db, questions) if then else questions
+        
+        while True:
+            try:
+                return await self.db.run_sync(write)
+            except InventoryShortfall as shortfall:
+                await self.db.rollback()
+                contents = contents + await generate_contents(request, shortfall.missing)
     
-    def get_question_narrative(self, question_id: UUID, tenant_id: Optional[UUID] = None) -> Dict[str, Any]:
+    async def generate_questions(
+        self,
+        tenant_id: Optional[UUID],
+        count: int,
+        subject_id: Optional[UUID] = None,
+        subject_code: Optional[str] = None,
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        question_type: Optional[str] = None,
+        session_id: Optional[UUID] = None,
+        subject: Optional[Subject] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Get educational narrative for a question
-        TODO: Integrate with AI service to generate narrative
+        Generate count questions: AI content for the inventory shortfall is generated
+        outside any transaction (prepare_questions), then stocked questions are drawn and
+        the rest bulk inserted in one short transaction (write_questions).
         """
-        question = self.get_question(question_id, tenant_id)
+        resolved, request, contents = await self.prepare_questions(
+            count, subject_id, subject_code, grade_level, difficulty, topic, question_type, subject
+        )
+        return await self.write_questions(
+            tenant_id, count, resolved, request, contents,
+            grade_level=grade_level,
+            difficulty=difficulty,
+            topic=topic,
+            question_type=question_type,
+            session_id=session_id,
+        )
+    
+    async def get_question(self, question_id: UUID, tenant_id: Optional[UUID] = None) -> Dict[str, Any]:
+        """Get question by ID"""
+        question = await self._get_question_row(question_id, tenant_id)
+        return QuestionService._question_payload(question)
+    
+    async def get_questions(self, question_ids: List[UUID], tenant_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+        """Get many questions in one query, in the requested order; unknown ids are skipped"""
+        stmt = select(Question).where(Question.question_id.in_(QuestionService._bulk_ids(question_ids)))
+        
+        # Enforce tenant isolation if tenant_id provided
+        if tenant_id:
+            stmt = stmt.where(Question.tenant_id == tenant_id)
+        
+        questions = (await self.db.execute(stmt)).scalars().all()
+        return QuestionService._ordered_payloads(question_ids, questions)
+    
+    async def _get_question_row(self, question_id: UUID, tenant_id: Optional[UUID]) -> Question:
+        stmt = select(Question).where(Question.question_id == question_id)
+        
+        # Enforce tenant isolation if tenant_id provided
+        if tenant_id:
+            stmt = stmt.where(Question.tenant_id == tenant_id)
+        
+        question = (await self.db.execute(stmt)).scalars().first()
+        if not question:
+            raise NotFoundError("Question not found")
+        
+        return question
+    
+    async def get_question_narrative(
+        self,
+        question_id: UUID,
+        tenant_id: Optional[UUID] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Get educational narrative for a question, generated with AI (cached unless use_cache is False)"""
+        question = await self._get_question_row(question_id, tenant_id)
+        
+        from src.services.generation import generate_narrative
+        narrative = await generate_narrative(question.question_text, question.correct_answer, use_cache=use_cache)
         
-        # TODO: Generate narrative using AI
-        # For now, return placeholder
         return {
-            "question_id": question["question_id"],
-            "narrative": "Placeholder narrative - AI integration needed",
-            "explanation": {
-                "concept": "Concept explanation",
-                "steps": ["Step 1", "Step 2", "Step 3"],
-                "why_correct": "Why the answer is correct",
-                "common_mistakes": ["Common mistake 1", "Common mistake 2"],
-                "related_concepts": ["Related concept 1"],
-            },
+            "question_id": question.question_id,
+            "narrative": narrative["narrative"],
+            "explanation": narrative["explanation"],
         }
-
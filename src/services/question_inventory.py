@@ -0,0 +1,349 @@
+"""
+Question inventory service
+
+Keeps a stock of ready questions for each (subject_id, grade_level, difficulty,
+question_type) bucket so quiz sessions start without waiting for question
+generation. QuestionService.generate_questions draws from the stock and only
+generates the shortfall synchronously; a background refiller tops buckets back
+up to QUESTION_INVENTORY_TARGET and is woken early when a draw leaves a bucket
+at or below QUESTION_INVENTORY_LOW_WATERMARK.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, func
+from typing import Optional, Dict, Any, List, NamedTuple, Callable
+from uuid import UUID
+import asyncio
+import hashlib
+import logging
+import threading
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.models.database import Question, QuestionInventory, Subject
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryBucket(NamedTuple):
+    """Inventory key; difficulty and question_type are enum values"""
+    subject_id: UUID
+    grade_level: Optional[int]
+    difficulty: str
+    question_type: str
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+class InventoryMetrics:
+    """Per-worker draw/refill counters and estimated stock level per bucket"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.draws = 0
+        self.questions_requested = 0
+        self.questions_drawn = 0
+        self.fallback_questions = 0  # Generated synchronously because a bucket ran short
+        self.low_watermark_events = 0
+        self.refills = 0
+        self.questions_refilled = 0
+        self.levels: Dict[InventoryBucket, int] = {}
+
+    def record_draw(self, bucket: InventoryBucket, requested: int, drawn: int) -> bool:
+        """Record a draw; returns True if the bucket is now at or below the low watermark"""
+        with self._lock:
+            self.draws += 1
+            self.questions_requested += requested
+            self.questions_drawn += drawn
+            self.fallback_questions += requested - drawn
+            level = max(self.levels.get(bucket, 0) - drawn, 0)
+            self.levels[bucket] = level
+            low = level <= settings.QUESTION_INVENTORY_LOW_WATERMARK
+            if low:
+                self.low_watermark_events += 1
+            return low
+
+    def record_levels(self, levels: Dict[InventoryBucket, int]) -> None:
+        with self._lock:
+            self.levels.update(levels)
+
+    def record_refill(self, bucket: InventoryBucket, added: int) -> None:
+        with self._lock:
+            self.refills += 1
+            self.questions_refilled += added
+            self.levels[bucket] = self.levels.get(bucket, 0) + added
+
+    def known_buckets(self) -> List[InventoryBucket]:
+        with self._lock:
+            return list(self.levels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            low_watermark = settings.QUESTION_INVENTORY_LOW_WATERMARK
+            return {
+                "draws": self.draws,
+                "questions_requested": self.questions_requested,
+                "questions_drawn": self.questions_drawn,
+                "fallback_questions": self.fallback_questions,
+                "hit_rate": round(self.questions_drawn / self.questions_requested, 4) if self.questions_requested else 0.0,
+                "low_watermark_events": self.low_watermark_events,
+                "refills": self.refills,
+                "questions_refilled": self.questions_refilled,
+                "buckets": len(self.levels),
+                "buckets_below_low_watermark": sum(1 for level in self.levels.values() if level <= low_watermark),
+            }
+
+
+inventory_metrics = InventoryMetrics()
+
+# Set by the running refiller so draws can wake it when a bucket runs low
+_wake_refiller: Optional[Callable[[], None]] = None
+
+
+class QuestionInventoryService:
+    """Question inventory service"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _bucket_filter(bucket: InventoryBucket):
+        return (
+            QuestionInventory.subject_id == bucket.subject_id,
+            QuestionInventory.grade_level.is_not_distinct_from(bucket.grade_level),
+            QuestionInventory.difficulty == bucket.difficulty,
+            QuestionInventory.question_type == bucket.question_type,
+        )
+
+    def draw(self, bucket: InventoryBucket, count: int, tenant_id: Optional[UUID]) -> List[Dict[str, Any]]:
+        """
+        Take up to count questions from a bucket and assign them to the tenant, in one statement.
+        Runs in the caller's transaction; concurrent draws skip each other's rows.
+        Returned rows have the same keys as QuestionService._build_question_row.
+        """
+        pick = (
+            select(QuestionInventory.question_id)
+            .where(*self._bucket_filter(bucket))
+            .order_by(QuestionInventory.created_at)
+            .limit(count)
+            .with_for_update(skip_locked=True)
+        )
+        drawn = (
+            delete(QuestionInventory)
+            .where(QuestionInventory.question_id.in_(pick))
+            .returning(QuestionInventory.question_id)
+            .cte("drawn")
+        )
+        stmt = (
+            update(Question)
+            .where(Question.question_id == drawn.c.question_id)
+            .values(tenant_id=tenant_id)
+            .returning(
+                Question.question_id,
+                Question.tenant_id,
+                Question.subject_id,
+                Question.subject_code,
+                Question.grade_level,
+                Question.difficulty,
+                Question.question_type,
+                Question.question_text,
+                Question.options,
+                Question.correct_answer,
+                Question.extra_metadata.label("extra_metadata"),
+                Question.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = [
+            dict(
+                row,
+                difficulty=_enum_value(row["difficulty"]),
+                question_type=_enum_value(row["question_type"]),
+            )
+            for row in self.db.execute(stmt).mappings()
+        ]
+
+        if inventory_metrics.record_draw(bucket, count, len(rows)) and _wake_refiller:
+            _wake_refiller()
+        return rows
+
+    def available(self, bucket: InventoryBucket, count: int) -> int:
+        """Stocked questions in a bucket, counted up to count, without locking them"""
+        stocked = select(QuestionInventory.question_id).where(*self._bucket_filter(bucket)).limit(count).subquery()
+        return self.db.execute(select(func.count()).select_from(stocked)).scalar()
+
+    def stock_levels(self) -> Dict[InventoryBucket, int]:
+        """Current stock per bucket"""
+        rows = self.db.query(
+            QuestionInventory.subject_id,
+            QuestionInventory.grade_level,
+            QuestionInventory.difficulty,
+            QuestionInventory.question_type,
+            func.count(QuestionInventory.question_id),
+        ).group_by(
+            QuestionInventory.subject_id,
+            QuestionInventory.grade_level,
+            QuestionInventory.difficulty,
+            QuestionInventory.question_type,
+        ).all()
+        return {
+            InventoryBucket(subject_id, grade_level, _enum_value(difficulty), _enum_value(question_type)): count
+            for subject_id, grade_level, difficulty, question_type, count in rows
+        }
+
+    def subject_name(self, subject_id: UUID) -> Optional[str]:
+        """Subject name for generation prompts (None if the subject no longer exists)"""
+        return self.db.query(Subject.name).filter(Subject.subject_id == subject_id).scalar()
+
+    def add_to_stock(self, bucket: InventoryBucket, target: int, contents: List[Dict[str, Any]]) -> int:
+        """
+        Insert generated questions into a bucket, never beyond target, in one transaction.
+        A transaction-scoped advisory lock keeps workers from stocking the same bucket at
+        once; content that would overfill the bucket is discarded.
+        Returns the number of questions added.
+        """
+        from src.services.question import QuestionService
+
+        locked = self.db.execute(select(func.pg_try_advisory_xact_lock(_bucket_lock_key(bucket)))).scalar()
+        if not locked:
+            self.db.rollback()
+            return 0
+
+        level = self.db.query(func.count(QuestionInventory.question_id)).filter(
+            *self._bucket_filter(bucket)
+        ).scalar() or 0
+        contents = contents[:max(target - level, 0)]
+        if not contents:
+            self.db.rollback()
+            inventory_metrics.record_levels({bucket: level})
+            return 0
+
+        questions = QuestionService(self.db).generate_questions(
+            tenant_id=None,  # Shared until drawn into a session
+            count=len(contents),
+            subject_id=bucket.subject_id,
+            grade_level=bucket.grade_level,
+            difficulty=bucket.difficulty,
+            question_type=bucket.question_type,
+            use_inventory=False,
+            commit=False,
+            contents=contents,
+        )
+        self.db.execute(insert(QuestionInventory), [
+            {
+                "question_id": question["question_id"],
+                "subject_id": bucket.subject_id,
+                "grade_level": bucket.grade_level,
+                "difficulty": bucket.difficulty,
+                "question_type": bucket.question_type,
+            }
+            for question in questions
+        ])
+        self.db.commit()
+
+        inventory_metrics.record_levels({bucket: level})
+        inventory_metrics.record_refill(bucket, len(contents))
+        return len(contents)
+
+
+def _bucket_lock_key(bucket: InventoryBucket) -> int:
+    """Stable signed 64-bit advisory lock key for a bucket"""
+    digest = hashlib.blake2b(repr(tuple(str(part) for part in bucket)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class QuestionInventoryRefiller:
+    """
+    Background task that tops up known buckets to the target stock.
+    Runs every QUESTION_INVENTORY_REFILL_INTERVAL_SECONDS, or sooner when a draw
+    crosses the low watermark. Questions are generated with the AI client on the
+    event loop; database work runs in a thread with its own session.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        global _wake_refiller
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        _wake_refiller = self.wake
+
+    async def stop(self) -> None:
+        global _wake_refiller
+        _wake_refiller = None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Request an immediate refill pass (safe to call from any thread)"""
+        if self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refill_once()
+            except Exception:
+                logger.exception("Question inventory refill failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.QUESTION_INVENTORY_REFILL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    @staticmethod
+    def _in_session(method: str, *args):
+        """Run a QuestionInventoryService method with a fresh session (called in a worker thread)"""
+        with SessionLocal() as db:
+            return getattr(QuestionInventoryService(db), method)(*args)
+
+    async def refill_once(self) -> int:
+        """Refill every known bucket below target; returns the number of questions added"""
+        from src.services.generation import generate_question_contents
+
+        target = settings.QUESTION_INVENTORY_TARGET
+        batch_size = settings.QUESTION_INVENTORY_REFILL_BATCH
+        levels = await asyncio.to_thread(self._in_session, "stock_levels")
+        inventory_metrics.record_levels(levels)
+
+        added = 0
+        for bucket in set(levels) | set(inventory_metrics.known_buckets()):
+            level = levels.get(bucket, 0)
+            try:
+                subject_name = None
+                while level < target:
+                    if subject_name is None:
+                        subject_name = await asyncio.to_thread(self._in_session, "subject_name", bucket.subject_id)
+                        if subject_name is None:
+                            break
+                    # Provider calls happen outside any database transaction
+                    contents = await generate_question_contents(
+                        subject_name=subject_name,
+                        grade_level=bucket.grade_level,
+                        difficulty=bucket.difficulty,
+                        topic=None,
+                        question_type=bucket.question_type,
+                        count=min(target - level, batch_size),
+                        use_cache=False,  # Stock must be fresh, distinct questions
+                    )
+                    batch = await asyncio.to_thread(self._in_session, "add_to_stock", bucket, target, contents)
+                    if not batch:
+                        break
+                    level += batch
+                    added += batch
+            except Exception:
+                logger.exception("Refill failed for question inventory bucket %s", bucket)
+        return added
+
+
+question_inventory_refiller = QuestionInventoryRefiller()
@@ -2,14 +2,16 @@
 Session service - updated for new model structure
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select, func, true
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Any, List
 from uuid import UUID, uuid4
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-from src.models.database import QuizSession, Question, Subject, UserAccount
+from src.models.database import QuizSession, Question, Subject, UserAccount, AnswerSubmission
 from src.core.exceptions import NotFoundError, BadRequestError
-from src.services.question import QuestionService
+from src.services.question import QuestionService, AsyncQuestionService
+from src.services.session_expiry import session_expiry_engine, session_deadline
 from src.models.user import SessionStatus, SubjectStatus
 
 
@@ -31,8 +33,46 @@ class SessionService:
         num_questions: int = 10,
         topics: Optional[List[str]] = None,
         time_limit: Optional[int] = None,
+        include_questions: bool = False,
     ) -> Dict[str, Any]:
-        """Create a new quiz session"""
+        """Create a new quiz session; include_questions embeds the question payloads (without answers)"""
+        subject = self.validate_session_request(tenant_id, student_id, subject_id, subject_code)
+        
+        # Generate all questions with one multi-row insert, committed with the session
+        questions = self.question_service.generate_questions(
+            tenant_id=tenant_id,
+            count=num_questions,
+            subject=subject,
+            grade_level=grade_level,
+            difficulty=difficulty,
+            topic=topics[0] if topics else None,
+            commit=False,
+        )
+        return self._insert_session(
+            tenant_id, student_id, subject, grade_level, questions, time_limit, include_questions
+        )
+    
+    def create_session_for_questions(
+        self,
+        tenant_id: UUID,
+        student_id: UUID,
+        subject: Subject,
+        question_ids: List[UUID],
+        time_limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Create a session over existing questions (e.g. a competition's shared set), generating none"""
+        return self._insert_session(
+            tenant_id, student_id, subject, None, [{"question_id": qid} for qid in question_ids], time_limit
+        )
+    
+    def validate_session_request(
+        self,
+        tenant_id: UUID,
+        student_id: UUID,
+        subject_id: Optional[UUID],
+        subject_code: Optional[str],
+    ) -> Subject:
+        """Check the student and resolve the (active) subject for a new session"""
         # Validate student
         student = self.db.query(UserAccount).filter(
             and_(
@@ -58,17 +98,21 @@ class SessionService:
         if subject.status != SubjectStatus.ACTIVE:
             raise BadRequestError("Subject is not active")
         
-        # Generate questions
-        question_ids = []
-        for _ in range(num_questions):
-            question = self.question_service.generate_question(
-                tenant_id=tenant_id,
-                subject_id=subject.subject_id,
-                grade_level=grade_level,
-                difficulty=difficulty,
-                topic=topics[0] if topics else None,
-            )
-            question_ids.append(UUID(question["question_id"]))
+        return subject
+    
+    def _insert_session(
+        self,
+        tenant_id: UUID,
+        student_id: UUID,
+        subject: Subject,
+        grade_level: Optional[int],
+        questions: List[Dict[str, Any]],
+        time_limit: Optional[int],
+        include_questions: bool = False,
+    ) -> Dict[str, Any]:
+        """Insert the session for already generated (uncommitted) questions and commit both"""
+        question_ids = [question["question_id"] for question in questions]
+        started_at = datetime.utcnow()
         
         # Create session
         session = QuizSession(
@@ -79,18 +123,24 @@ class SessionService:
             grade_level=grade_level,
             questions=question_ids,
             status=SessionStatus.IN_PROGRESS,
+            started_at=started_at,
             time_limit=time_limit,
+            expires_at=session_deadline(time_limit, started_at),
         )
         
         self.db.add(session)
         self.db.commit()
         self.db.refresh(session)
+        session_expiry_engine.schedule(session.session_id, session.expires_at)
         
         return {
             "session_id": str(session.session_id),
             "questions": [str(qid) for qid in question_ids],
             "created_at": session.started_at,
-            "expires_at": None,  # Calculate if time_limit is set
+            "expires_at": session.expires_at,
+            "question_details": [
+                QuestionService._question_payload(question) for question in questions
+            ] if include_questions else None,
         }
     
     def get_session_status(self, session_id: UUID, tenant_id: UUID) -> Dict[str, Any]:
@@ -105,24 +155,35 @@ class SessionService:
         if not session:
             raise NotFoundError("Session not found")
         
-        # Calculate current question index
-        # TODO: Track current question properly
-        current_question = 0
-        questions_answered = 0
-        
+        return self._status_payload(session)
+    
+    @staticmethod
+    def _time_elapsed(session: QuizSession) -> int:
+        """Seconds from start to completion (or to now while in progress)"""
+        if not session.started_at:
+            return 0
+        end = session.completed_at
+        if end is None:
+            end = datetime.now(timezone.utc) if session.started_at.tzinfo else datetime.utcnow()
+        return max(int((end - session.started_at).total_seconds()), 0)
+    
+    @staticmethod
+    def _status_payload(session: QuizSession) -> Dict[str, Any]:
+        """Build session status response from a QuizSession row (progress counters are kept by AnswerService)"""
         return {
             "session_id": str(session.session_id),
             "status": session.status.value,
-            "current_question": current_question,
+            "current_question": session.current_question,
             "total_questions": len(session.questions) if session.questions else 0,
             "score": float(session.score),
             "max_score": float(session.max_score),
-            "time_elapsed": 0,  # Calculate from started_at
-            "questions_answered": questions_answered,
+            "time_elapsed": SessionService._time_elapsed(session),
+            "questions_answered": session.questions_answered,
+            "expires_at": session.expires_at,
         }
     
-    def get_session_results(self, session_id: UUID, tenant_id: UUID) -> Dict[str, Any]:
-        """Get session results"""
+    def get_session_results(self, session_id: UUID, tenant_id: UUID, compact: bool = False) -> Dict[str, Any]:
+        """Get session results with per-question details (see _results_questions_stmt)"""
         session = self.db.query(QuizSession).filter(
             and_(
             QuizSession.session_id == session_id,
@@ -133,9 +194,113 @@ class SessionService:
         if not session:
             raise NotFoundError("Session not found")
         
+        rows = self.db.execute(self._results_questions_stmt(session_id, compact)).mappings().all()
+        return self._results_payload(session, rows, compact)
+    
+    @staticmethod
+    def _results_questions_stmt(session_id: UUID, compact: bool = False):
+        """
+        One row per session question in QuizSession.questions order: the question joined with
+        the student's first submission for it (the one counted in the session score).
+        compact leaves out question text, options, answers and feedback.
+        """
+        slot = (
+            func.unnest(QuizSession.questions)
+            .table_valued("question_id", with_ordinality="position")
+            .render_derived(name="slot")
+        )
+        answer_columns = [
+            AnswerSubmission.question_id,
+            AnswerSubmission.is_correct,
+            AnswerSubmission.score,
+            AnswerSubmission.max_score,
+            AnswerSubmission.hints_used,
+            AnswerSubmission.time_spent,
+            AnswerSubmission.submitted_at,
+        ]
+        if not compact:
+            answer_columns += [AnswerSubmission.answer, AnswerSubmission.feedback]
+        first_answer = (
+            select(*answer_columns)
+            .where(AnswerSubmission.session_id == session_id)
+            .distinct(AnswerSubmission.question_id)
+            .order_by(AnswerSubmission.question_id, AnswerSubmission.submitted_at)
+            .subquery("first_answer")
+        )
+        columns = [
+            slot.c.position,
+            slot.c.question_id,
+            first_answer.c.submitted_at,
+            first_answer.c.is_correct,
+            first_answer.c.score,
+            func.coalesce(
+                first_answer.c.max_score,
+                Question.extra_metadata["points"].as_float(),
+                1.0,
+            ).label("max_score"),
+            first_answer.c.hints_used,
+            first_answer.c.time_spent,
+        ]
+        if not compact:
+            columns += [
+                Question.question_type,
+                Question.question_text,
+                Question.options,
+                Question.correct_answer,
+                Question.extra_metadata["explanation"].as_string().label("explanation"),
+                first_answer.c.answer,
+                first_answer.c.feedback,
+            ]
+        return (
+            select(*columns)
+            .select_from(QuizSession)
+            .join(slot, true())
+            .join(Question, Question.question_id == slot.c.question_id)
+            .outerjoin(first_answer, first_answer.c.question_id == slot.c.question_id)
+            .where(QuizSession.session_id == session_id)
+            .order_by(slot.c.position)
+        )
+    
+    @staticmethod
+    def _question_result(row: Any, compact: bool, finished: bool = False) -> Dict[str, Any]:
+        """
+        One question's result. The correct answer, explanation and feedback of a question
+        are only shown once it is answered or the session is finished (completed or
+        expired): competition participants share a question set, so showing them earlier
+        would leak the answers.
+        """
+        answered = row["submitted_at"] is not None
+        revealed = answered or finished
+        result = {
+            "position": row["position"],
+            "question_id": str(row["question_id"]),
+            "answered": answered,
+            "is_correct": bool(row["is_correct"]),
+            "score": float(row["score"] or 0),
+            "max_score": float(row["max_score"]),
+            "hints_used": len(row["hints_used"] or []) if compact else [str(hint_id) for hint_id in row["hints_used"] or []],
+            "time_spent": row["time_spent"] or 0,
+        }
+        if not compact:
+            result.update({
+                "question_type": getattr(row["question_type"], "value", row["question_type"]),
+                "question_text": row["question_text"],
+                "options": row["options"],
+                "student_answer": row["answer"],
+                "correct_answer": row["correct_answer"] if revealed else None,
+                "explanation": row["explanation"] if revealed else None,
+                "feedback": row["feedback"] if revealed else None,
+                "submitted_at": row["submitted_at"],
+            })
+        return result
+    
+    @staticmethod
+    def _results_payload(session: QuizSession, rows: List[Any], compact: bool = False) -> Dict[str, Any]:
+        """Build session results response from a QuizSession row and its _results_questions_stmt rows"""
         accuracy = 0.0
         if session.max_score > 0:
             accuracy = float((session.score / session.max_score) * 100)
+        finished = session.status in (SessionStatus.COMPLETED, SessionStatus.EXPIRED)
         
         return {
             "session_id": str(session.session_id),
@@ -143,8 +308,88 @@ class SessionService:
             "score": float(session.score),
             "max_score": float(session.max_score),
             "accuracy": accuracy,
-            "questions_answered": len(session.questions) if session.questions else 0,
-            "time_elapsed": 0,  # Calculate from started_at and completed_at
+            "questions_answered": session.questions_answered,
+            "time_elapsed": SessionService._time_elapsed(session),
             "completed_at": session.completed_at,
-            "questions": [],  # TODO: Include question details
+            "questions_skipped": max(len(session.questions or []) - session.questions_answered, 0),
+            "questions": [SessionService._question_result(row, compact, finished) for row in rows],
         }
+
+
+class AsyncSessionService:
+    """
+    Session service for AsyncSession.
+    Reads are native async queries; session creation runs the sync SessionService
+    steps inside AsyncSession.run_sync so the logic is shared. AI question generation
+    is awaited before the write transaction opens, so that transaction stays short.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_session(
+        self,
+        tenant_id: UUID,
+        student_id: UUID,
+        subject_id: Optional[UUID] = None,
+        subject_code: Optional[str] = None,
+        grade_level: Optional[int] = None,
+        difficulty: Optional[str] = None,
+        num_questions: int = 10,
+        topics: Optional[List[str]] = None,
+        time_limit: Optional[int] = None,
+        include_questions: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Create a new quiz session; include_questions embeds the question payloads (without answers).
+        Question content is generated before any transaction opens; the inventory draw and the
+        question and session inserts then commit in one short transaction.
+        """
+        subject = await self.db.run_sync(
+            lambda sync_db: SessionService(sync_db).validate_session_request(
+                tenant_id, student_id, subject_id, subject_code
+            )
+        )
+        topic = topics[0] if topics else None
+        
+        question_service = AsyncQuestionService(self.db)
+        subject, request, contents = await question_service.prepare_questions(
+            count=num_questions,
+            subject=subject,
+            grade_level=grade_level,
+            difficulty=difficulty,
+            topic=topic,
+        )
+        
+        return await question_service.write_questions(
+            tenant_id, num_questions, subject, request, contents,
+            grade_level=grade_level,
+            difficulty=difficulty,
+            topic=topic,
+            then=lambda sync_db, questions: SessionService(sync_db)._insert_session(
+                tenant_id, student_id, subject, grade_level, questions, time_limit, include_questions
+            ),
+        )
+    
+    async def _get_session(self, session_id: UUID, tenant_id: UUID) -> QuizSession:
+        session = (await self.db.execute(
+            select(QuizSession).where(
+                QuizSession.session_id == session_id,
+                QuizSession.tenant_id == tenant_id,
+            )
+        )).scalars().first()
+        
+        if not session:
+            raise NotFoundError("Session not found")
+        return session
+    
+    async def get_session_status(self, session_id: UUID, tenant_id: UUID) -> Dict[str, Any]:
+        """Get session status"""
+        session = await self._get_session(session_id, tenant_id)
+        return SessionService._status_payload(session)
+    
+    async def get_session_results(self, session_id: UUID, tenant_id: UUID, compact: bool = False) -> Dict[str, Any]:
+        """Get session results with per-question details"""
+        session = await self._get_session(session_id, tenant_id)
+        rows = (await self.db.execute(SessionService._results_questions_stmt(session_id, compact))).mappings().all()
+        return SessionService._results_payload(session, rows, compact)
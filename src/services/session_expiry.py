@@ -0,0 +1,204 @@
+"""
+Session expiry
+
+Timed quiz sessions, and the competition sessions that wrap them, expire
+SESSION_EXPIRY_GRACE_SECONDS after expires_at (started_at + time_limit).
+
+- Each worker keeps the sessions it starts in a TimingWheel. Scheduling a session
+  is O(1), and every tick the sessions that fell due are expired with one UPDATE.
+- Every SESSION_EXPIRY_SWEEP_INTERVAL_SECONDS (and at startup) a bulk sweep expires
+  whatever the wheels missed: sessions started by another worker, or before a
+  restart. The sweep is a range scan on the partial index over open timed sessions.
+
+Expiry auto-submits. Answers already recorded keep their scores, and the quiz
+session becomes expired with completed_at = expires_at. A competition session
+takes its quiz session's score; it becomes completed if anything was answered,
+otherwise expired, and completed ones go on this worker's leaderboards.
+"""
+from sqlalchemy import update, case, func, literal
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import threading
+import time
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.core.timing_wheel import TimingWheel
+from src.models.database import QuizSession, CompetitionSession
+from src.models.user import SessionStatus, CompetitionSessionStatus
+from src.services.leaderboard import competition_result_values, entry_columns, leaderboard_engine
+
+logger = logging.getLogger(__name__)
+
+# Sessions per UPDATE when a large batch falls due at once
+EXPIRY_BATCH_SIZE = 1000
+
+
+def session_deadline(time_limit: Optional[int], started_at: datetime) -> Optional[datetime]:
+    """expires_at for a session started at started_at (None without a time limit)"""
+    if not time_limit:
+        return None
+    return started_at + timedelta(seconds=time_limit)
+
+
+def deadline_passed(expires_at: Optional[datetime]) -> bool:
+    """True once the grace period after expires_at is over"""
+    if expires_at is None:
+        return False
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) > expires_at + timedelta(seconds=settings.SESSION_EXPIRY_GRACE_SECONDS)
+
+
+def _expire_quiz_sessions_stmt(session_ids: Optional[Sequence[UUID]] = None):
+    """Expire open quiz sessions past their deadline (only session_ids, if given)"""
+    stmt = update(QuizSession).where(
+        QuizSession.status == SessionStatus.IN_PROGRESS,
+        QuizSession.expires_at <= func.now() - timedelta(seconds=settings.SESSION_EXPIRY_GRACE_SECONDS),
+    )
+    if session_ids is not None:
+        stmt = stmt.where(QuizSession.session_id.in_(session_ids))
+    return stmt.values(
+        status=SessionStatus.EXPIRED,
+        completed_at=QuizSession.expires_at,
+    ).execution_options(synchronize_session=False)
+
+
+def _expire_competition_sessions_stmt(session_ids: Optional[Sequence[UUID]] = None):
+    """
+    Auto-submit open competition sessions past their deadline with their quiz
+    session's score (only those wrapping session_ids, if given), returning their
+    leaderboard entries
+    """
+    stmt = update(CompetitionSession).where(
+        CompetitionSession.session_id == QuizSession.session_id,
+        CompetitionSession.status == CompetitionSessionStatus.IN_PROGRESS,
+        CompetitionSession.expires_at <= func.now() - timedelta(seconds=settings.SESSION_EXPIRY_GRACE_SECONDS),
+    )
+    if session_ids is not None:
+        stmt = stmt.where(CompetitionSession.session_id.in_(session_ids))
+    finished_at = func.least(func.coalesce(QuizSession.completed_at, CompetitionSession.expires_at), CompetitionSession.expires_at)
+    return stmt.values(
+        status=case(
+            (QuizSession.questions_answered > 0, literal(CompetitionSessionStatus.COMPLETED, CompetitionSession.status.type)),
+            else_=literal(CompetitionSessionStatus.EXPIRED, CompetitionSession.status.type),
+        ),
+        **competition_result_values(finished_at),
+    ).returning(*entry_columns()).execution_options(synchronize_session=False)
+
+
+class SessionExpiryEngine:
+    """Timing wheel plus periodic sweep (see module docstring); one per worker"""
+
+    def __init__(self):
+        self.wheel = TimingWheel(tick_seconds=settings.SESSION_EXPIRY_TICK_SECONDS, now=time.time())
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.expired_on_time = 0
+        self.expired_by_sweep = 0
+        self.competition_sessions_expired = 0
+        self.sweeps = 0
+        self.errors = 0
+        self.last_sweep_at: Optional[datetime] = None
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def schedule(self, session_id: UUID, expires_at: Optional[datetime]) -> None:
+        """Expire a quiz session at its deadline (safe to call from any thread)"""
+        if expires_at is None or self._task is None:
+            return
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        self.wheel.schedule(session_id, expires_at.timestamp() + settings.SESSION_EXPIRY_GRACE_SECONDS)
+        self._count("scheduled")
+
+    def cancel(self, session_id: UUID) -> None:
+        """Forget a session that finished before its deadline"""
+        self.wheel.cancel(session_id)
+
+    async def start(self) -> None:
+        # Sessions started while the engine was stopped are left to the sweep
+        self.wheel = TimingWheel(tick_seconds=settings.SESSION_EXPIRY_TICK_SECONDS, now=time.time())
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_sweep = loop.time()
+        while True:
+            due = self.wheel.advance(time.time())
+            if due:
+                try:
+                    await self.expire_sessions(due)
+                except Exception:
+                    self._count("errors")
+                    logger.exception("Session expiry failed")
+            if loop.time() >= next_sweep:
+                try:
+                    await self.sweep()
+                except Exception:
+                    self._count("errors")
+                    logger.exception("Session expiry sweep failed")
+                next_sweep = loop.time() + settings.SESSION_EXPIRY_SWEEP_INTERVAL_SECONDS
+            await asyncio.sleep(settings.SESSION_EXPIRY_TICK_SECONDS)
+
+    @staticmethod
+    async def _expire(session_ids: Optional[Sequence[UUID]] = None) -> Tuple[int, int]:
+        """Expire quiz sessions and their competition sessions in one transaction"""
+        async with AsyncSessionLocal() as db:
+            quiz = (await db.execute(_expire_quiz_sessions_stmt(session_ids))).rowcount
+            competition = (await db.execute(_expire_competition_sessions_stmt(session_ids))).mappings().all()
+            await db.commit()
+        leaderboard_engine.record(competition)
+        return quiz, len(competition)
+
+    async def expire_sessions(self, session_ids: List[UUID]) -> int:
+        """Expire due sessions from the wheel; returns quiz sessions expired"""
+        expired = 0
+        for start in range(0, len(session_ids), EXPIRY_BATCH_SIZE):
+            quiz, competition = await self._expire(session_ids[start:start + EXPIRY_BATCH_SIZE])
+            expired += quiz
+            self._count("competition_sessions_expired", competition)
+        self._count("expired_on_time", expired)
+        return expired
+
+    async def sweep(self) -> int:
+        """Expire every open session past its deadline; returns quiz sessions expired"""
+        quiz, competition = await self._expire()
+        self._count("expired_by_sweep", quiz)
+        self._count("competition_sessions_expired", competition)
+        self._count("sweeps")
+        self.last_sweep_at = datetime.now(timezone.utc)
+        return quiz
+
+    def stats(self) -> Dict[str, Any]:
+        """Expiry counters for this worker"""
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "pending": len(self.wheel),
+                "scheduled": self.scheduled,
+                "expired_on_time": self.expired_on_time,
+                "expired_by_sweep": self.expired_by_sweep,
+                "competition_sessions_expired": self.competition_sessions_expired,
+                "sweeps": self.sweeps,
+                "errors": self.errors,
+                "last_sweep_at": self.last_sweep_at,
+            }
+
+
+session_expiry_engine = SessionExpiryEngine()
@@ -11,7 +11,7 @@ from src.models.database import (
     UserAccount, UserSubjectRole, StudentSubjectProfile, StudentTutorAssignment, Subject
 )
 from src.core.exceptions import NotFoundError, BadRequestError
-from src.core.security import get_password_hash
+from src.core.security import get_password_hash_async
 from src.models.user import AccountStatus, UserRole, AssignmentStatus, SubjectStatus, SubjectType, ValidationMethod, QuestionType
 
 
@@ -46,7 +46,7 @@ class StudentService:
         
         return default_subject
     
-    def create_student(
+    async def create_student(
         self,
         tenant_id: UUID,
         username: str,
@@ -73,7 +73,7 @@ class StudentService:
         # Generate temporary password
         import secrets
         temp_password = secrets.token_urlsafe(12)
-        password_hash = get_password_hash(temp_password)
+        password_hash = await get_password_hash_async(temp_password)
         
         # Create user account
         user = UserAccount(
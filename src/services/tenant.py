@@ -3,16 +3,51 @@ Tenant service - updated for new model structure
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 from uuid import UUID
+import logging
 
 from src.models.database import (
     Tenant, TenantDomain, UserAccount, TenantAdminAccount, 
     SystemAdminAccount, QuizSession, UserSubjectRole
 )
+from src.core.cache import TTLCache, MISSING
+from src.core.config import settings as app_settings
 from src.core.exceptions import NotFoundError, BadRequestError
 from src.models.user import TenantStatus, DomainStatus, UserRole, AssignmentStatus, AccountStatus
 
+logger = logging.getLogger(__name__)
+
+# domain -> resolved tenant dict, or None for unknown/inactive domains (negative caching)
+tenant_domain_cache = TTLCache(
+    ttl_seconds=app_settings.TENANT_DOMAIN_CACHE_TTL_SECONDS,
+    max_size=app_settings.TENANT_DOMAIN_CACHE_MAX_SIZE,
+)
+
+# Called after a local invalidation, e.g. to publish it to other workers
+_invalidation_hooks: List[Callable[[], None]] = []
+
+
+def add_tenant_cache_invalidation_hook(hook: Callable[[], None]) -> None:
+    """
+    Register a callback run whenever the tenant domain cache is invalidated locally.
+    Use it to broadcast the change (Redis pub/sub, Postgres NOTIFY, ...); receivers
+    should call invalidate_tenant_domain_cache(broadcast=False).
+    """
+    _invalidation_hooks.append(hook)
+
+
+def invalidate_tenant_domain_cache(broadcast: bool = True) -> None:
+    """Drop all cached domain resolutions (call after tenant or domain changes)"""
+    tenant_domain_cache.clear()
+    if not broadcast:
+        return
+    for hook in _invalidation_hooks:
+        try:
+            hook()
+        except Exception:
+            logger.exception("Tenant cache invalidation hook failed")
+
 
 class TenantService:
     """Tenant service"""
@@ -22,31 +57,45 @@ class TenantService:
     
     def resolve_tenant_by_domain(self, domain: str) -> Optional[Dict[str, Any]]:
         """
-        Resolve tenant from domain
+        Resolve tenant from domain (cached per worker, including misses)
         """
-        tenant_domain = self.db.query(TenantDomain).filter(
+        cached = tenant_domain_cache.get(domain)
+        if cached is not MISSING:
+            return dict(cached) if cached is not None else None
+        
+        row = self.db.query(
+            TenantDomain.is_primary,
+            TenantDomain.status.label("domain_status"),
+            Tenant.tenant_id,
+            Tenant.tenant_code,
+            Tenant.name,
+            Tenant.status.label("tenant_status"),
+        ).join(
+            Tenant, Tenant.tenant_id == TenantDomain.tenant_id
+        ).filter(
             and_(
-            TenantDomain.domain == domain,
+                TenantDomain.domain == domain,
                 TenantDomain.status == DomainStatus.ACTIVE
             )
         ).first()
         
-        if not tenant_domain:
-            return None
-        
-        tenant = tenant_domain.tenant
-        if tenant.status != TenantStatus.ACTIVE:
+        if not row or row.tenant_status != TenantStatus.ACTIVE:
+            tenant_domain_cache.set(
+                domain, None, ttl_seconds=app_settings.TENANT_DOMAIN_NEGATIVE_CACHE_TTL_SECONDS
+            )
             return None
         
-        return {
+        tenant = {
             "domain": domain,
-            "tenant_id": str(tenant.tenant_id),
-            "tenant_code": tenant.tenant_code,
-            "tenant_name": tenant.name,
-            "is_primary": tenant_domain.is_primary,
-            "tenant_status": tenant.status.value,
-            "domain_status": tenant_domain.status.value,
+            "tenant_id": str(row.tenant_id),
+            "tenant_code": row.tenant_code,
+            "tenant_name": row.name,
+            "is_primary": row.is_primary,
+            "tenant_status": row.tenant_status.value,
+            "domain_status": row.domain_status.value,
         }
+        tenant_domain_cache.set(domain, tenant)
+        return dict(tenant)
     
     def list_tenants(
         self,
@@ -226,6 +275,7 @@ class TenantService:
         
         self.db.commit()
         self.db.refresh(tenant)
+        invalidate_tenant_domain_cache()  # New domains may have cached misses
         
         return {
             "tenant_id": str(tenant.tenant_id),
@@ -374,6 +424,7 @@ class TenantService:
         
         self.db.commit()
         self.db.refresh(tenant)
+        invalidate_tenant_domain_cache()
         
         return {
             "tenant_id": str(tenant.tenant_id),
@@ -399,6 +450,7 @@ class TenantService:
         tenant.status = TenantStatus(status)
         self.db.commit()
         self.db.refresh(tenant)
+        invalidate_tenant_domain_cache()
         
         return {
             "tenant_id": str(tenant.tenant_id),
@@ -444,6 +496,7 @@ class TenantService:
         self.db.add(domain_obj)
         self.db.commit()
         self.db.refresh(domain_obj)
+        invalidate_tenant_domain_cache()
         
         return {
             "domain_id": str(domain_obj.domain_id),
@@ -2,16 +2,18 @@
 Tutor service - updated for new model structure
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, select
 from typing import Optional, Dict, Any, List
 from uuid import UUID
 
 from src.models.database import (
     UserAccount, UserSubjectRole, TutorSubjectProfile, 
-    StudentTutorAssignment, AnswerSubmission, Subject
+    StudentTutorAssignment, Subject,
+    StudentSubjectProfile, StudentProgress
 )
 from src.core.exceptions import NotFoundError, BadRequestError
-from src.core.security import get_password_hash
+from src.core.security import get_password_hash_async
+from src.services.progress import add_totals, summarize_totals
 from src.models.user import AccountStatus, UserRole, AssignmentStatus, SubjectStatus, SubjectType, ValidationMethod, QuestionType
 
 
@@ -46,7 +48,7 @@ class TutorService:
         
         return default_subject
     
-    def create_tutor(
+    async def create_tutor(
         self,
         tenant_id: UUID,
         username: str,
@@ -73,7 +75,7 @@ class TutorService:
         # Generate temporary password
         import secrets
         temp_password = secrets.token_urlsafe(12)
-        password_hash = get_password_hash(temp_password)
+        password_hash = await get_password_hash_async(temp_password)
         
         # Create user account
         user = UserAccount(
@@ -224,8 +226,20 @@ class TutorService:
             "total": len(result),
         }
     
-    def get_tutor_students(self, tutor_id: UUID, tenant_id: UUID) -> Dict[str, Any]:
-        """Get students assigned to a tutor"""
+    def get_tutor_students(
+        self,
+        tutor_id: UUID,
+        tenant_id: UUID,
+        subject_id: Optional[UUID] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Get students assigned to a tutor, one entry per active assignment (student and
+        subject), ordered by subject and student name. The page, its total and each
+        student's account, grade level and progress totals come from one query;
+        totals are read from the running StudentProgress.subject_stats.
+        """
         # Verify tutor exists and has tutor role
         tutor = self.db.query(UserAccount).filter(
             and_(
@@ -248,63 +262,113 @@ class TutorService:
         if not has_tutor_role:
             raise NotFoundError("User is not a tutor")
         
-        assignments = self.db.query(StudentTutorAssignment).filter(
-            and_(
-            StudentTutorAssignment.tutor_id == tutor_id,
-            StudentTutorAssignment.tenant_id == tenant_id,
-                StudentTutorAssignment.status == AssignmentStatus.ACTIVE
-            )
-        ).all()
+        rows = self.db.execute(self._roster_stmt(tutor_id, tenant_id, subject_id, limit, offset)).mappings().all()
         
         students = []
-        for assignment in assignments:
-            student = self.db.query(UserAccount).filter(
-                UserAccount.user_id == assignment.student_id
-            ).first()
-            
-            if student:
-                # Get progress summary
-                total_questions = self.db.query(func.count(AnswerSubmission.submission_id)).filter(
-                    and_(
-                        AnswerSubmission.student_id == student.user_id,
-                        AnswerSubmission.tenant_id == tenant_id
-                    )
-                ).scalar() or 0
-                
-                correct_answers = self.db.query(func.count(AnswerSubmission.submission_id)).filter(
-                    and_(
-                        AnswerSubmission.student_id == student.user_id,
-                    AnswerSubmission.tenant_id == tenant_id,
-                        AnswerSubmission.is_correct == True
-                    )
-                ).scalar() or 0
-                
-                accuracy = (correct_answers / total_questions * 100) if total_questions > 0 else 0.0
-                
-                # Get grade level
-                from src.models.database import StudentSubjectProfile
-                profile = self.db.query(StudentSubjectProfile).filter(
-                    StudentSubjectProfile.user_id == student.user_id
-                ).first()
-                
-                students.append({
-                    "user_id": str(student.user_id),
-                    "username": student.username,
-                    "name": student.name or student.username,  # Use name from user_accounts
-                    "email": student.email,
-                    "grade_level": profile.grade_level if profile else None,
-                    "assigned_at": assignment.assigned_at,
-                    "progress_summary": {
-                        "total_questions": total_questions,
-                        "accuracy": accuracy,
-                        "average_score": 0.0,  # TODO: Calculate actual average
-                    },
-                })
+        students_by_subject: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            subject_stats = row["subject_stats"] or {}
+            overall: Dict[str, Any] = {}
+            for stats in subject_stats.values():
+                add_totals(overall, stats)
+            student = {
+                "user_id": str(row["student_id"]),
+                "username": row["username"],
+                "name": row["name"] or row["username"],  # Use name from user_accounts
+                "email": row["email"],
+                "grade_level": row["grade_level"],
+                "assigned_at": row["assigned_at"],
+                "subject_id": str(row["subject_id"]),
+                "subject_code": row["subject_code"],
+                "progress_summary": self._progress_summary(overall),
+                "subject_progress_summary": self._progress_summary(subject_stats.get(row["subject_code"], {})),
+            }
+            students.append(student)
+            group = students_by_subject.setdefault(student["subject_id"], {
+                "subject_id": student["subject_id"],
+                "subject_code": row["subject_code"],
+                "subject_name": row["subject_name"],
+                "students": [],
+            })
+            group["students"].append(student)
+        
+        total = rows[0]["total"] if rows else 0
+        if not rows and offset:
+            # Past the last page: the window count is unavailable, so count separately
+            total = self.db.execute(
+                select(func.count()).select_from(self._roster_stmt(tutor_id, tenant_id, subject_id).subquery())
+            ).scalar()
         
         return {
             "tutor_id": str(tutor_id),
             "students": students,
-            "total": len(students),
+            "students_by_subject": list(students_by_subject.values()),
+            "total": total,
+            "total_students": total,
+            "limit": limit,
+            "offset": offset,
+        }
+    
+    @staticmethod
+    def _roster_stmt(
+        tutor_id: UUID,
+        tenant_id: UUID,
+        subject_id: Optional[UUID] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ):
+        """Active assignments of a tutor joined with student, subject, grade level and progress totals"""
+        grade_level = (
+            select(StudentSubjectProfile.grade_level)
+            .where(
+                StudentSubjectProfile.user_id == StudentTutorAssignment.student_id,
+                StudentSubjectProfile.subject_id == StudentTutorAssignment.subject_id,
+            )
+            .order_by(StudentSubjectProfile.updated_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                StudentTutorAssignment.student_id,
+                StudentTutorAssignment.subject_id,
+                StudentTutorAssignment.assigned_at,
+                UserAccount.username,
+                UserAccount.name,
+                UserAccount.email,
+                Subject.subject_code,
+                Subject.name.label("subject_name"),
+                grade_level.label("grade_level"),
+                StudentProgress.subject_stats,
+                func.count().over().label("total"),
+            )
+            .join(UserAccount, UserAccount.user_id == StudentTutorAssignment.student_id)
+            .join(Subject, Subject.subject_id == StudentTutorAssignment.subject_id)
+            .outerjoin(StudentProgress, StudentProgress.student_id == StudentTutorAssignment.student_id)
+            .where(
+                StudentTutorAssignment.tutor_id == tutor_id,
+                StudentTutorAssignment.tenant_id == tenant_id,
+                StudentTutorAssignment.status == AssignmentStatus.ACTIVE,
+            )
+            .order_by(
+                Subject.subject_code,
+                func.coalesce(UserAccount.name, UserAccount.username),
+                StudentTutorAssignment.student_id,
+            )
+        )
+        if subject_id:
+            stmt = stmt.where(StudentTutorAssignment.subject_id == subject_id)
+        if limit is not None:
+            stmt = stmt.limit(limit).offset(offset)
+        return stmt
+    
+    @staticmethod
+    def _progress_summary(totals: Dict[str, Any]) -> Dict[str, Any]:
+        summary = summarize_totals(totals)
+        return {
+            "total_questions": summary["total_questions"],
+            "accuracy": summary["accuracy"],
+            "average_score": summary["average_score"],
         }
     
     def get_student_progress(
@@ -343,4 +407,19 @@ class TutorService:
             "student_id": str(student_id),
             "student_name": student.name or student.username,  # Use name from user_accounts
             **progress,
+            "weak_areas": progress["trends"]["weak_areas"],
+            "strong_areas": progress["trends"]["strong_areas"],
+        }
+    
+    def get_students_analytics(self, tutor_id: UUID, tenant_id: UUID, include_areas: bool = False) -> Dict[str, Any]:
+        """Analytics for all of a tutor's active students in one batch"""
+        from src.services.progress import ProgressService
+        assigned = select(StudentTutorAssignment.student_id).where(
+            StudentTutorAssignment.tutor_id == tutor_id,
+            StudentTutorAssignment.tenant_id == tenant_id,
+            StudentTutorAssignment.status == AssignmentStatus.ACTIVE,
+        )
+        return {
+            "tutor_id": str(tutor_id),
+            **ProgressService(self.db).get_cohort_analytics(tenant_id, assigned, include_areas),
         }
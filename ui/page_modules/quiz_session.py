@@ -68,12 +68,16 @@ def render():
                     grade_level=grade_level,
                     difficulty=difficulty,
                     num_questions=num_questions,
-                    time_limit=time_limit
+                    time_limit=time_limit,
+                    include_questions=True
                 )
                 
                 if result and "session_id" in result:
                     st.session_state["current_session_id"] = result["session_id"]
                     st.session_state["session_questions"] = result.get("questions", [])
+                    st.session_state["session_question_cache"] = {
+                        str(q["question_id"]): q for q in result.get("question_details") or []
+                    }
                     st.session_state["current_question_index"] = 0
                     st.session_state["session_start_time"] = time.time()
                     st.session_state["session_time_limit"] = time_limit
@@ -85,6 +89,24 @@ def render():
         render_active_quiz()
 
 
+def get_session_question(question_index: int):
+    """
+    Return a session question from the local cache. On a miss, fetch it together with
+    the next question in one bulk request, so moving forward does not wait on the API.
+    """
+    questions = st.session_state.get("session_questions", [])
+    cache = st.session_state.setdefault("session_question_cache", {})
+    question_id = str(questions[question_index])
+    
+    if question_id not in cache:
+        wanted = [str(qid) for qid in questions[question_index:question_index + 2] if str(qid) not in cache]
+        with st.spinner("Loading question..."):
+            for question in get_api_client().get_questions(wanted):
+                cache[str(question["question_id"])] = question
+    
+    return cache.get(question_id)
+
+
 def render_active_quiz():
     """Render active quiz session"""
     session_id = st.session_state["current_session_id"]
@@ -97,11 +119,9 @@ def render_active_quiz():
         show_quiz_results()
         return
     
-    # Get current question
+    # Get current question from the session's local cache (reruns do not refetch it)
     question_id = questions[question_index]
-    
-    with st.spinner("Loading question..."):
-        question_data = api_client.get_question(str(question_id))
+    question_data = get_session_question(question_index)
     
     if not question_data:
         st.error("Unable to load question. Please try again.")
@@ -271,15 +291,17 @@ def submit_quiz():
     answers = st.session_state.get("session_answers", {})
     api_client = get_api_client()
     
-    # Submit all answers
-    with st.spinner("Submitting answers..."):
-        for question_id in questions:
-            if str(question_id) in answers:
-                api_client.submit_answer(
-                    str(question_id),
-                    answers[str(question_id)],
-                    session_id=session_id
-                )
+    # Submit all answers in one request
+    batch = [
+        {"question_id": str(question_id), "answer": answers[str(question_id)]}
+        for question_id in questions
+        if str(question_id) in answers
+    ]
+    if batch:
+        with st.spinner("Submitting answers..."):
+            submitted = api_client.submit_session_answers(session_id, batch)
+        if submitted.get("error"):
+            return
     
     # Get results
     results = api_client.get_session_results(session_id)
@@ -367,7 +389,7 @@ def show_quiz_results():
                     if q_data.get('feedback'):
                         st.write(f"**Feedback:** {q_data['feedback']}")
     else:
-    st.info("Detailed question review will be displayed here once the API endpoint is fully implemented.")
+        st.info("Detailed question review will be displayed here once the API endpoint is fully implemented.")
     
     # Action buttons (UX-3.5)
     st.markdown("---")
@@ -378,6 +400,7 @@ def show_quiz_results():
             st.session_state["quiz_results"] = None
             st.session_state["current_question_index"] = 0
             st.session_state["session_questions"] = []
+            st.session_state["session_question_cache"] = {}
             st.session_state["current_session_id"] = None
             st.rerun()
     
@@ -386,15 +409,17 @@ def show_quiz_results():
             st.session_state["quiz_results"] = None
             st.session_state["current_question_index"] = 0
             st.session_state["session_questions"] = []
+            st.session_state["session_question_cache"] = {}
             st.session_state["current_session_id"] = None
             st.session_state["page"] = "My Progress"
             st.rerun()
     
     with col3:
-    if st.button("🏠 Back to Dashboard", use_container_width=True):
-        st.session_state["quiz_results"] = None
-        st.session_state["current_question_index"] = 0
-        st.session_state["session_questions"] = []
+        if st.button("🏠 Back to Dashboard", use_container_width=True):
+            st.session_state["quiz_results"] = None
+            st.session_state["current_question_index"] = 0
+            st.session_state["session_questions"] = []
+            st.session_state["session_question_cache"] = {}
             st.session_state["current_session_id"] = None
-        st.rerun()
+            st.rerun()
 
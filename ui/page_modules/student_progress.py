@@ -78,7 +78,7 @@ def render():
                     with col1:
                         st.metric("Total Questions", stats.get("total_questions", 0))
                     with col2:
-                        st.metric("Correct", stats.get("correct", 0))
+                        st.metric("Correct", stats.get("correct_answers", 0))
                     with col3:
                         st.metric("Accuracy", f"{subject_accuracy:.1f}%")
                     with col4:
@@ -160,6 +160,13 @@ class APIClient:
         response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
+    def get_questions(self, question_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get many questions in one request, in the requested order"""
+        url = f"{self.base_url}/questions"
+        response = self.session.get(url, params={"ids": ",".join(question_ids)}, headers=self._get_headers())
+        result = self._handle_response(response)
+        return result if isinstance(result, list) else []
+    
     def get_question_narrative(self, question_id: str) -> Dict[str, Any]:
         """Get question narrative"""
         url = f"{self.base_url}/questions/{question_id}/narrative"
@@ -197,10 +204,10 @@ class APIClient:
     def create_session(self, subject_id: str = None, subject_code: str = None,
                       grade_level: int = None, difficulty: str = None,
                       num_questions: int = 10, topics: List[str] = None,
-                      time_limit: int = None) -> Dict[str, Any]:
-        """Create quiz session"""
+                      time_limit: int = None, include_questions: bool = False) -> Dict[str, Any]:
+        """Create quiz session (include_questions embeds question payloads as question_details)"""
         url = f"{self.base_url}/sessions"
-        data = {"num_questions": num_questions}
+        data = {"num_questions": num_questions, "include_questions": include_questions}
         if subject_id:
             data["subject_id"] = subject_id
         if subject_code:
@@ -223,6 +230,12 @@ class APIClient:
         response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
+    def submit_session_answers(self, session_id: str, answers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Submit all answers for a session in one request (items: question_id, answer, time_spent, hints_used)"""
+        url = f"{self.base_url}/sessions/{session_id}/answers:batch"
+        response = self.session.post(url, json={"answers": answers}, headers=self._get_headers())
+        return self._handle_response(response)
+    
     def get_session_results(self, session_id: str) -> Dict[str, Any]:
         """Get session results"""
         url = f"{self.base_url}/sessions/{session_id}/results"
@@ -369,11 +382,12 @@ class APIClient:
         return self._handle_response(response)
     
     # Tutor endpoints
-    def get_tutor_students(self, tutor_id: str = None, subject_id: str = None) -> Dict[str, Any]:
-        """Get tutor's students (all subjects or filtered by subject)"""
+    def get_tutor_students(self, tutor_id: str = None, subject_id: str = None,
+                           limit: int = 500, offset: int = 0) -> Dict[str, Any]:
+        """Get tutor's students (all subjects or filtered by subject), one page"""
         tutor_id = tutor_id or st.session_state.get("user_info", {}).get("user_id")
         url = f"{self.base_url}/tutors/{tutor_id}/students"
-        params = {}
+        params = {"limit": limit, "offset": offset}
         if subject_id:
             params["subject_id"] = subject_id
         response = self.session.get(url, params=params, headers=self._get_headers())